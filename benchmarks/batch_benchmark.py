@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Batch evaluation benchmark.
+
+Record a batch once against the live APIs, then replay it as often as needed:
+
+    python benchmarks/batch_benchmark.py charapi/config/config.yaml manual/eins.yaml --transport record
+    python benchmarks/batch_benchmark.py charapi/config/config.yaml manual/eins.yaml --transport replay --latency-scale 0
+
+Replay runs see exactly the recorded traffic, so timings from different
+client, cache and pipeline changes can be compared directly.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from charapi import batch_evaluate
+
+
+def load_eins(eins_path: str) -> list:
+    with open(eins_path, "r") as f:
+        data = yaml.safe_load(f) or {}
+    return [ein.replace("-", "") for ein in data.get("eins", [])]
+
+
+def write_run_config(config_path: str, args) -> str:
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    transport_config = config.setdefault("transport", {})
+    if args.transport:
+        transport_config["mode"] = args.transport
+    if args.cassette:
+        transport_config["cassette_path"] = os.path.abspath(args.cassette)
+    if args.latency_scale is not None:
+        transport_config["latency_scale"] = args.latency_scale
+
+    # Keep the run config next to the original so relative paths still resolve
+    config_dir = os.path.dirname(os.path.abspath(config_path))
+    run_config = tempfile.NamedTemporaryFile(mode="w", suffix=".yaml", dir=config_dir, delete=False)
+    yaml.dump(config, run_config)
+    run_config.close()
+    return run_config.name
+
+
+def run_batch(config_path: str, eins: list, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        batch_evaluate(eins, config_path)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch charity evaluation")
+    parser.add_argument("config", help="Path to config YAML")
+    parser.add_argument("eins", help="YAML file with an 'eins' list (e.g. manual/eins.yaml)")
+    parser.add_argument("--transport", choices=["live", "record", "replay"])
+    parser.add_argument("--cassette", help="Cassette path (overrides transport.cassette_path)")
+    parser.add_argument("--latency-scale", type=float, help="Replay latency multiplier")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    eins = load_eins(args.eins)
+    run_config_path = write_run_config(args.config, args)
+
+    try:
+        timings = run_batch(run_config_path, eins, args.repeat)
+    finally:
+        os.unlink(run_config_path)
+
+    for run, elapsed in enumerate(timings, start=1):
+        rate = len(eins) / elapsed if elapsed > 0 else float("inf")
+        print(f"Run {run}: {len(eins)} evaluations in {elapsed:.3f}s ({rate:.1f} evaluations/sec)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Cache backend micro-benchmark.
+
+Times cache writes and reads for a synthetic portfolio, one key at a time,
+in bulk, and from a warm in-memory tier, for each backend:
+
+    python benchmarks/cache_benchmark.py --entries 5000
+    python benchmarks/cache_benchmark.py --backend sqlite --backend lmdb
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from charapi.cache.api_cache import APICache
+from charapi.cache.file_cache import ShardedFileCache
+from charapi.cache.lmdb_cache import LMDBCache, lmdb
+from charapi.cache.memory_cache import MemoryCache
+from charapi.cache.sharded_cache import ShardedCache
+
+BACKENDS = {
+    "sqlite": lambda directory, **options: APICache(directory + ".db", **options),
+    "sharded": lambda directory, **options: ShardedCache(directory + ".db", **options),
+    "filesystem": lambda directory, **options: ShardedFileCache(directory, **options),
+    "lmdb": lambda directory, **options: LMDBCache(directory + ".lmdb", **options),
+}
+
+
+def sample_payload(index: int) -> dict:
+    return {
+        "organization": {"ein": f"{index:09d}", "name": f"ORGANIZATION {index}", "state": "MA"},
+        "filings_with_data": [
+            {"tax_prd": 202306 - year * 100, "totrevenue": 1000000 + index, "totfuncexpns": 900000 + index}
+            for year in range(5)
+        ]
+    }
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def run(backend: str, entries: int) -> dict:
+    open_cache = BACKENDS[backend]
+    identifiers = [f"{index:09d}" for index in range(entries)]
+    payloads = {identifier: sample_payload(index) for index, identifier in enumerate(identifiers)}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        single = open_cache(os.path.join(temp_dir, "single"))
+        bulk = open_cache(os.path.join(temp_dir, "bulk"))
+        tiered = open_cache(os.path.join(temp_dir, "tiered"), memory=MemoryCache(max_entries=entries))
+        tiered.set_many("propublica", "organization", payloads)
+
+        timings = {
+            "set": timed(lambda: [single.set("propublica", "organization", i, payloads[i]) for i in identifiers]),
+            "set_many": timed(lambda: bulk.set_many("propublica", "organization", payloads)),
+            "get": timed(lambda: [single.get("propublica", "organization", i) for i in identifiers]),
+            "get_many": timed(lambda: bulk.get_many("propublica", "organization", identifiers)),
+        }
+        timings["get_memory"] = timed(lambda: [tiered.get("propublica", "organization", i) for i in identifiers])
+        single.close()
+        bulk.close()
+        tiered.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cache backend operations")
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--backend", action="append", choices=sorted(BACKENDS),
+                        help="Backend to run (repeatable; default: every installed backend)")
+    args = parser.parse_args()
+
+    backends = args.backend or [name for name in BACKENDS if name != "lmdb" or lmdb is not None]
+    for backend in backends:
+        print(backend)
+        for operation, elapsed in run(backend, args.entries).items():
+            rate = args.entries / elapsed if elapsed > 0 else float("inf")
+            print(f"  {operation:<10} {elapsed:8.3f}s  ({rate:,.0f} entries/sec)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Concurrent cache write benchmark.
+
+Several processes write disjoint EINs one entry at a time, as process-pool
+batches do during a cold run, into one SQLite file or into sharded files:
+
+    python benchmarks/cache_write_benchmark.py --processes 8 --entries 2000
+    python benchmarks/cache_write_benchmark.py --processes 8 --shards 1 --shards 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_benchmark import sample_payload
+from charapi.cache.api_cache import APICache
+from charapi.cache.sharded_cache import ShardedCache
+
+
+def open_cache(database_path: str, shards: int):
+    if shards == 1:
+        return APICache(database_path)
+    return ShardedCache(database_path, shards=shards)
+
+
+def write_entries(args) -> float:
+    database_path, shards, worker, entries = args
+    cache = open_cache(database_path, shards)
+    start = time.perf_counter()
+    for index in range(worker * entries, (worker + 1) * entries):
+        cache.set("propublica", "organization", f"{index:09d}", sample_payload(index))
+    elapsed = time.perf_counter() - start
+    cache.close()
+    return elapsed
+
+
+def run(processes: int, shards: int, entries: int) -> float:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_path = os.path.join(temp_dir, "cache.db")
+        # Create the schema up front so workers do not race to initialize it
+        open_cache(database_path, shards).close()
+        start = time.perf_counter()
+        with Pool(processes) as pool:
+            pool.map(write_entries, [(database_path, shards, worker, entries) for worker in range(processes)])
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent cache writes across processes")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--entries", type=int, default=2000, help="Entries written by each process")
+    parser.add_argument("--shards", type=int, action="append", help="Database files (repeatable; default: 1 and 8)")
+    args = parser.parse_args()
+
+    for shards in args.shards or [1, 8]:
+        elapsed = run(args.processes, shards, args.entries)
+        total = args.processes * args.entries
+        print(f"shards={shards:<3} {elapsed:8.3f}s  ({total / elapsed:,.0f} writes/sec across {args.processes} processes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Cache codec benchmark: stored bytes/entry and encode/decode time per entry.
+
+Payloads come from a recorded cassette when one is given, so the numbers
+reflect real ProPublica and CharityAPI responses; otherwise synthetic
+payloads with the ProPublica organization shape are used:
+
+    python benchmarks/codec_benchmark.py --cassette cassettes/batch.jsonl.gz
+    python benchmarks/codec_benchmark.py --entries 500
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from charapi.cache import codecs
+from charapi.cache.codecs import create_codec
+
+
+FILING_FIELDS = [
+    "totrevenue", "totfuncexpns", "totassetsend", "totliabend", "totnetassetend", "totcntrbgfts",
+    "totprgmrevnue", "invstmntinc", "txexmptbndsproceeds", "royaltsinc", "grsrntsreal", "grsrntsprsnl",
+    "rntlexpnsreal", "rntlexpnsprsnl", "rntlincreal", "rntlincprsnl", "netrntlinc", "grsalesecur",
+    "grsalesothr", "cstbasisecur", "cstbasisothr", "gnlsecur", "gnlsothr", "netgnls", "grsincfndrsng",
+    "lessdirfndrsng", "netincfndrsng", "grsincgaming", "lessdirgaming", "netincgaming", "grsalesinvent",
+    "lesscstofgoods", "netincsales", "miscrevtot11e", "compnsatncurrofcr", "othrsalwages", "payrolltx",
+    "profndraising", "txexmptbndsend", "secrdmrtgsend", "unsecurednotesend", "retainedearnend",
+    "initiationfees", "grsrcptspublicuse", "grsincmembers", "grsincother", "gftgrntsrcvd170",
+    "txrevnuelevied170", "srvcsval170", "grsinc170", "grsrcptsrelated170", "totgftgrntrcvd509",
+    "grsrcptsadmissn509", "txrevnuelevied509", "srvcsval509", "subtotsuppinc509", "totsupp509",
+]
+
+
+def synthetic_payload(rng: random.Random, index: int) -> dict:
+    ein = 100000000 + index
+    filings = []
+    for year in range(rng.randint(3, 12)):
+        filing = {
+            "ein": ein,
+            "tax_prd": 202306 - year * 100,
+            "tax_prd_yr": 2022 - year,
+            "formtype": 0,
+            "pdf_url": f"https://projects.propublica.org/nonprofits/download-filing?path={ein}_{2023 - year}06.pdf",
+            "updated": "2024-05-01T12:00:00.000Z",
+            "pct_compnsatncurrofcr": round(rng.random() / 10, 4),
+        }
+        for field in FILING_FIELDS:
+            filing[field] = rng.choice([0, 0, rng.randint(1, 10 ** rng.randint(3, 9))])
+        filings.append(filing)
+
+    return {
+        "organization": {
+            "id": ein, "ein": ein, "name": f"SYNTHETIC ORGANIZATION {index}", "careofname": None,
+            "address": f"{index} MAIN ST", "city": "BOSTON", "state": "MA", "zipcode": "02110-0000",
+            "subseccd": 3, "classification_codes": "1000", "ruling_date": "1995-01-01",
+            "deductibility_code": 1, "foundation_code": 15, "activity_codes": "000000000",
+            "organization_code": 1, "exempt_organization_status_code": 1, "tax_period": "2023-06-01",
+            "asset_code": 6, "income_code": 6, "filing_requirement_code": 1, "revenue_amount": 1938467,
+            "ntee_code": "B82", "sort_name": None, "created_at": "2024-01-01T00:00:00.000Z",
+            "updated_at": "2024-05-01T00:00:00.000Z", "data_source": "business_master",
+        },
+        "filings_with_data": filings,
+        "filings_without_data": [],
+        "data_source": "business_master",
+        "api_version": 2,
+    }
+
+
+def cassette_payloads(cassette_path: str) -> list:
+    payloads = []
+    with gzip.open(cassette_path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            interaction = json.loads(line)
+            if interaction.get("status") == 200:
+                try:
+                    payloads.append(json.loads(interaction["body"]))
+                except ValueError:
+                    continue
+    return payloads
+
+
+def measure(codec, payloads: list) -> dict:
+    start = time.perf_counter()
+    encoded = [codec.encode(payload) for payload in payloads]
+    encode_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for data in encoded:
+        codec.decode(data)
+    decode_seconds = time.perf_counter() - start
+
+    total_bytes = sum(len(data.encode("utf-8") if isinstance(data, str) else data) for data in encoded)
+    return {
+        "bytes_per_entry": total_bytes / len(payloads),
+        "encode_us": encode_seconds / len(payloads) * 1e6,
+        "decode_us": decode_seconds / len(payloads) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark APICache payload codecs")
+    parser.add_argument("--cassette", help="Recorded cassette to take payloads from")
+    parser.add_argument("--entries", type=int, default=500, help="Synthetic payload count")
+    args = parser.parse_args()
+
+    if args.cassette:
+        payloads = cassette_payloads(args.cassette)
+    else:
+        rng = random.Random(0)
+        payloads = [synthetic_payload(rng, index) for index in range(args.entries)]
+    if not payloads:
+        sys.exit("No payloads to benchmark")
+
+    variants = [("json", None), ("zlib", 1), ("zlib", 6), ("zlib", 9), ("zstd", 3), ("zstd", 9)]
+    serializer = "orjson" if codecs.orjson is not None else "json"
+    print(f"{len(payloads)} payloads, serializer: {serializer}")
+    print(f"{'codec':<10} {'bytes/entry':>12} {'encode us':>10} {'decode us/hit':>14}")
+    for name, level in variants:
+        try:
+            codec = create_codec(name, level)
+        except ImportError:
+            print(f"{name:<10} (not installed)")
+            continue
+        result = measure(codec, payloads)
+        label = name if level is None else f"{name}-{level}"
+        print(f"{label:<10} {result['bytes_per_entry']:>12,.0f} {result['encode_us']:>10.1f} {result['decode_us']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Cache payload deduplication benchmark.
+
+Fills a SQLite cache the way a portfolio run does (organization and filings
+entries per EIN, search queries whose results overlap, negative results),
+then refetches everything with identical bodies, with and without dedup:
+
+    python benchmarks/dedup_benchmark.py --organizations 5000
+    python benchmarks/dedup_benchmark.py --filings 1 --search-variants 50
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from charapi.cache.api_cache import APICache
+
+# Form 990 fields per filing in a ProPublica organization payload, roughly
+FILING_FIELDS = 120
+
+
+def organization_payload(index: int, filings: int) -> dict:
+    """An organization payload about the size of ProPublica's (several KB compressed)."""
+    return {
+        "organization": {"ein": f"{index:09d}", "name": f"ORGANIZATION {index}", "state": "MA",
+                         "ntee_code": "P20", "subsection_code": 3, "tax_period": 202306},
+        "filings_with_data": [
+            {"tax_prd": 202306 - year * 100, "tax_prd_yr": 2023 - year,
+             **{f"field{field}": (index * 7919 + year * 104729 + field * 15485863) % 10_000_000
+                for field in range(FILING_FIELDS)}}
+            for year in range(filings)
+        ]
+    }
+
+
+def workload(organizations: int, filings: int, search_variants: int) -> list:
+    """(service, endpoint, {identifier: payload}) batches for one run."""
+    payloads = {f"{index:09d}": organization_payload(index, filings) for index in range(organizations)}
+    # Queries that differ only in wording return the same results page
+    pages = [[payloads[ein]["organization"] for ein in list(payloads)[start:start + 25]]
+             for start in range(0, organizations, 25)]
+    searches = {f"query {index} variant {variant}": page
+                for index, page in enumerate(pages) for variant in range(search_variants)}
+    return [
+        ("propublica", "organization", payloads),
+        ("propublica", "filings", {ein: payload["filings_with_data"] for ein, payload in payloads.items()}),
+        ("propublica", "search", searches),
+        ("charityapi", "organizations", {f"{index:09d}": None for index in range(organizations, 2 * organizations)}),
+    ]
+
+
+def database_bytes(cache: APICache) -> int:
+    conn = cache._get_connection()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("VACUUM")
+    return cache._file_bytes()
+
+
+def run(organizations: int, filings: int, search_variants: int, min_bytes) -> dict:
+    batches = workload(organizations, filings, search_variants)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = APICache(os.path.join(temp_dir, "cache.db"), dedup_min_bytes=min_bytes)
+        conn = cache._get_connection()
+        # Keep every page written in the WAL, so its frame count measures write volume
+        conn.execute("PRAGMA wal_autocheckpoint=0")
+        timings = {}
+        for phase in ("fill", "refetch"):
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            start = time.perf_counter()
+            for service, endpoint, items in batches:
+                for identifier, payload in items.items():
+                    cache.set(service, endpoint, identifier, payload)
+            timings[phase] = time.perf_counter() - start
+            timings[f"{phase}_pages"] = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()[1]
+        stats = cache.get_stats()
+        timings["bytes"] = database_bytes(cache)
+        timings["shared_payloads"] = stats["shared_payloads"]
+        timings["entries"] = stats["valid_entries"]
+        cache.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cache payload deduplication")
+    parser.add_argument("--organizations", type=int, default=5000)
+    parser.add_argument("--filings", type=int, default=8, help="Filings per organization payload")
+    parser.add_argument("--search-variants", type=int, default=4, help="Search queries sharing each results page")
+    parser.add_argument("--min-bytes", type=int, action="append",
+                        help="dedup_min_bytes to compare against no dedup (repeatable; default: 64)")
+    args = parser.parse_args()
+
+    for min_bytes in [None] + (args.min_bytes or [64]):
+        result = run(args.organizations, args.filings, args.search_variants, min_bytes)
+        label = "off" if min_bytes is None else f">={min_bytes}B"
+        print(
+            f"dedup {label:<7} fill {result['fill']:7.3f}s ({result['fill_pages']:,} pages)  "
+            f"refetch {result['refetch']:7.3f}s ({result['refetch_pages']:,} pages)  "
+            f"{result['bytes'] / 1024:9,.0f} KiB  {result['entries']:,} entries, "
+            f"{result['shared_payloads']:,} shared payloads"
+        )
+
+
+if __name__ == "__main__":
+    main()
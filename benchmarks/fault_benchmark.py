@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Resilience benchmark: batch throughput and cache poisoning under injected faults.
+
+Run against a recorded cassette so every profile sees the same traffic:
+
+    python benchmarks/fault_benchmark.py charapi/config/config.yaml manual/eins.yaml \
+        --cassette cassettes/batch.jsonl.gz --latency-scale 0
+
+For each fault profile the batch is evaluated on a fresh cache with faults
+injected, which gives completed evaluations/sec. The same cache is then
+re-evaluated with faults switched off and compared against a clean baseline;
+every EIN whose result still differs was served a poisoned cache entry.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_benchmark import load_eins
+from charapi import evaluate_charity
+from charapi.clients.transport import Cassette, FaultInjector
+
+
+PROFILES = {
+    "clean": {},
+    "charityapi_timeouts_5pct": {
+        "charityapi": {"error_rate": 0.05, "errors": ["timeout"], "seed": 1}
+    },
+    "propublica_503_bursts": {
+        "propublica": {"error_rate": 0.02, "errors": ["http_503"], "burst_length": 10, "seed": 2}
+    },
+    "slow_responses": {
+        "propublica": {"slow_rate": 0.1, "slow_seconds": 0.5, "seed": 3},
+        "charityapi": {"slow_rate": 0.1, "slow_seconds": 0.5, "seed": 4}
+    },
+    "truncated_bodies": {
+        "propublica": {"truncate_rate": 0.05, "seed": 5},
+        "charityapi": {"truncate_rate": 0.05, "seed": 6}
+    },
+}
+
+
+def write_run_config(base_config: dict, config_dir: str, cache_path: str, faults: dict) -> str:
+    config = yaml.safe_load(yaml.dump(base_config))
+    config.setdefault("caching", {}).update({"enabled": True, "database_path": cache_path})
+    config.setdefault("transport", {})["faults"] = faults
+
+    run_config = tempfile.NamedTemporaryFile(mode="w", suffix=".yaml", dir=config_dir, delete=False)
+    yaml.dump(config, run_config)
+    run_config.close()
+    return run_config.name
+
+
+def fingerprint(result) -> tuple:
+    metrics = tuple((m.name, m.display_value, m.status.value) for m in result.metrics)
+    return (result.organization_name, metrics)
+
+
+def evaluate_all(eins: list, config_path: str) -> tuple:
+    Cassette.rewind_all()
+    FaultInjector.reset_all()
+
+    results = {}
+    start = time.perf_counter()
+    for ein in eins:
+        try:
+            results[ein] = fingerprint(evaluate_charity(ein, config_path))
+        except Exception:
+            results[ein] = None
+    elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def injected_faults() -> dict:
+    totals = {}
+    for injector in FaultInjector.all_injectors():
+        for kind, count in injector.injected.items():
+            label = f"{injector.service}:{kind}"
+            totals[label] = totals.get(label, 0) + count
+    return totals
+
+
+def run_profile(name: str, faults: dict, base_config: dict, config_dir: str, eins: list, baseline: dict) -> dict:
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_path = os.path.join(cache_dir, "fault_cache.db")
+        faulty_config = write_run_config(base_config, config_dir, cache_path, faults)
+        clean_config = write_run_config(base_config, config_dir, cache_path, {})
+        try:
+            results, elapsed = evaluate_all(eins, faulty_config)
+            faults_injected = injected_faults()
+            rerun_results, _ = evaluate_all(eins, clean_config)
+        finally:
+            os.unlink(faulty_config)
+            os.unlink(clean_config)
+
+    completed = sum(1 for ein in eins if results[ein] is not None)
+    degraded = sum(1 for ein in eins if results[ein] != baseline[ein])
+    poisoned = sum(1 for ein in eins if rerun_results[ein] != baseline[ein])
+
+    return {
+        "profile": name,
+        "completed": completed,
+        "elapsed": elapsed,
+        "rate": completed / elapsed if elapsed > 0 else float("inf"),
+        "degraded": degraded,
+        "poisoned": poisoned,
+        "faults": faults_injected,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch evaluation under injected faults")
+    parser.add_argument("config", help="Path to config YAML (real mode)")
+    parser.add_argument("eins", help="YAML file with an 'eins' list (e.g. manual/eins.yaml)")
+    parser.add_argument("--cassette", help="Replay this cassette instead of calling live APIs")
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--profiles", help="YAML file mapping profile names to per-service fault profiles")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        base_config = yaml.safe_load(f)
+    if args.cassette:
+        base_config["transport"] = {
+            "mode": "replay",
+            "cassette_path": os.path.abspath(args.cassette),
+            "latency_scale": args.latency_scale
+        }
+
+    profiles = PROFILES
+    if args.profiles:
+        with open(args.profiles, "r") as f:
+            profiles = yaml.safe_load(f)
+
+    eins = load_eins(args.eins)
+    config_dir = os.path.dirname(os.path.abspath(args.config))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        baseline_config = write_run_config(base_config, config_dir, os.path.join(cache_dir, "baseline.db"), {})
+        try:
+            baseline, _ = evaluate_all(eins, baseline_config)
+        finally:
+            os.unlink(baseline_config)
+
+    print(f"{'Profile':28s} {'Completed':>10s} {'Evals/sec':>10s} {'Degraded':>9s} {'Poisoned':>9s}  Faults")
+    for name, faults in profiles.items():
+        stats = run_profile(name, faults, base_config, config_dir, eins, baseline)
+        faults_str = ", ".join(f"{label}={count}" for label, count in sorted(stats["faults"].items())) or "-"
+        print(f"{name:28s} {stats['completed']:>10d} {stats['rate']:>10.1f} "
+              f"{stats['degraded']:>9d} {stats['poisoned']:>9d}  {faults_str}")
+
+
+if __name__ == "__main__":
+    main()
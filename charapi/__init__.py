@@ -7,10 +7,14 @@ using multiple data sources and provides scoring with letter grades.
 Main entry points:
 - evaluate_charity(ein, config_path): Evaluate a single charity by EIN
 - batch_evaluate(eins, config_path): Evaluate multiple charities
+- prefetch_cache(eins, config_path): Warm the API cache before a batch evaluation
+- plan_batch(eins, config_path): Estimate the requests and time a batch evaluation needs
 """
 
 from .api.charity_evaluator import evaluate_charity, batch_evaluate
+from .api.batch_plan import plan_batch
+from .api.prefetch import prefetch_cache
 from .data.charity_evaluation_result import CharityEvaluationResult
 
 __version__ = "1.0.0"
-__all__ = ["evaluate_charity", "batch_evaluate", "CharityEvaluationResult"]
\ No newline at end of file
+__all__ = ["evaluate_charity", "batch_evaluate", "prefetch_cache", "plan_batch", "CharityEvaluationResult"]
\ No newline at end of file
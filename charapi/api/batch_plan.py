@@ -0,0 +1,105 @@
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from ..cache.backend import normalize_ein
+from ..cache.telemetry import read_fetch_latency
+from ..clients.base_client import BaseAPIClient
+from ..clients.charityapi_client import CharityAPIClient
+from ..clients.propublica_client import ProPublicaClient
+from ..irs.local_data import resolve_config_path
+from .prefetch import plan_prefetch
+
+
+def _fetch_latency(client: BaseAPIClient, endpoint: str, dumped: Dict, default_seconds: float):
+    """Mean fetch latency from this process's telemetry, else the last telemetry dump, else the default."""
+    observed = client.telemetry.mean_fetch_seconds(client.service_name, endpoint)
+    if observed is not None:
+        return observed, "telemetry"
+    if (client.service_name, endpoint) in dumped:
+        return dumped[(client.service_name, endpoint)], "telemetry_path"
+    return default_seconds, "default"
+
+
+def _service_seconds(requests: int, latency_seconds: float, workers: int, rate_limit: Optional[Dict]) -> float:
+    """Time to send requests with workers in parallel, no faster than the rate limit allows."""
+    seconds = requests * latency_seconds / workers
+    if rate_limit:
+        seconds = max(seconds, max(0, requests - rate_limit.get("burst", 1)) / rate_limit["requests_per_second"])
+    return seconds
+
+
+def plan_batch(eins: List[str], config_path: str, max_workers: Optional[int] = None,
+               refresh_within_hours: float = 0) -> Dict[str, Any]:
+    """
+    Dry run of batch_evaluate(eins): what it would fetch and roughly how long it would take.
+
+    Counts the upstream requests each service needs from one bulk cache read
+    per endpoint, as plan_prefetch does. Cached errors count as served
+    (evaluations do not retry them before they expire); entries expiring
+    within refresh_within_hours count as fetched. Wall time is estimated from
+    mean fetch latency and transport.rate_limits, both for batch_evaluate,
+    which fetches one request at a time, and for prefetch with max_workers per
+    service. "order" lists the EINs with the fewest requests first, so a run
+    in that order returns cache-hot results before any rate-limited fetching.
+    """
+    with open(config_path, "r") as f:
+        cache_config = yaml.safe_load(f).get("caching") or {}
+    prefetch_config = cache_config.get("prefetch") or {}
+    if max_workers is None:
+        max_workers = prefetch_config.get("max_workers", 4)
+    default_latency = prefetch_config.get("default_latency_seconds", 1.0)
+
+    clients = [ProPublicaClient(config_path), CharityAPIClient(config_path)]
+    if not any(client.cache_enabled for client in clients):
+        raise ValueError("Planning needs caching.enabled and live (not mock) clients")
+    dumped = {}
+    if cache_config.get("telemetry_path"):
+        telemetry_path = resolve_config_path(config_path, cache_config["telemetry_path"])
+        if telemetry_path.exists():
+            dumped = read_fetch_latency(telemetry_path)
+
+    originals: Dict[str, str] = {}
+    for ein in eins:
+        originals.setdefault(normalize_ein(ein), ein)
+    tasks, fresh = plan_prefetch(clients, originals.values(), refresh_within_hours, refetch_errors=False)
+    requests_per_ein = dict.fromkeys(originals, 0)
+    requests: Dict[BaseAPIClient, Dict[str, int]] = {client: {} for client in clients if client.cache_enabled}
+    for client, ein, endpoints in tasks:
+        for endpoint in client.upstream_requests(endpoints):
+            requests[client][endpoint] = requests[client].get(endpoint, 0) + 1
+            requests_per_ein[normalize_ein(ein)] += 1
+
+    services = {}
+    for client, counts in requests.items():
+        total = sum(counts.values())
+        fetch_seconds = 0.0
+        sources = set()
+        for endpoint, count in counts.items():
+            latency, source = _fetch_latency(client, endpoint, dumped, default_latency)
+            fetch_seconds += count * latency
+            sources.add(source)
+        mean_latency = fetch_seconds / total if total else 0.0
+        services[client.service_name] = {
+            "requests": total,
+            "mean_latency_seconds": mean_latency,
+            "latency_source": ", ".join(sorted(sources)) or None,
+            "rate_limit": client.rate_limit,
+            "prefetch_seconds": _service_seconds(total, mean_latency, max_workers, client.rate_limit)
+        }
+
+    # batch_evaluate waits for each request in turn, and each rate limit also bounds its service on its own
+    evaluate_seconds = max(
+        [sum(service["requests"] * service["mean_latency_seconds"] for service in services.values())] +
+        [_service_seconds(service["requests"], 0.0, 1, service["rate_limit"]) for service in services.values()]
+    )
+    order = sorted(originals, key=lambda ein: requests_per_ein[ein])
+    return {
+        "eins": len(requests_per_ein),
+        "cached_eins": sum(1 for count in requests_per_ein.values() if count == 0),
+        "fresh_entries": fresh,
+        "services": services,
+        "evaluate_seconds": evaluate_seconds,
+        "prefetch_seconds": max([service["prefetch_seconds"] for service in services.values()] + [0.0]),
+        "order": [originals[ein] for ein in order]
+    }
@@ -16,16 +16,28 @@ from ..analyzers.validation_scorer import ValidationScorer
 from ..analyzers.organization_type_analyzer import OrganizationTypeAnalyzer
 from ..analyzers.preference_analyzer import PreferenceAnalyzer
 from ..analyzers.summary_generator import SummaryGenerator
+from ..irs.local_data import resolve_config_path
 
 
-def evaluate_charity(ein: str, config_path: str) -> CharityEvaluationResult:
+def _load_config(config_path: str) -> dict:
     with open(config_path, "r") as f:
         config = yaml.safe_load(f)
 
     config["_config_file_path"] = config_path
+    return config
 
-    propublica = ProPublicaClient(config_path)
-    charityapi = CharityAPIClient(config_path)
+
+def evaluate_charity(ein: str, config_path: str) -> CharityEvaluationResult:
+    config = _load_config(config_path)
+    return _evaluate(ein, config, ProPublicaClient(config_path), CharityAPIClient(config_path))
+
+
+def _evaluate(
+    ein: str,
+    config: dict,
+    propublica: ProPublicaClient,
+    charityapi: CharityAPIClient
+) -> CharityEvaluationResult:
     financial_analyzer = FinancialAnalyzer(config)
     compliance_checker = ComplianceChecker(config)
     validation_scorer = ValidationScorer(config)
@@ -98,4 +110,20 @@ def evaluate_charity(ein: str, config_path: str) -> CharityEvaluationResult:
 
 
 def batch_evaluate(eins: List[str], config_path: str) -> List[CharityEvaluationResult]:
-    return [evaluate_charity(ein, config_path) for ein in eins]
+    config = _load_config(config_path)
+    propublica = ProPublicaClient(config_path)
+    charityapi = CharityAPIClient(config_path)
+    chunk_size = config.get("caching", {}).get("prefetch_chunk_size", 100)
+
+    results = []
+    for start in range(0, len(eins), chunk_size):
+        chunk = eins[start:start + chunk_size]
+        # One bulk cache read per endpoint for the whole chunk
+        propublica.prefetch(chunk)
+        charityapi.prefetch(chunk)
+        results.extend(_evaluate(ein, config, propublica, charityapi) for ein in chunk)
+
+    telemetry_path = config.get("caching", {}).get("telemetry_path")
+    if telemetry_path:
+        propublica.telemetry.write_prometheus(resolve_config_path(config_path, telemetry_path))
+    return results
@@ -0,0 +1,108 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+from ..cache.backend import normalize_ein
+from ..clients.base_client import BaseAPIClient
+from ..clients.charityapi_client import CharityAPIClient
+from ..clients.propublica_client import ProPublicaClient
+
+# (client, EIN as given, endpoints to fetch)
+PrefetchTask = Tuple[BaseAPIClient, str, List[str]]
+
+
+def load_ein_source(path: str) -> List[str]:
+    """EINs from a YAML file with an 'eins' list (e.g. manual/eins.yaml) or a text file with one EIN per line."""
+    text = Path(path).read_text()
+    if Path(path).suffix in (".yaml", ".yml"):
+        return [str(ein) for ein in (yaml.safe_load(text) or {}).get("eins", [])]
+    lines = (line.split("#", 1)[0].strip() for line in text.splitlines())
+    return [line for line in lines if line]
+
+
+def plan_prefetch(clients: List[BaseAPIClient], eins: Iterable[str], refresh_within_hours: float,
+                  refetch_errors: bool = True) -> Tuple[List[PrefetchTask], int]:
+    """
+    Check cache state for every EIN with one bulk read per endpoint.
+
+    Returns the tasks for entries that are missing, expire within
+    refresh_within_hours, or (with refetch_errors) are cached errors, plus the
+    number of entries that need nothing.
+    """
+    originals: Dict[str, str] = {}
+    for ein in eins:
+        originals.setdefault(normalize_ein(ein), ein)
+    horizon = time.time() + refresh_within_hours * 3600
+
+    tasks = []
+    fresh = 0
+    for client in clients:
+        if not client.cache_enabled:
+            continue
+        due: Dict[str, List[str]] = {}
+        for endpoint in client.cached_endpoints():
+            cached = client.cache.get_many_entries(client.service_name, endpoint, list(originals))
+            for ein in originals:
+                entry = cached.get(ein)
+                if entry is None or entry[1] <= horizon or (refetch_errors and client.is_error_entry(entry[0])):
+                    due.setdefault(ein, []).append(endpoint)
+                else:
+                    fresh += 1
+        tasks.extend((client, originals[ein], endpoints) for ein, endpoints in due.items())
+    return tasks, fresh
+
+
+def prefetch_cache(eins: List[str], config_path: str, max_workers: Optional[int] = None,
+                   refresh_within_hours: Optional[float] = None,
+                   progress: Optional[Callable[[int, int, float], None]] = None) -> Dict[str, Any]:
+    """
+    Warm the cache for a list of EINs before evaluating them.
+
+    Fetches only the ProPublica and CharityAPI entries an evaluation would
+    miss or find about to expire, max_workers at a time per service, within
+    transport.rate_limits. Each fetch covers one EIN's due entries for one
+    service; progress(done, total, elapsed_seconds) is called after each.
+    """
+    with open(config_path, "r") as f:
+        prefetch_config = (yaml.safe_load(f).get("caching") or {}).get("prefetch") or {}
+    if max_workers is None:
+        max_workers = prefetch_config.get("max_workers", 4)
+    if refresh_within_hours is None:
+        refresh_within_hours = prefetch_config.get("refresh_within_hours", 1)
+
+    clients = [ProPublicaClient(config_path), CharityAPIClient(config_path)]
+    if not any(client.cache_enabled for client in clients):
+        raise ValueError("Prefetching needs caching.enabled and live (not mock) clients")
+
+    started = time.perf_counter()
+    tasks, fresh = plan_prefetch(clients, eins, refresh_within_hours)
+    # One pool per service, so a service held back by its rate limit does not hold up the other
+    executors = {
+        client.service_name: ThreadPoolExecutor(max_workers, thread_name_prefix=f"prefetch-{client.service_name}")
+        for client in clients
+    }
+    fetches = failed = 0
+    try:
+        futures = [executors[client.service_name].submit(client.warm, ein, endpoints)
+                   for client, ein, endpoints in tasks]
+        for done, future in enumerate(as_completed(futures), start=1):
+            if future.result():
+                fetches += 1
+            else:
+                failed += 1
+            if progress is not None:
+                progress(done, len(futures), time.perf_counter() - started)
+    finally:
+        for executor in executors.values():
+            executor.shutdown(cancel_futures=True)
+
+    return {
+        "eins": len({normalize_ein(ein) for ein in eins}),
+        "fresh_entries": fresh,
+        "fetches": fetches,
+        "failed": failed,
+        "seconds": time.perf_counter() - started
+    }
@@ -0,0 +1,250 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+from .backend import CacheBackend, create_cache
+from .snapshot import SnapshotError, export_snapshot, import_snapshot
+from ..api.batch_plan import plan_batch
+from ..api.prefetch import load_ein_source, prefetch_cache
+from ..irs.local_data import find_project_root
+
+
+def load_config(config_path: str) -> dict:
+    with open(config_path, "r") as f:
+        return yaml.safe_load(f)
+
+
+def open_cache(config_path: str) -> CacheBackend:
+    cache_config = load_config(config_path).get("caching", {})
+    project_root = find_project_root(Path(config_path).resolve())
+
+    def resolve_path(path_str: str) -> Path:
+        path = Path(path_str)
+        return path if path.is_absolute() else project_root / path
+
+    return create_cache(cache_config, resolve_path)
+
+
+def stats_command(args):
+    cache = open_cache(args.config)
+    for name, value in cache.get_stats().items():
+        print(f"{name}: {value}")
+    cache.close()
+
+
+def compact_command(args):
+    cache = open_cache(args.config)
+    if not hasattr(cache, "compact"):
+        cache.close()
+        sys.exit(f"The {cache.name} cache backend does not support compact")
+    result = cache.compact()
+    cache.close()
+    print(f"Removed {result['expired_removed']:,} expired and evicted {result['evicted']:,} entries; "
+          f"{result['bytes_before']:,} -> {result['bytes_after']:,} bytes")
+
+
+def migrate_command(args):
+    cache = open_cache(args.config)
+    remaining = cache.migration_remaining()
+    started = time.perf_counter()
+    migrated = 0
+    while True:
+        result = cache.migrate(batch_size=args.batch_size, time_budget_seconds=1.0)
+        migrated += result["migrated"]
+        if result["complete"]:
+            break
+        print(f"Migrated {migrated:,} of {remaining:,} rows", flush=True)
+    cache.close()
+    print(f"Migrated {migrated:,} rows in {time.perf_counter() - started:.1f}s")
+
+
+def publish_replica_command(args):
+    cache = open_cache(args.config)
+    if not hasattr(cache, "publish_replica"):
+        cache.close()
+        sys.exit(f"The {cache.name} cache backend cannot publish a replica")
+    result = cache.publish_replica(args.replica)
+    cache.close()
+    print(f"Published {result['entries']:,} entries ({result['bytes']:,} bytes) to {args.replica}")
+
+
+def export_command(args):
+    cache = open_cache(args.config)
+    started = time.perf_counter()
+    result = export_snapshot(
+        cache,
+        Path(args.snapshot),
+        services=args.service,
+        endpoints=args.endpoint,
+        eins=load_ein_source(args.eins) if args.eins else None
+    )
+    cache.close()
+    print(f"Exported {result['entries']:,} entries ({result['bytes']:,} bytes) to {args.snapshot} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+def import_command(args):
+    cache = open_cache(args.config)
+    started = time.perf_counter()
+    try:
+        result = import_snapshot(cache, Path(args.snapshot))
+    except SnapshotError as e:
+        sys.exit(f"{args.snapshot}: {e}")
+    finally:
+        cache.close()
+    print(f"Imported {result['imported']:,} entries, skipped {result['expired_skipped']:,} expired, "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+def invalidate_ein_command(args):
+    cache = open_cache(args.config)
+    removed = sum(cache.invalidate_ein(ein) for ein in args.ein)
+    cache.close()
+    print(f"Removed {removed:,} entries for {len(args.ein):,} EINs")
+
+
+def identifiers_command(args):
+    cache = open_cache(args.config)
+    for identifier in cache.iter_identifiers(args.service, args.endpoint):
+        print(identifier)
+    cache.close()
+
+
+def command_eins(args) -> list:
+    eins = [ein for source in args.source for ein in load_ein_source(source)] + (args.ein or [])
+    if not eins:
+        sys.exit("No EINs given: pass EIN list files or --ein")
+    return eins
+
+
+def prefetch_command(args):
+    eins = command_eins(args)
+    last_report = 0.0
+
+    def report(done, total, elapsed):
+        nonlocal last_report
+        if done < total and elapsed - last_report < 1.0:
+            return
+        last_report = elapsed
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = f"{(total - done) / rate:.0f}s" if rate > 0 else "?"
+        print(f"Fetched {done:,} of {total:,} ({rate:.1f}/s, ETA {eta})", flush=True)
+
+    try:
+        result = prefetch_cache(eins, args.config, max_workers=args.workers,
+                                refresh_within_hours=args.refresh_within_hours, progress=report)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"{result['eins']:,} EINs: {result['fresh_entries']:,} entries already fresh, "
+          f"{result['fetches']:,} fetches, {result['failed']:,} failed, in {result['seconds']:.1f}s")
+
+
+def plan_command(args):
+    try:
+        plan = plan_batch(command_eins(args), args.config, max_workers=args.workers,
+                          refresh_within_hours=args.refresh_within_hours)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"{plan['eins']:,} EINs: {plan['cached_eins']:,} served entirely from cache, "
+          f"{plan['fresh_entries']:,} cached entries")
+    for service, estimate in plan["services"].items():
+        limit = estimate["rate_limit"]
+        limit_text = f", limit {limit['requests_per_second']}/s" if limit else ""
+        latency_text = (f", {estimate['mean_latency_seconds']:.2f}s each ({estimate['latency_source']})"
+                        if estimate["requests"] else "")
+        print(f"{service}: {estimate['requests']:,} requests{latency_text}{limit_text}")
+    print(f"Estimated {plan['evaluate_seconds']:.0f}s for batch_evaluate, "
+          f"{plan['prefetch_seconds']:.0f}s for prefetch")
+    if args.write_order:
+        Path(args.write_order).write_text("\n".join(plan["order"]) + "\n")
+        print(f"Wrote cache-hot-first order to {args.write_order}")
+
+
+def add_ein_arguments(subparser):
+    subparser.add_argument(
+        "source", nargs="*", help="EIN list: YAML file with an 'eins' list (e.g. manual/eins.yaml) or one EIN per line"
+    )
+    subparser.add_argument("--ein", action="append", help="EIN to include (repeatable)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m charapi.cache", description="Maintain the API response cache")
+    parser.add_argument("--config", default="charapi/config/config.yaml", help="Config file with a caching section")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    stats_parser = subparsers.add_parser("stats", help="Show entry counts and sizes")
+    stats_parser.set_defaults(handler=stats_command)
+
+    compact_parser = subparsers.add_parser(
+        "compact", help="Drop expired entries, evict down to max_entries/max_bytes and VACUUM the database"
+    )
+    compact_parser.set_defaults(handler=compact_command)
+
+    migrate_parser = subparsers.add_parser(
+        "migrate", help="Upgrade rows written by an older release or codec now, instead of in the background"
+    )
+    migrate_parser.add_argument("--batch-size", type=int, default=500, help="Rows per write transaction")
+    migrate_parser.set_defaults(handler=migrate_command)
+
+    replica_parser = subparsers.add_parser(
+        "publish-replica", help="Write a compact read-only copy of the cache for caching.backend: replica workers"
+    )
+    replica_parser.add_argument("replica", help="Replica database file to write")
+    replica_parser.set_defaults(handler=publish_replica_command)
+
+    export_parser = subparsers.add_parser("export", help="Write unexpired entries to a checksummed snapshot file")
+    export_parser.add_argument("snapshot", help="Snapshot file to write")
+    export_parser.add_argument("--service", action="append", help="Only this service (repeatable)")
+    export_parser.add_argument("--endpoint", action="append", help="Only this endpoint (repeatable)")
+    export_parser.add_argument(
+        "--eins", help="Only these EINs: YAML file with an 'eins' list (e.g. manual/eins.yaml) or one EIN per line"
+    )
+    export_parser.set_defaults(handler=export_command)
+
+    import_parser = subparsers.add_parser("import", help="Verify a snapshot and load its entries, keeping their TTLs")
+    import_parser.add_argument("snapshot", help="Snapshot file written by export")
+    import_parser.set_defaults(handler=import_command)
+
+    invalidate_parser = subparsers.add_parser(
+        "invalidate-ein", help="Remove everything cached for some EINs, in every service and endpoint"
+    )
+    invalidate_parser.add_argument("ein", nargs="+", help="EIN, with or without the dash")
+    invalidate_parser.set_defaults(handler=invalidate_ein_command)
+
+    identifiers_parser = subparsers.add_parser(
+        "identifiers", help="List the identifiers (EINs, search queries) cached for one service endpoint"
+    )
+    identifiers_parser.add_argument("service", help="e.g. propublica")
+    identifiers_parser.add_argument("endpoint", help="e.g. organization")
+    identifiers_parser.set_defaults(handler=identifiers_command)
+
+    prefetch_parser = subparsers.add_parser(
+        "prefetch", help="Fetch the API entries a batch evaluation of some EINs would miss or find about to expire"
+    )
+    add_ein_arguments(prefetch_parser)
+    prefetch_parser.add_argument("--workers", type=int, help="Concurrent fetches per service (default: caching.prefetch)")
+    prefetch_parser.add_argument(
+        "--refresh-within-hours", type=float, help="Also refetch entries expiring this soon (default: caching.prefetch)"
+    )
+    prefetch_parser.set_defaults(handler=prefetch_command)
+
+    plan_parser = subparsers.add_parser(
+        "plan", help="Dry run: count the requests a batch evaluation of some EINs would send and estimate its time"
+    )
+    add_ein_arguments(plan_parser)
+    plan_parser.add_argument("--workers", type=int, help="Prefetch workers per service to estimate for")
+    plan_parser.add_argument(
+        "--refresh-within-hours", type=float, default=0, help="Count entries expiring this soon as fetched"
+    )
+    plan_parser.add_argument("--write-order", help="Write the EINs to this file, cache-hot first, for prefetch or a run")
+    plan_parser.set_defaults(handler=plan_command)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
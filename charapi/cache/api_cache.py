@@ -0,0 +1,701 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .backend import CacheBackend, Entry, StoredEntry
+from .memory_cache import MemoryCache
+from .telemetry import CacheTelemetry
+
+
+class APICache(CacheBackend):
+    """
+    SQLite-backed cache for API responses (caching.backend: sqlite).
+
+    The database runs in WAL mode so readers never block the writer, and each
+    thread keeps its own reusable connection. Statements are issued as fixed SQL
+    strings so sqlite3's per-connection statement cache reuses the prepared
+    statements across calls.
+
+    An optional MemoryCache sits in front of SQLite and serves repeat reads as
+    already-decoded objects; every write and invalidation goes through both tiers.
+
+    Payloads are written with the configured codec (zlib-compressed JSON by
+    default) and each row records its codec id, so rows written as plain JSON
+    text before codecs existed, or with another codec, stay readable.
+
+    With max_entries and/or max_bytes set, entries beyond the budget are
+    evicted least recently used ("lru") or least frequently used ("lfu").
+    Reads are counted in memory and flushed to the accessed_at/hits columns in
+    batches, so tracking does not turn every read into a write; limits are
+    checked every eviction_check_interval writes and evict down to
+    LOW_WATER_MARK of the budget. compact() returns freed pages to the
+    filesystem.
+
+    New databases use incremental auto-vacuum, so sweep() can delete expired
+    rows in small batches and release free pages a few at a time; a
+    CacheSweeper thread runs it off the request path.
+
+    With stale_grace_seconds, expired rows are kept that much longer so they
+    can be served stale while one process refreshes them; refresh leases live
+    in the cache_leases table, so they hold across processes.
+
+    Besides the cache_key, each row stores its endpoint and identifier in
+    indexed columns, so invalidate_ein() and iter_identifiers() are index
+    lookups.
+
+    The cache_schema table records the schema version and the codec rows are
+    being upgraded to. Opening a database from an older release only adds
+    columns; migrate() then fills them in and re-encodes rows written with
+    another codec or payload version, a batch per write transaction, with
+    its progress stored in cache_schema so processes share the work and it
+    resumes after a restart. Until a row is migrated it is read as it is:
+    codecs decode any stored id, and identifier lookups also match rows
+    whose key columns are still empty.
+
+    With dedup_min_bytes set, payloads of at least that many encoded bytes
+    are stored once per content hash in the cache_blobs table, and rows
+    refer to them by blob_hash. Triggers keep each blob's reference count,
+    so every delete path (invalidation, sweeps, eviction) drops a blob with
+    its last row, and writing a payload that is already stored only touches
+    the small key row. Smaller payloads, such as empty results, stay inline
+    because a reference would not be smaller than they are. Sizes and
+    max_bytes count each row's payload whether or not it is shared.
+    """
+    name = "sqlite"
+
+    TABLE_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS api_cache (
+            cache_key TEXT PRIMARY KEY,
+            api_source TEXT NOT NULL,
+            endpoint TEXT NOT NULL DEFAULT '',
+            identifier TEXT NOT NULL DEFAULT '',
+            data BLOB NOT NULL,
+            blob_hash BLOB,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            codec INTEGER NOT NULL DEFAULT 0,
+            size INTEGER NOT NULL DEFAULT 0,
+            accessed_at REAL NOT NULL DEFAULT 0,
+            hits INTEGER NOT NULL DEFAULT 0
+        )
+    """
+    # Refresh leases, so one process at a time refetches an entry
+    LEASE_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cache_leases (
+            cache_key TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    """
+    # Shared payloads; refs counts the api_cache rows whose blob_hash points here
+    BLOB_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cache_blobs (
+            hash BLOB PRIMARY KEY,
+            data BLOB NOT NULL,
+            refs INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TRIGGER IF NOT EXISTS api_cache_blob_insert AFTER INSERT ON api_cache
+        WHEN NEW.blob_hash IS NOT NULL BEGIN
+            UPDATE cache_blobs SET refs = refs + 1 WHERE hash = NEW.blob_hash;
+        END;
+        CREATE TRIGGER IF NOT EXISTS api_cache_blob_update AFTER UPDATE OF blob_hash ON api_cache
+        WHEN OLD.blob_hash IS NOT NEW.blob_hash BEGIN
+            UPDATE cache_blobs SET refs = refs + 1 WHERE hash = NEW.blob_hash;
+            UPDATE cache_blobs SET refs = refs - 1 WHERE hash = OLD.blob_hash;
+            DELETE FROM cache_blobs WHERE hash = OLD.blob_hash AND refs <= 0;
+        END;
+        CREATE TRIGGER IF NOT EXISTS api_cache_blob_delete AFTER DELETE ON api_cache
+        WHEN OLD.blob_hash IS NOT NULL BEGIN
+            UPDATE cache_blobs SET refs = refs - 1 WHERE hash = OLD.blob_hash;
+            DELETE FROM cache_blobs WHERE hash = OLD.blob_hash AND refs <= 0;
+        END;
+    """
+    INDEX_SCHEMA = """
+        CREATE INDEX IF NOT EXISTS idx_api_cache_expires_at ON api_cache (expires_at);
+        CREATE INDEX IF NOT EXISTS idx_api_cache_api_source ON api_cache (api_source);
+        CREATE INDEX IF NOT EXISTS idx_api_cache_accessed_at ON api_cache (accessed_at);
+        CREATE INDEX IF NOT EXISTS idx_api_cache_hits ON api_cache (hits, accessed_at);
+        CREATE INDEX IF NOT EXISTS idx_api_cache_identifier ON api_cache (identifier);
+        CREATE INDEX IF NOT EXISTS idx_api_cache_endpoint ON api_cache (api_source, endpoint, identifier);
+    """
+    # Columns added since the original schema; migrate() fills them in for existing rows
+    ADDED_COLUMNS = {
+        "codec": "INTEGER NOT NULL DEFAULT 0",
+        "size": "INTEGER NOT NULL DEFAULT 0",
+        "accessed_at": "REAL NOT NULL DEFAULT 0",
+        "hits": "INTEGER NOT NULL DEFAULT 0",
+        "endpoint": "TEXT NOT NULL DEFAULT ''",
+        "identifier": "TEXT NOT NULL DEFAULT ''",
+        "blob_hash": "BLOB",
+    }
+    # Bump when existing rows need migrate() to rewrite them
+    SCHEMA_VERSION = 1
+    SCHEMA_TABLE = "CREATE TABLE IF NOT EXISTS cache_schema (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+    SET_SCHEMA_SQL = "INSERT OR REPLACE INTO cache_schema (name, value) VALUES (?, ?)"
+    MIGRATE_SELECT_SQL = (
+        "SELECT api_cache.rowid, cache_key, api_source, api_cache.data, blob_hash, cache_blobs.data, codec, "
+        "created_at FROM api_cache LEFT JOIN cache_blobs ON cache_blobs.hash = api_cache.blob_hash "
+        "WHERE api_cache.rowid > ? AND api_cache.rowid <= ? ORDER BY api_cache.rowid LIMIT ?"
+    )
+    MIGRATE_UPDATE_SQL = (
+        "UPDATE api_cache SET endpoint = ?, identifier = ?, data = ?, blob_hash = ?, codec = ?, size = ?, "
+        "accessed_at = MAX(accessed_at, ?) WHERE rowid = ?"
+    )
+
+    # Shared payloads are read from cache_blobs, the others from the row itself
+    BLOB_JOIN = "LEFT JOIN cache_blobs ON cache_blobs.hash = api_cache.blob_hash"
+    SELECT_SQL = (
+        "SELECT COALESCE(cache_blobs.data, api_cache.data), codec, expires_at FROM api_cache "
+        f"{BLOB_JOIN} WHERE cache_key = ? AND expires_at > ?"
+    )
+    SELECT_STALE_SQL = (
+        f"SELECT COALESCE(cache_blobs.data, api_cache.data), codec, expires_at FROM api_cache {BLOB_JOIN} "
+        "WHERE cache_key = ?"
+    )
+    EXISTS_SQL = "SELECT 1 FROM api_cache WHERE cache_key = ? AND expires_at > ?"
+    INSERT_BLOB_SQL = "INSERT INTO cache_blobs (hash, data) VALUES (?, ?) ON CONFLICT (hash) DO NOTHING"
+    # An upsert rather than INSERT OR REPLACE, whose implicit delete would not fire the blob triggers
+    UPSERT_SQL = (
+        "INSERT INTO api_cache (cache_key, api_source, endpoint, identifier, data, blob_hash, created_at, "
+        "expires_at, codec, size, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (cache_key) DO UPDATE SET api_source = excluded.api_source, endpoint = excluded.endpoint, "
+        "identifier = excluded.identifier, data = excluded.data, blob_hash = excluded.blob_hash, "
+        "created_at = excluded.created_at, expires_at = excluded.expires_at, codec = excluded.codec, "
+        "size = excluded.size, accessed_at = excluded.accessed_at, hits = 0"
+    )
+    ACCESS_SQL = "UPDATE api_cache SET hits = hits + ?, accessed_at = MAX(accessed_at, ?) WHERE cache_key = ?"
+    EVICTION_ORDER = {"lru": "accessed_at", "lfu": "hits, accessed_at"}
+    DELETE_SQL = "DELETE FROM api_cache WHERE cache_key = ?"
+    DELETE_EXPIRED_SQL = "DELETE FROM api_cache WHERE expires_at <= ?"
+    SWEEP_SQL = (
+        "DELETE FROM api_cache WHERE cache_key IN "
+        "(SELECT cache_key FROM api_cache WHERE expires_at <= ? LIMIT ?)"
+    )
+    SELECT_MANY_SQL = (
+        f"SELECT cache_key, COALESCE(cache_blobs.data, api_cache.data), codec, expires_at FROM api_cache {BLOB_JOIN} "
+        "WHERE expires_at > ? AND cache_key IN ({placeholders})"
+    )
+    ACQUIRE_LEASE_SQL = (
+        "INSERT INTO cache_leases (cache_key, owner, expires_at) VALUES (?, ?, ?) "
+        "ON CONFLICT (cache_key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+        "WHERE cache_leases.expires_at <= ? OR cache_leases.owner = excluded.owner"
+    )
+    RELEASE_LEASE_SQL = "DELETE FROM cache_leases WHERE cache_key = ? AND owner = ?"
+    DELETE_EXPIRED_LEASES_SQL = "DELETE FROM cache_leases WHERE expires_at <= ?"
+    ITER_SQL = (
+        "SELECT cache_key, api_source, COALESCE(cache_blobs.data, api_cache.data), codec, created_at, expires_at "
+        f"FROM api_cache {BLOB_JOIN} WHERE expires_at > ?"
+    )
+    # Rows not yet migrated have an empty identifier and are matched on their key
+    IDENTIFIER_KEYS_SQL = (
+        "SELECT cache_key FROM api_cache WHERE identifier = ?1 "
+        "OR (identifier = '' AND SUBSTR(cache_key, -LENGTH(?1) - 1) = '_' || ?1)"
+    )
+    ITER_IDENTIFIERS_SQL = (
+        "SELECT identifier FROM api_cache WHERE api_source = ? AND endpoint = ? AND expires_at > ? ORDER BY identifier"
+    )
+    UNMIGRATED_KEYS_SQL = "SELECT cache_key FROM api_cache WHERE api_source = ? AND endpoint = '' AND expires_at > ?"
+
+    # Keys per IN (...) query, well under SQLite's bound parameter limit
+    MANY_CHUNK_SIZE = 500
+    # Pending read counts flushed to SQLite in one transaction
+    ACCESS_FLUSH_SIZE = 1000
+    LOW_WATER_MARK = 0.9
+
+    def __init__(self, database_path: str, default_ttl_hours: float = 24, busy_timeout_seconds: float = 30,
+                 memory: Optional[MemoryCache] = None, codec: str = "zlib", compression_level: Optional[int] = None,
+                 max_entries: Optional[int] = None, max_bytes: Optional[int] = None, eviction: str = "lru",
+                 eviction_check_interval: int = 100, telemetry: Optional[CacheTelemetry] = None,
+                 stale_grace_seconds: float = 0, dedup_min_bytes: Optional[int] = None):
+        if eviction not in self.EVICTION_ORDER:
+            raise ValueError(f"Unknown cache eviction '{eviction}'")
+        super().__init__(default_ttl_hours, memory, codec, compression_level, telemetry, stale_grace_seconds)
+        self.database_path = database_path
+        self.busy_timeout_seconds = busy_timeout_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.eviction = eviction
+        self.eviction_check_interval = eviction_check_interval
+        self.bounded = max_entries is not None or max_bytes is not None
+        self.dedup_min_bytes = dedup_min_bytes
+
+        self._pending_access: Dict[str, List[float]] = {}
+        self._access_lock = threading.Lock()
+        self._writes_since_check = 0
+        self._eviction_lock = threading.Lock()
+        # Sweeps and eviction both scan for victims; one lock keeps them from racing
+        self.sweeper_lock = self._eviction_lock
+        self.evicted_entries = 0
+
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+        Path(database_path).parent.mkdir(parents=True, exist_ok=True)
+        self._initialize_database()
+        if self.bounded:
+            self.enforce_limits()
+
+    def _initialize_database(self):
+        conn = self._get_connection()
+        # Only takes effect before the first table is created; compact() converts older files
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(self.TABLE_SCHEMA)
+
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(api_cache)")}
+        for column, definition in self.ADDED_COLUMNS.items():
+            if column not in columns:
+                conn.execute(f"ALTER TABLE api_cache ADD COLUMN {column} {definition}")
+        conn.execute(self.LEASE_SCHEMA)
+        conn.executescript(self.BLOB_SCHEMA)
+        conn.executescript(self.INDEX_SCHEMA)
+        conn.execute(self.SCHEMA_TABLE)
+        self._plan_migration()
+
+    def _schema_state(self, conn: sqlite3.Connection) -> Dict[str, int]:
+        return dict(conn.execute("SELECT name, value FROM cache_schema"))
+
+    @property
+    def row_format(self) -> Dict[str, int]:
+        """How this instance writes rows; a database whose rows were written otherwise gets a migration pass."""
+        return {"row_codec": self.codecs.codec_id, "row_dedup": int(self.dedup_min_bytes is not None)}
+
+    def _plan_migration(self):
+        """Start a migration pass over the existing rows if they predate this schema version or row format."""
+        conn = self._get_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            state = self._schema_state(conn)
+            schema_version = state.get("schema_version", 0)
+            row_format = self.row_format
+            if schema_version < self.SCHEMA_VERSION or any(state.get(name, 0) != value
+                                                           for name, value in row_format.items()):
+                # Rows written from here on are already current, so the pass ends at today's last row
+                last_rowid = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM api_cache").fetchone()[0]
+                conn.executemany(self.SET_SCHEMA_SQL, [
+                    ("schema_version", max(schema_version, self.SCHEMA_VERSION)),
+                    *row_format.items(),
+                    ("migration_rowid", 0),
+                    ("migration_end", last_rowid),
+                ])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _get_connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.database_path,
+                timeout=self.busy_timeout_seconds,
+                isolation_level=None,
+                check_same_thread=False
+            )
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_seconds * 1000)}")
+            self._local.connection = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _write(self, sql: str, params: tuple) -> int:
+        conn = self._get_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute(sql, params)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount
+
+    def _write_many(self, sql: str, rows: List[tuple]):
+        conn = self._get_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(sql, rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _read_entry(self, key: str) -> Optional[StoredEntry]:
+        return self._get_connection().execute(self.SELECT_SQL, (key, time.time())).fetchone()
+
+    def _read_stale_entry(self, key: str) -> Optional[StoredEntry]:
+        return self._get_connection().execute(self.SELECT_STALE_SQL, (key,)).fetchone()
+
+    def _read_entries(self, keys: List[str]) -> Dict[str, StoredEntry]:
+        now = time.time()
+        entries = {}
+        conn = self._get_connection()
+        conn.execute("BEGIN")
+        try:
+            for start in range(0, len(keys), self.MANY_CHUNK_SIZE):
+                chunk = keys[start:start + self.MANY_CHUNK_SIZE]
+                sql = self.SELECT_MANY_SQL.format(placeholders=",".join("?" * len(chunk)))
+                for cache_key, data, codec_id, expires_at in conn.execute(sql, (now, *chunk)):
+                    entries[cache_key] = (data, codec_id, expires_at)
+        finally:
+            conn.execute("COMMIT")
+        return entries
+
+    def _blob_hash(self, data: Any, codec_id: int) -> Optional[bytes]:
+        """Content hash for a payload stored in cache_blobs, or None to keep it inline."""
+        # Negative codec ids mark rows without a payload, such as replica tombstones
+        if self.dedup_min_bytes is None or codec_id < 0 or len(data) < self.dedup_min_bytes:
+            return None
+        digest = hashlib.blake2b(bytes((codec_id,)), digest_size=16)
+        digest.update(data.encode("utf-8") if isinstance(data, str) else data)
+        return digest.digest()
+
+    def _stored_payload(self, data: Any, codec_id: int, blobs: Dict[bytes, Any]) -> Tuple[Any, Optional[bytes]]:
+        """Return (row data, blob_hash) for a payload, adding it to blobs if it is shared."""
+        blob_hash = self._blob_hash(data, codec_id)
+        if blob_hash is None:
+            return data, None
+        blobs[blob_hash] = data
+        return b"", blob_hash
+
+    def _write_entries(self, entries: List[Entry]):
+        blobs = {}
+        rows = []
+        for key, service, data, codec_id, created_at, expires_at in entries:
+            stored, blob_hash = self._stored_payload(data, codec_id, blobs)
+            rows.append((key, service, *self.split_key(service, key), stored, blob_hash, created_at, expires_at,
+                         codec_id, len(data), created_at))
+
+        conn = self._get_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Payloads already stored are skipped; the row then only changes its expiry
+            conn.executemany(self.INSERT_BLOB_SQL, blobs.items())
+            conn.executemany(self.UPSERT_SQL, rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _delete_entries(self, keys: List[str]):
+        self._write_many(self.DELETE_SQL, [(key,) for key in keys])
+
+    def _clear_entries(self):
+        self._write("DELETE FROM api_cache", ())
+
+    def iter_entries(self, service: Optional[str] = None) -> Iterator[Entry]:
+        # A separate cursor, so callers can write while iterating
+        cursor = self._get_connection().cursor()
+        if service is None:
+            cursor.execute(self.ITER_SQL, (time.time(),))
+        else:
+            cursor.execute(self.ITER_SQL + " AND api_source = ?", (time.time(), service))
+        for key, api_source, data, codec_id, created_at, expires_at in cursor:
+            yield key, api_source, data, codec_id, created_at, expires_at
+
+    def _keys_for_identifier(self, identifier: str) -> List[str]:
+        rows = self._get_connection().execute(self.IDENTIFIER_KEYS_SQL, (identifier,))
+        return [row[0] for row in rows]
+
+    @classmethod
+    def query_identifiers(cls, conn: sqlite3.Connection, service: str, endpoint: str) -> Iterator[str]:
+        """Yield identifiers of unexpired rows for one service endpoint from an api_cache table."""
+        now = time.time()
+        for (key,) in conn.execute(cls.UNMIGRATED_KEYS_SQL, (service, now)).fetchall():
+            key_endpoint, identifier = cls.split_key(service, key)
+            if key_endpoint == endpoint:
+                yield identifier
+        cursor = conn.cursor()
+        cursor.execute(cls.ITER_IDENTIFIERS_SQL, (service, endpoint, now))
+        for (identifier,) in cursor:
+            yield identifier
+
+    def iter_identifiers(self, service: str, endpoint: str) -> Iterator[str]:
+        return self.query_identifiers(self._get_connection(), service, endpoint)
+
+    def exists(self, service: str, endpoint: str, identifier: str) -> bool:
+        key = self._generate_key(service, endpoint, identifier)
+        row = self._get_connection().execute(self.EXISTS_SQL, (key, time.time())).fetchone()
+        return row is not None
+
+    def cleanup_expired(self) -> int:
+        return self._write(self.DELETE_EXPIRED_SQL, (self._expiry_cutoff(),))
+
+    def _acquire_lease(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        return self._write(self.ACQUIRE_LEASE_SQL, (key, owner, now + ttl_seconds, now)) == 1
+
+    def _release_lease(self, key: str, owner: str):
+        self._write(self.RELEASE_LEASE_SQL, (key, owner))
+
+    def _entries_read(self, keys: Iterable[str]):
+        self._record_access(keys)
+
+    def _entries_written(self, count: int):
+        self._note_writes(count)
+
+    def _record_access(self, keys: Iterable[str]):
+        if not self.bounded:
+            return
+        now = time.time()
+        with self._access_lock:
+            for key in keys:
+                pending = self._pending_access.get(key)
+                if pending is None:
+                    self._pending_access[key] = [1, now]
+                else:
+                    pending[0] += 1
+                    pending[1] = now
+            should_flush = len(self._pending_access) >= self.ACCESS_FLUSH_SIZE
+        if should_flush:
+            self.flush_access()
+
+    def flush_access(self):
+        """Write buffered read counts and times to the hits/accessed_at columns."""
+        with self._access_lock:
+            pending = self._pending_access
+            self._pending_access = {}
+        if pending:
+            self._write_many(self.ACCESS_SQL, [(hits, accessed_at, key) for key, (hits, accessed_at) in pending.items()])
+
+    def _note_writes(self, count: int):
+        if not self.bounded:
+            return
+        with self._eviction_lock:
+            self._writes_since_check += count
+            should_check = self._writes_since_check >= self.eviction_check_interval
+            if should_check:
+                self._writes_since_check = 0
+        if should_check:
+            self.enforce_limits()
+
+    def enforce_limits(self) -> int:
+        """Drop expired entries, then evict down to the low-water mark if over budget. Returns entries evicted."""
+        if not self.bounded:
+            return 0
+        self.flush_access()
+        self.cleanup_expired()
+
+        with self._eviction_lock:
+            conn = self._get_connection()
+            count, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM api_cache").fetchone()
+            excess_entries = 0
+            if self.max_entries is not None and count > self.max_entries:
+                excess_entries = count - int(self.max_entries * self.LOW_WATER_MARK)
+            excess_bytes = 0
+            if self.max_bytes is not None and total_bytes > self.max_bytes:
+                excess_bytes = total_bytes - int(self.max_bytes * self.LOW_WATER_MARK)
+            if not excess_entries and not excess_bytes:
+                return 0
+
+            victims = []
+            freed = 0
+            cursor = conn.execute(
+                f"SELECT cache_key, size FROM api_cache ORDER BY {self.EVICTION_ORDER[self.eviction]}"
+            )
+            for key, size in cursor:
+                if len(victims) >= excess_entries and freed >= excess_bytes:
+                    break
+                victims.append(key)
+                freed += size
+            cursor.close()
+
+            self._delete_entries(victims)
+            if self.memory is not None:
+                for key in victims:
+                    self.memory.invalidate(key)
+            self.evicted_entries += len(victims)
+            return len(victims)
+
+    def _file_bytes(self) -> int:
+        return sum(
+            os.path.getsize(self.database_path + suffix)
+            for suffix in ("", "-wal")
+            if os.path.exists(self.database_path + suffix)
+        )
+
+    def sweep(self, batch_size: int = 500, time_budget_seconds: float = 0.05,
+              vacuum_pages: int = 256) -> Dict[str, Any]:
+        """
+        Delete expired rows in batches of batch_size until none are left or the
+        time budget is spent, then release up to vacuum_pages free pages.
+
+        Each batch is its own short write transaction, so request-path writers
+        only ever wait for one batch. "complete" is False when expired rows may
+        remain for the next sweep.
+        """
+        deadline = time.perf_counter() + time_budget_seconds
+        removed = 0
+        complete = True
+        while True:
+            deleted = self._write(self.SWEEP_SQL, (self._expiry_cutoff(), batch_size))
+            removed += deleted
+            if deleted < batch_size:
+                break
+            if time.perf_counter() >= deadline:
+                complete = False
+                break
+
+        self._write(self.DELETE_EXPIRED_LEASES_SQL, (time.time(),))
+        self.flush_access()
+        return {
+            "expired_removed": removed,
+            "vacuumed_pages": self.incremental_vacuum(vacuum_pages),
+            "complete": complete
+        }
+
+    def incremental_vacuum(self, pages: int) -> int:
+        conn = self._get_connection()
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return 0
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free_pages == 0:
+            return 0
+        # executescript steps the pragma to completion; execute() frees a single page
+        conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+        return free_pages - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def compact(self) -> Dict[str, int]:
+        """Expire, evict, then VACUUM and truncate the WAL so freed pages go back to the filesystem."""
+        bytes_before = self._file_bytes()
+        expired = self.cleanup_expired()
+        evicted = self.enforce_limits()
+
+        conn = self._get_connection()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {
+            "expired_removed": expired,
+            "evicted": evicted,
+            "bytes_before": bytes_before,
+            "bytes_after": self._file_bytes()
+        }
+
+    def migration_remaining(self) -> int:
+        state = self._schema_state(self._get_connection())
+        return self._get_connection().execute(
+            "SELECT COUNT(*) FROM api_cache WHERE rowid > ? AND rowid <= ?",
+            (state.get("migration_rowid", 0), state.get("migration_end", 0))
+        ).fetchone()[0]
+
+    def migrate(self, batch_size: int = 500, time_budget_seconds: float = 0.05) -> Dict[str, Any]:
+        """
+        Upgrade rows of the current migration pass, batch_size per write
+        transaction, until none are left or the time budget is spent.
+        """
+        deadline = time.perf_counter() + time_budget_seconds
+        migrated = 0
+        while True:
+            count, complete = self._migrate_batch(batch_size)
+            migrated += count
+            if complete or time.perf_counter() >= deadline:
+                return {"migrated": migrated, "complete": complete}
+
+    def _migrate_batch(self, batch_size: int) -> Tuple[int, bool]:
+        conn = self._get_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            state = self._schema_state(conn)
+            position, end = state.get("migration_rowid", 0), state.get("migration_end", 0)
+            # Another process may have started a pass for a different row format; then only fill in columns
+            rewrite = all(state.get(name, 0) == value for name, value in self.row_format.items())
+            rows = conn.execute(self.MIGRATE_SELECT_SQL, (position, end, batch_size)).fetchall() if position < end else []
+            blobs = {}
+            updates = []
+            for rowid, key, service, stored, blob_hash, shared, codec_id, created_at in rows:
+                data = stored if shared is None else shared
+                if rewrite:
+                    # Negative codec ids mark rows without a payload, such as replica tombstones
+                    if codec_id >= 0 and codec_id != self.codecs.codec_id:
+                        try:
+                            data, codec_id = self.codecs.encode(self.codecs.decode(data, codec_id)), self.codecs.codec_id
+                        except Exception:
+                            # Rows this process cannot decode (e.g. zstd without zstandard) keep their format
+                            pass
+                    stored, blob_hash = self._stored_payload(data, codec_id, blobs)
+                size = len(data.encode("utf-8")) if isinstance(data, str) else len(data)
+                updates.append((*self.split_key(service, key), stored, blob_hash, codec_id, size, created_at, rowid))
+            conn.executemany(self.INSERT_BLOB_SQL, blobs.items())
+            conn.executemany(self.MIGRATE_UPDATE_SQL, updates)
+            position = rows[-1][0] if len(rows) == batch_size else end
+            conn.execute(self.SET_SCHEMA_SQL, ("migration_rowid", position))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows), position >= end
+
+    def publish_replica(self, path: str) -> Dict[str, int]:
+        """
+        Write a compact, journal-free copy of the unexpired entries for
+        ReplicaCache workers, replacing path atomically.
+        """
+        self.flush_access()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path + ".tmp"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        self._get_connection().execute("VACUUM INTO ?", (temp_path,))
+
+        replica = sqlite3.connect(temp_path, isolation_level=None)
+        try:
+            replica.execute(self.DELETE_EXPIRED_SQL, (time.time(),))
+            replica.execute("DELETE FROM cache_leases")
+            # Immutable readers never look at a -wal file
+            replica.execute("PRAGMA journal_mode=DELETE")
+            replica.execute("VACUUM")
+            entries = replica.execute("SELECT COUNT(*) FROM api_cache").fetchone()[0]
+        finally:
+            replica.close()
+        os.replace(temp_path, path)
+        return {"entries": entries, "bytes": os.path.getsize(path)}
+
+    def _storage_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        conn = self._get_connection()
+        valid_entries = conn.execute(
+            "SELECT COUNT(*) FROM api_cache WHERE expires_at > ?", (now,)
+        ).fetchone()[0]
+        expired_entries = conn.execute(
+            "SELECT COUNT(*) FROM api_cache WHERE expires_at <= ?", (now,)
+        ).fetchone()[0]
+        api_sources = conn.execute(
+            "SELECT COUNT(DISTINCT api_source) FROM api_cache"
+        ).fetchone()[0]
+        total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM api_cache").fetchone()[0]
+        shared_bytes = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM api_cache WHERE blob_hash IS NOT NULL"
+        ).fetchone()[0]
+        blobs, blob_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM cache_blobs").fetchone()
+
+        return {
+            "valid_entries": valid_entries,
+            "expired_entries": expired_entries,
+            "api_sources": api_sources,
+            "total_bytes": total_bytes,
+            "evicted_entries": self.evicted_entries,
+            "shared_payloads": blobs,
+            "dedup_saved_bytes": shared_bytes - blob_bytes,
+            "schema_version": self._schema_state(conn).get("schema_version", 0),
+            "migration_remaining": self.migration_remaining(),
+            "database_path": self.database_path
+        }
+
+    def close(self):
+        self._stop_background()
+        if self._connections:
+            self.flush_access()
+        self._unregister()
+        with self._connections_lock:
+            connections = self._connections
+            self._connections = []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
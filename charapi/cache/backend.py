@@ -0,0 +1,445 @@
+import inspect
+import os
+import socket
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .codecs import CodecRegistry
+from .memory_cache import MemoryCache
+from .telemetry import CacheTelemetry
+
+
+# (cache_key, service, encoded data, codec id, created_at, expires_at)
+Entry = Tuple[str, str, Any, int, float, float]
+# (encoded data, codec id, expires_at) for entries that have not expired
+StoredEntry = Tuple[Any, int, float]
+
+# codec id, created_at, expires_at, service length, key length; followed by service, key and data
+ENTRY_HEADER = struct.Struct("<BddHH")
+
+
+def pack_entry(service: str, data: Any, codec_id: int, created_at: float, expires_at: float, key: str = "") -> bytes:
+    """
+    Serialize an entry for key-value backends that store one blob per key.
+
+    The cache key is only needed by backends whose storage key is a hash of it.
+    """
+    service_bytes = service.encode("utf-8")
+    key_bytes = key.encode("utf-8")
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    header = ENTRY_HEADER.pack(codec_id, created_at, expires_at, len(service_bytes), len(key_bytes))
+    return header + service_bytes + key_bytes + data
+
+
+def unpack_header(blob) -> Tuple[int, float, float, str, str, int]:
+    """Return (codec id, created_at, expires_at, service, key, data offset) without copying the payload."""
+    codec_id, created_at, expires_at, service_length, key_length = ENTRY_HEADER.unpack_from(blob)
+    service_end = ENTRY_HEADER.size + service_length
+    key_end = service_end + key_length
+    service = bytes(blob[ENTRY_HEADER.size:service_end]).decode("utf-8")
+    key = bytes(blob[service_end:key_end]).decode("utf-8")
+    return codec_id, created_at, expires_at, service, key, key_end
+
+
+def normalize_ein(ein: str) -> str:
+    return str(ein).replace("-", "")
+
+
+class CacheBackend(ABC):
+    """
+    Interface shared by the cache backends selected with caching.backend.
+
+    The public operations (get/set and their _many variants, exists,
+    invalidate, clear_all, iter_entries, load_entries, cleanup_expired,
+    sweep, get_stats, close) behave the same on every backend. This class
+    implements the parts that do not depend on storage (key layout, codecs,
+    the optional memory tier and telemetry); subclasses implement the storage
+    hooks (_read_entries, _write_entries, _delete_entries, _clear_entries)
+    plus iter_entries, cleanup_expired, sweep, _storage_stats and close.
+
+    Keys are "service_endpoint_identifier". invalidate_ein() and
+    iter_identifiers() look entries up by identifier or service/endpoint;
+    backends with an index for that override _keys_for_identifier and
+    iter_identifiers instead of scanning every entry.
+    """
+    _open_caches: Dict[Tuple[str, str], "CacheBackend"] = {}
+    _open_caches_lock = threading.Lock()
+
+    name = ""
+
+    def __init__(self, default_ttl_hours: float = 24, memory: Optional[MemoryCache] = None, codec: str = "zlib",
+                 compression_level: Optional[int] = None, telemetry: Optional[CacheTelemetry] = None,
+                 stale_grace_seconds: float = 0):
+        self.default_ttl_hours = default_ttl_hours
+        self.stale_grace_seconds = stale_grace_seconds
+        self.memory = memory
+        self.codecs = CodecRegistry(codec, compression_level)
+        self.telemetry = telemetry or CacheTelemetry.shared()
+        self.startup_cleanup_done = False
+        self.sweeper = None
+        self.migrator = None
+        self.sweeper_lock = threading.Lock()
+        self._leases: Dict[str, Tuple[str, float]] = {}
+        self._leases_lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path: str, memory_config: Optional[Dict[str, Any]] = None, **options) -> "CacheBackend":
+        """
+        Return the process-wide cache for path, so clients share its connections and memory tier.
+
+        The memory tier is built from memory_config only when the cache is
+        first opened. Opening an already open path with other options raises
+        ValueError instead of silently returning a cache configured differently.
+        """
+        key = (cls.__name__, str(Path(path).resolve()))
+        arguments = inspect.signature(cls).bind(path, **options)
+        arguments.apply_defaults()
+        settings = dict(arguments.arguments, memory_config=memory_config)
+        with cls._open_caches_lock:
+            cache = cls._open_caches.get(key)
+            if cache is None:
+                if memory_config is not None:
+                    options["memory"] = MemoryCache.from_config(memory_config)
+                cache = cls(path, **options)
+                cache._open_settings = settings
+                cls._open_caches[key] = cache
+            elif cache._open_settings != settings:
+                differing = sorted(name for name in settings if settings[name] != cache._open_settings.get(name))
+                raise ValueError(f"{cls.__name__} at {path} is already open with different {', '.join(differing)}; "
+                                 f"close it before reopening with other settings")
+            return cache
+
+    def _unregister(self):
+        with self._open_caches_lock:
+            for key, cache in list(self._open_caches.items()):
+                if cache is self:
+                    del self._open_caches[key]
+
+    def _stop_background(self):
+        if self.sweeper is not None:
+            self.sweeper.stop()
+            self.sweeper = None
+        if self.migrator is not None:
+            self.migrator.stop()
+            self.migrator = None
+
+    def _generate_key(self, service: str, endpoint: str, identifier: str) -> str:
+        return f"{service}_{endpoint}_{identifier}"
+
+    @staticmethod
+    def split_key(service: str, key: str) -> Tuple[str, str]:
+        """Return (endpoint, identifier) for a key of the given service; endpoints contain no underscores."""
+        endpoint, _, identifier = key[len(service) + 1:].partition("_")
+        return endpoint, identifier
+
+    # Storage hooks
+
+    @abstractmethod
+    def _read_entries(self, keys: List[str]) -> Dict[str, StoredEntry]:
+        ...
+
+    def _read_entry(self, key: str) -> Optional[StoredEntry]:
+        return self._read_entries([key]).get(key)
+
+    @abstractmethod
+    def _read_stale_entry(self, key: str) -> Optional[StoredEntry]:
+        """Return the entry for key even if it has expired, or None if it is gone."""
+
+    @abstractmethod
+    def _write_entries(self, entries: List[Entry]):
+        ...
+
+    @abstractmethod
+    def _delete_entries(self, keys: List[str]):
+        ...
+
+    @abstractmethod
+    def _clear_entries(self):
+        ...
+
+    def _entries_read(self, keys: Iterable[str]):
+        """Called with the keys served by each read; backends that track access override it."""
+
+    def _entries_written(self, count: int):
+        """Called after each write; backends that enforce size limits override it."""
+
+    @abstractmethod
+    def _keys_for_identifier(self, identifier: str) -> List[str]:
+        """Return the keys of every entry for identifier, in any service or endpoint, expired or not."""
+
+    @abstractmethod
+    def _storage_stats(self) -> Dict[str, Any]:
+        ...
+
+    def _expiry_cutoff(self) -> float:
+        """Entries that expired before this time are deleted; later ones can still be served stale."""
+        return time.time() - self.stale_grace_seconds
+
+    def _acquire_lease(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        # Within this process only; backends shared between processes override both lease hooks
+        now = time.time()
+        with self._leases_lock:
+            holder = self._leases.get(key)
+            if holder is not None and holder[0] != owner and holder[1] > now:
+                return False
+            self._leases[key] = (owner, now + ttl_seconds)
+            return True
+
+    def _release_lease(self, key: str, owner: str):
+        with self._leases_lock:
+            holder = self._leases.get(key)
+            if holder is not None and holder[0] == owner:
+                del self._leases[key]
+
+    # Public operations
+
+    def get(self, service: str, endpoint: str, identifier: str) -> Optional[Any]:
+        entry = self.get_entry(service, endpoint, identifier)
+        return None if entry is None else entry[0]
+
+    def get_entry(self, service: str, endpoint: str, identifier: str,
+                  allow_stale: bool = False) -> Optional[Tuple[Any, float]]:
+        """
+        Return (data, expires_at) for an entry. With allow_stale, an entry that
+        expired less than stale_grace_seconds ago is returned too; callers tell
+        it apart by its expires_at.
+        """
+        key = self._generate_key(service, endpoint, identifier)
+        if self.memory is not None:
+            entry = self.memory.get_entry(key)
+            if entry is not None:
+                self._entries_read((key,))
+                return entry
+
+        stored = self._read_entry(key)
+        if stored is None:
+            if not allow_stale or self.stale_grace_seconds <= 0:
+                return None
+            stored = self._read_stale_entry(key)
+            if stored is None or stored[2] <= self._expiry_cutoff():
+                return None
+            data, codec_id, expires_at = stored
+            self.telemetry.record_bytes(service, endpoint, read=len(data))
+            return self.codecs.decode(data, codec_id), expires_at
+
+        data, codec_id, expires_at = stored
+        self.telemetry.record_bytes(service, endpoint, read=len(data))
+        value = self.codecs.decode(data, codec_id)
+        if self.memory is not None:
+            self.memory.put(key, value, expires_at, len(data))
+        self._entries_read((key,))
+        return value, expires_at
+
+    def get_many(self, service: str, endpoint: str, identifiers: Iterable[str]) -> Dict[str, Any]:
+        """Return {identifier: data} for every identifier with a valid entry, in one storage read."""
+        return {
+            identifier: value
+            for identifier, (value, expires_at) in self.get_many_entries(service, endpoint, identifiers).items()
+        }
+
+    def get_many_entries(self, service: str, endpoint: str,
+                         identifiers: Iterable[str]) -> Dict[str, Tuple[Any, float]]:
+        """Return {identifier: (data, expires_at)} for every identifier with a valid entry, in one storage read."""
+        keys = {self._generate_key(service, endpoint, identifier): identifier for identifier in identifiers}
+        results = {}
+        if self.memory is not None:
+            for key, identifier in keys.items():
+                entry = self.memory.get_entry(key)
+                if entry is not None:
+                    results[identifier] = entry
+
+        missing = [key for key, identifier in keys.items() if identifier not in results]
+        if missing:
+            bytes_read = 0
+            for key, (data, codec_id, expires_at) in self._read_entries(missing).items():
+                bytes_read += len(data)
+                value = self.codecs.decode(data, codec_id)
+                results[keys[key]] = (value, expires_at)
+                if self.memory is not None:
+                    self.memory.put(key, value, expires_at, len(data))
+            self.telemetry.record_bytes(service, endpoint, read=bytes_read)
+
+        self._entries_read(key for key, identifier in keys.items() if identifier in results)
+        return results
+
+    def set(self, service: str, endpoint: str, identifier: str, data: Any, ttl_hours: Optional[float] = None):
+        self.set_many(service, endpoint, {identifier: data}, ttl_hours)
+
+    def set_many(self, service: str, endpoint: str, items: Dict[str, Any], ttl_hours: Optional[float] = None):
+        """Store {identifier: data} in a single storage write."""
+        if not items:
+            return
+        ttl = ttl_hours if ttl_hours is not None else self.default_ttl_hours
+        now = time.time()
+        expires_at = now + ttl * 3600
+        codec_id = self.codecs.codec_id
+        entries = [
+            (self._generate_key(service, endpoint, identifier), service, self.codecs.encode(data), codec_id, now,
+             expires_at)
+            for identifier, data in items.items()
+        ]
+        self._write_entries(entries)
+
+        if self.memory is not None:
+            for entry, data in zip(entries, items.values()):
+                self.memory.put(entry[0], data, expires_at, len(entry[2]))
+        self.telemetry.record_bytes(service, endpoint, written=sum(len(entry[2]) for entry in entries))
+        self._entries_written(len(entries))
+
+    def exists(self, service: str, endpoint: str, identifier: str) -> bool:
+        return self._read_entry(self._generate_key(service, endpoint, identifier)) is not None
+
+    @staticmethod
+    def lease_owner() -> str:
+        return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+    def acquire_lease(self, service: str, endpoint: str, identifier: str, ttl_seconds: float = 30,
+                      owner: Optional[str] = None) -> bool:
+        """
+        Try to become the one caller that refreshes an entry. The lease lapses
+        after ttl_seconds, so a refresher that dies does not block others for long.
+        """
+        key = self._generate_key(service, endpoint, identifier)
+        return self._acquire_lease(key, owner or self.lease_owner(), ttl_seconds)
+
+    def release_lease(self, service: str, endpoint: str, identifier: str, owner: Optional[str] = None):
+        self._release_lease(self._generate_key(service, endpoint, identifier), owner or self.lease_owner())
+
+    def invalidate(self, service: str, endpoint: str, identifier: str):
+        key = self._generate_key(service, endpoint, identifier)
+        self._delete_entries([key])
+        if self.memory is not None:
+            self.memory.invalidate(key)
+
+    def invalidate_ein(self, ein: str) -> int:
+        """Remove everything cached for one EIN, across all services and endpoints. Returns entries removed."""
+        keys = self._keys_for_identifier(normalize_ein(ein))
+        if keys:
+            self._delete_entries(keys)
+            if self.memory is not None:
+                for key in keys:
+                    self.memory.invalidate(key)
+        return len(keys)
+
+    def clear_all(self):
+        self._clear_entries()
+        if self.memory is not None:
+            self.memory.clear()
+
+    @abstractmethod
+    def iter_entries(self, service: Optional[str] = None) -> Iterator[Entry]:
+        """Yield every unexpired entry, optionally for one service, still encoded."""
+
+    def iter_identifiers(self, service: str, endpoint: str) -> Iterator[str]:
+        """Yield the identifier of every unexpired entry for one service endpoint."""
+        for entry in self.iter_entries(service):
+            entry_endpoint, identifier = self.split_key(service, entry[0])
+            if entry_endpoint == endpoint:
+                yield identifier
+
+    def load_entries(self, entries: List[Entry]):
+        """Store already-encoded entries as they are, keeping their codec and expiry."""
+        if not entries:
+            return
+        self._write_entries(entries)
+        if self.memory is not None:
+            for entry in entries:
+                self.memory.invalidate(entry[0])
+        self._entries_written(len(entries))
+
+    @abstractmethod
+    def cleanup_expired(self) -> int:
+        ...
+
+    @abstractmethod
+    def sweep(self, batch_size: int = 500, time_budget_seconds: float = 0.05,
+              vacuum_pages: int = 256) -> Dict[str, Any]:
+        ...
+
+    def migration_remaining(self) -> int:
+        """Rows still stored in an older schema or codec; backends without row migrations have none."""
+        return 0
+
+    def migrate(self, batch_size: int = 500, time_budget_seconds: float = 0.05) -> Dict[str, Any]:
+        """Upgrade stored rows to the current schema and codec in batches; "complete" once none are left."""
+        return {"migrated": 0, "complete": True}
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {"backend": self.name, **self._storage_stats()}
+        if self.memory is not None:
+            stats.update(self.memory.get_stats())
+        if self.sweeper is not None:
+            stats.update(self.sweeper.get_stats())
+        if self.migrator is not None:
+            stats.update(self.migrator.get_stats())
+        return stats
+
+    @abstractmethod
+    def close(self):
+        ...
+
+
+def create_cache(cache_config: Dict[str, Any], resolve_path) -> CacheBackend:
+    """Open the shared cache selected by caching.backend; resolve_path maps config paths to absolute ones."""
+    from .api_cache import APICache
+    from .file_cache import ShardedFileCache
+    from .lmdb_cache import LMDBCache
+    from .replica_cache import ReplicaCache
+    from .sharded_cache import ShardedCache
+
+    options = {
+        "default_ttl_hours": cache_config.get("default_ttl_hours", 24),
+        "memory_config": cache_config.get("memory"),
+        "codec": cache_config.get("codec", "zlib"),
+        "compression_level": cache_config.get("compression_level"),
+    }
+    stampede_config = cache_config.get("stampede") or {}
+    if stampede_config.get("enabled", False):
+        options["stale_grace_seconds"] = stampede_config.get("stale_grace_seconds", 3600)
+    backend = cache_config.get("backend", "sqlite")
+    dedup_config = cache_config.get("dedup") or {}
+    if backend in ("sqlite", "sharded", "replica") and dedup_config.get("enabled", False):
+        options["dedup_min_bytes"] = dedup_config.get("min_bytes", 64)
+
+    if backend == "sqlite":
+        database_path = resolve_path(cache_config.get("database_path", "cache/charapi_cache.db"))
+        return APICache.open(
+            str(database_path),
+            max_entries=cache_config.get("max_entries"),
+            max_bytes=cache_config.get("max_bytes"),
+            eviction=cache_config.get("eviction", "lru"),
+            **options
+        )
+    elif backend == "sharded":
+        database_path = resolve_path(cache_config.get("database_path", "cache/charapi_cache.db"))
+        return ShardedCache.open(
+            str(database_path),
+            shards=cache_config.get("database_shards", 8),
+            max_entries=cache_config.get("max_entries"),
+            max_bytes=cache_config.get("max_bytes"),
+            eviction=cache_config.get("eviction", "lru"),
+            **options
+        )
+    elif backend == "filesystem":
+        directory = resolve_path(cache_config.get("directory", "cache/charapi_cache"))
+        return ShardedFileCache.open(str(directory), shards=cache_config.get("shards", 256), **options)
+    elif backend == "replica":
+        return ReplicaCache.open(
+            str(resolve_path(cache_config.get("replica_path", "cache/charapi_replica.db"))),
+            overlay_path=str(resolve_path(cache_config.get("overlay_path", "cache/charapi_overlay.db"))),
+            immutable=cache_config.get("replica_immutable", True),
+            mmap_size=cache_config.get("replica_mmap_size", 1 << 30),
+            max_entries=cache_config.get("max_entries"),
+            max_bytes=cache_config.get("max_bytes"),
+            eviction=cache_config.get("eviction", "lru"),
+            **options
+        )
+    elif backend == "lmdb":
+        lmdb_path = resolve_path(cache_config.get("lmdb_path", "cache/charapi_cache.lmdb"))
+        return LMDBCache.open(str(lmdb_path), map_size=cache_config.get("lmdb_map_size", 1 << 30), **options)
+    raise ValueError(f"Unknown cache backend '{backend}'")
@@ -0,0 +1,134 @@
+import json
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class JSONCodec:
+    """Uncompressed JSON text; the format of rows written before codecs existed."""
+    codec_id = 0
+    name = "json"
+
+    def encode(self, value: Any) -> str:
+        return json.dumps(value)
+
+    def decode(self, data: Union[bytes, str]) -> Any:
+        return loads(data)
+
+
+class ZlibCodec:
+    """JSON compressed with zlib from the standard library."""
+    codec_id = 1
+    name = "zlib"
+
+    def __init__(self, level: Optional[int] = None):
+        self.level = 6 if level is None else level
+
+    def encode(self, value: Any) -> bytes:
+        return zlib.compress(dumps(value), self.level)
+
+    def decode(self, data: bytes) -> Any:
+        return loads(zlib.decompress(data))
+
+
+class ZstdCodec:
+    """JSON compressed with zstd; needs the zstandard package (pip install 'charapi[cache]')."""
+    codec_id = 2
+    name = "zstd"
+
+    def __init__(self, level: Optional[int] = None):
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("The zstd cache codec requires zstandard: pip install 'charapi[cache]'") from e
+        self.level = 3 if level is None else level
+        self._compressor = zstandard.ZstdCompressor(level=self.level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def encode(self, value: Any) -> bytes:
+        return self._compressor.compress(dumps(value))
+
+    def decode(self, data: bytes) -> Any:
+        return loads(self._decompressor.decompress(data))
+
+
+CODECS = {codec.name: codec for codec in (JSONCodec, ZlibCodec, ZstdCodec)}
+CODEC_NAMES_BY_ID = {codec.codec_id: codec.name for codec in CODECS.values()}
+
+# Stored codec ids carry the payload version in their high bits: codec_id | version << 4
+PAYLOAD_VERSION_SHIFT = 4
+# Version of the payload shapes this release writes; rows without a version are version 0
+PAYLOAD_VERSION = 0
+# {version: function upgrading a decoded payload from that version to the next}
+PAYLOAD_UPGRADES: Dict[int, Callable[[Any], Any]] = {}
+
+
+def split_codec_id(stored_id: int) -> Tuple[int, int]:
+    """Return (codec id, payload version) for a stored codec id."""
+    return stored_id & ((1 << PAYLOAD_VERSION_SHIFT) - 1), stored_id >> PAYLOAD_VERSION_SHIFT
+
+
+def create_codec(name: str, level: Optional[int] = None):
+    if name not in CODECS:
+        raise ValueError(f"Unknown cache codec '{name}'")
+    if name == "json":
+        return JSONCodec()
+    return CODECS[name](level)
+
+
+class CodecRegistry:
+    """
+    Encodes with one configured codec and decodes any codec by its stored id.
+
+    Decoders are created on first use, so a node without zstandard can still
+    read json and zlib rows; a zstd row there raises ImportError.
+
+    Stored ids also record the payload version an entry was written with.
+    Payloads from older versions are passed through the upgrades in turn as
+    they are decoded, so they stay readable until a migration rewrites them.
+    """
+
+    def __init__(self, codec_name: str = "zlib", level: Optional[int] = None, payload_version: Optional[int] = None,
+                 upgrades: Optional[Dict[int, Callable[[Any], Any]]] = None):
+        self.codec = create_codec(codec_name, level)
+        self.payload_version = PAYLOAD_VERSION if payload_version is None else payload_version
+        self.upgrades = PAYLOAD_UPGRADES if upgrades is None else upgrades
+        if not 0 <= self.payload_version < 1 << (8 - PAYLOAD_VERSION_SHIFT):
+            raise ValueError(f"Payload version {self.payload_version} does not fit in a stored codec id")
+        # The id stored with entries this registry encodes
+        self.codec_id = self.codec.codec_id | self.payload_version << PAYLOAD_VERSION_SHIFT
+        self._decoders: Dict[int, Any] = {self.codec.codec_id: self.codec}
+
+    def encode(self, value: Any) -> Union[bytes, str]:
+        return self.codec.encode(value)
+
+    def decode(self, data: Union[bytes, str], stored_id: int) -> Any:
+        codec_id, version = split_codec_id(stored_id)
+        if version > self.payload_version:
+            raise ValueError(f"Cache entry has payload version {version}, newer than {self.payload_version}")
+        decoder = self._decoders.get(codec_id)
+        if decoder is None:
+            if codec_id not in CODEC_NAMES_BY_ID:
+                raise ValueError(f"Unknown cache codec id {stored_id}")
+            decoder = create_codec(CODEC_NAMES_BY_ID[codec_id])
+            self._decoders[codec_id] = decoder
+        value = decoder.decode(data)
+        for from_version in range(version, self.payload_version):
+            value = self.upgrades[from_version](value)
+        return value
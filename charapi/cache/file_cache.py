@@ -0,0 +1,263 @@
+import hashlib
+import os
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .backend import ENTRY_HEADER, CacheBackend, Entry, StoredEntry, pack_entry, unpack_header
+from .memory_cache import MemoryCache
+from .telemetry import CacheTelemetry
+
+
+class ShardedFileCache(CacheBackend):
+    """
+    One file per entry under a directory tree (caching.backend: filesystem).
+
+    Keys are hashed into `shards` subdirectories so no directory grows past a
+    few thousand files. Each file holds a small header (codec, created_at,
+    expires_at, service, key) followed by the encoded payload, and is written to a
+    temporary file and renamed into place, so readers never see a partial
+    entry and concurrent processes can share the directory without locks.
+
+    Expired files read as missing; sweep() deletes them a few shards at a
+    time, resuming where the previous sweep stopped. File names are hashes,
+    so invalidate_ein() and iter_identifiers() scan file headers.
+    """
+    name = "filesystem"
+
+    def __init__(self, directory: str, shards: int = 256, default_ttl_hours: float = 24,
+                 memory: Optional[MemoryCache] = None, codec: str = "zlib", compression_level: Optional[int] = None,
+                 telemetry: Optional[CacheTelemetry] = None, stale_grace_seconds: float = 0):
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        super().__init__(default_ttl_hours, memory, codec, compression_level, telemetry, stale_grace_seconds)
+        self.directory = Path(directory)
+        self.lease_directory = self.directory / ".leases"
+        self.shards = shards
+        self._shard_width = len(f"{shards - 1:x}")
+        self._sweep_shard = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _shard_dir(self, shard: int) -> Path:
+        return self.directory / f"{shard:0{self._shard_width}x}"
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self._shard_dir(int(digest[:8], 16) % self.shards) / digest
+
+    def _read_stale_entry(self, key: str) -> Optional[StoredEntry]:
+        try:
+            blob = self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+        codec_id, created_at, expires_at, service, _, offset = unpack_header(blob)
+        return blob[offset:], codec_id, expires_at
+
+    def _read_entry(self, key: str) -> Optional[StoredEntry]:
+        entry = self._read_stale_entry(key)
+        if entry is None or entry[2] <= time.time():
+            return None
+        return entry
+
+    def _read_entries(self, keys: List[str]) -> Dict[str, StoredEntry]:
+        entries = {}
+        for key in keys:
+            entry = self._read_entry(key)
+            if entry is not None:
+                entries[key] = entry
+        return entries
+
+    def _write_entries(self, entries: List[Entry]):
+        for key, service, data, codec_id, created_at, expires_at in entries:
+            path = self._path(key)
+            path.parent.mkdir(exist_ok=True)
+            # Temporary names start with "." so scans skip them
+            fd, temp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=path.parent)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(pack_entry(service, data, codec_id, created_at, expires_at, key))
+                os.replace(temp_path, path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                raise
+
+    def _delete_entries(self, keys: List[str]):
+        for key in keys:
+            self._unlink(self._path(key))
+
+    def _clear_entries(self):
+        for shard in range(self.shards):
+            for path, _ in self._scan_shard(shard, read_header=False):
+                self._unlink(path)
+
+    @staticmethod
+    def _unlink(path: Path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _scan_shard(self, shard: int, read_header: bool = True) -> Iterator[Tuple[Path, Optional[tuple]]]:
+        """Yield (path, header) for each entry file; header is (codec_id, created_at, expires_at, service, key)."""
+        try:
+            names = os.listdir(self._shard_dir(shard))
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name.startswith("."):
+                continue
+            path = self._shard_dir(shard) / name
+            if not read_header:
+                yield path, None
+                continue
+            try:
+                with open(path, "rb") as f:
+                    header = f.read(ENTRY_HEADER.size)
+                    service_length, key_length = ENTRY_HEADER.unpack(header)[3:]
+                    blob = header + f.read(service_length + key_length)
+            except (FileNotFoundError, OSError):
+                continue
+            yield path, unpack_header(blob)[:5]
+
+    def iter_entries(self, service: Optional[str] = None) -> Iterator[Entry]:
+        now = time.time()
+        for shard in range(self.shards):
+            for path, _ in self._scan_shard(shard, read_header=False):
+                try:
+                    blob = path.read_bytes()
+                except FileNotFoundError:
+                    continue
+                codec_id, created_at, expires_at, entry_service, key, offset = unpack_header(blob)
+                if expires_at > now and (service is None or entry_service == service):
+                    yield key, entry_service, blob[offset:], codec_id, created_at, expires_at
+
+    def _keys_for_identifier(self, identifier: str) -> List[str]:
+        keys = []
+        for shard in range(self.shards):
+            for _, (_, _, _, service, key) in self._scan_shard(shard):
+                if self.split_key(service, key)[1] == identifier:
+                    keys.append(key)
+        return keys
+
+    def iter_identifiers(self, service: str, endpoint: str) -> Iterator[str]:
+        now = time.time()
+        for shard in range(self.shards):
+            for _, (_, _, expires_at, entry_service, key) in self._scan_shard(shard):
+                if expires_at > now and entry_service == service:
+                    entry_endpoint, identifier = self.split_key(service, key)
+                    if entry_endpoint == endpoint:
+                        yield identifier
+
+    def _remove_expired_in_shard(self, shard: int, cutoff: float) -> int:
+        removed = 0
+        for path, (_, _, expires_at, _, _) in self._scan_shard(shard):
+            if expires_at <= cutoff:
+                self._unlink(path)
+                removed += 1
+        return removed
+
+    def cleanup_expired(self) -> int:
+        cutoff = self._expiry_cutoff()
+        return sum(self._remove_expired_in_shard(shard, cutoff) for shard in range(self.shards))
+
+    def sweep(self, batch_size: int = 500, time_budget_seconds: float = 0.05,
+              vacuum_pages: int = 256) -> Dict[str, Any]:
+        """
+        Remove expired files shard by shard until every shard has been visited
+        or the time budget is spent. batch_size and vacuum_pages do not apply:
+        a shard is the unit of work and deleted files free their space at once.
+        """
+        deadline = time.perf_counter() + time_budget_seconds
+        removed = 0
+        complete = True
+        for visited in range(self.shards):
+            removed += self._remove_expired_in_shard(self._sweep_shard, self._expiry_cutoff())
+            self._sweep_shard = (self._sweep_shard + 1) % self.shards
+            if visited + 1 < self.shards and time.perf_counter() >= deadline:
+                complete = False
+                break
+        return {"expired_removed": removed, "vacuumed_pages": 0, "complete": complete}
+
+    def _lease_path(self, key: str) -> Path:
+        return self.lease_directory / hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _read_lease(path: Path) -> Optional[Tuple[str, float]]:
+        try:
+            owner, _, expires_at = path.read_text().rpartition(" ")
+            return owner, float(expires_at)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _acquire_lease(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        """Leases are files created with O_EXCL, so only one process can hold one."""
+        self.lease_directory.mkdir(exist_ok=True)
+        path = self._lease_path(key)
+        content = f"{owner} {time.time() + ttl_seconds!r}".encode("utf-8")
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                holder = self._read_lease(path)
+                if holder is None:
+                    continue
+                if holder[0] == owner:
+                    path.write_bytes(content)
+                    return True
+                if holder[1] > time.time():
+                    return False
+                # Break the lapsed lease by renaming it away, which only one process can do
+                stale_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.stale")
+                try:
+                    os.rename(path, stale_path)
+                except FileNotFoundError:
+                    continue
+                replaced = self._read_lease(stale_path)
+                if replaced is not None and replaced[1] > time.time():
+                    # Another process renewed it between our read and the rename; put it back
+                    os.replace(stale_path, path)
+                    return False
+                self._unlink(stale_path)
+                continue
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            return True
+        return False
+
+    def _release_lease(self, key: str, owner: str):
+        path = self._lease_path(key)
+        holder = self._read_lease(path)
+        if holder is not None and holder[0] == owner:
+            self._unlink(path)
+
+    def _storage_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        valid_entries = 0
+        expired_entries = 0
+        total_bytes = 0
+        api_sources = set()
+        for shard in range(self.shards):
+            for path, (_, _, expires_at, service, _) in self._scan_shard(shard):
+                try:
+                    total_bytes += path.stat().st_size
+                except FileNotFoundError:
+                    continue
+                api_sources.add(service)
+                if expires_at > now:
+                    valid_entries += 1
+                else:
+                    expired_entries += 1
+        return {
+            "valid_entries": valid_entries,
+            "expired_entries": expired_entries,
+            "api_sources": len(api_sources),
+            "total_bytes": total_bytes,
+            "directory": str(self.directory)
+        }
+
+    def close(self):
+        self._stop_background()
+        self._unregister()
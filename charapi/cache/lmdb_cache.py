@@ -0,0 +1,190 @@
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .backend import CacheBackend, Entry, StoredEntry, pack_entry, unpack_header
+from .memory_cache import MemoryCache
+from .telemetry import CacheTelemetry
+
+try:
+    import lmdb
+except ImportError:
+    lmdb = None
+
+
+class LMDBCache(CacheBackend):
+    """
+    LMDB-backed cache (caching.backend: lmdb); needs the lmdb package (pip install 'charapi[lmdb]').
+
+    LMDB serves reads from a memory map without copying the page, so a
+    get_many is a single read transaction and no lock is held while payloads
+    decode. Writes are serialized by LMDB itself; set_many commits all of its
+    entries in one write transaction. map_size is the maximum database size.
+
+    Entries use the same header-plus-payload layout as the filesystem backend,
+    without the cache key, which is the LMDB key.
+    sweep() walks the keyspace with a cursor in batches and resumes from the
+    last key it reached. Refresh leases are held within this process only.
+
+    LMDB keeps keys sorted, so the entries of one service endpoint are a
+    contiguous key range: iter_identifiers() reads just that range, and
+    invalidate_ein() does one lookup per endpoint, skipping from range to range.
+    """
+    name = "lmdb"
+
+    def __init__(self, path: str, map_size: int = 1 << 30, default_ttl_hours: float = 24,
+                 memory: Optional[MemoryCache] = None, codec: str = "zlib", compression_level: Optional[int] = None,
+                 telemetry: Optional[CacheTelemetry] = None, stale_grace_seconds: float = 0):
+        if lmdb is None:
+            raise ImportError("The lmdb cache backend requires lmdb: pip install 'charapi[lmdb]'")
+        super().__init__(default_ttl_hours, memory, codec, compression_level, telemetry, stale_grace_seconds)
+        self.path = path
+        self.map_size = map_size
+        self._sweep_key: Optional[bytes] = None
+        Path(path).mkdir(parents=True, exist_ok=True)
+        self._env = lmdb.open(path, map_size=map_size)
+
+    def _read_entries(self, keys: List[str]) -> Dict[str, StoredEntry]:
+        now = time.time()
+        entries = {}
+        with self._env.begin(buffers=True) as txn:
+            for key in keys:
+                blob = txn.get(key.encode("utf-8"))
+                if blob is None:
+                    continue
+                codec_id, created_at, expires_at, service, _, offset = unpack_header(blob)
+                if expires_at > now:
+                    # Buffers are only valid inside the transaction
+                    entries[key] = (bytes(blob[offset:]), codec_id, expires_at)
+        return entries
+
+    def _read_stale_entry(self, key: str) -> Optional[StoredEntry]:
+        with self._env.begin(buffers=True) as txn:
+            blob = txn.get(key.encode("utf-8"))
+            if blob is None:
+                return None
+            codec_id, created_at, expires_at, service, _, offset = unpack_header(blob)
+            return bytes(blob[offset:]), codec_id, expires_at
+
+    def _write_entries(self, entries: List[Entry]):
+        with self._env.begin(write=True) as txn:
+            for key, service, data, codec_id, created_at, expires_at in entries:
+                txn.put(key.encode("utf-8"), pack_entry(service, data, codec_id, created_at, expires_at))
+
+    def _delete_entries(self, keys: List[str]):
+        with self._env.begin(write=True) as txn:
+            for key in keys:
+                txn.delete(key.encode("utf-8"))
+
+    def _clear_entries(self):
+        with self._env.begin(write=True) as txn:
+            txn.drop(self._env.open_db(txn=txn), delete=False)
+
+    def iter_entries(self, service: Optional[str] = None) -> Iterator[Entry]:
+        now = time.time()
+        with self._env.begin() as txn:
+            for raw_key, value in txn.cursor():
+                codec_id, created_at, expires_at, entry_service, _, offset = unpack_header(value)
+                if expires_at > now and (service is None or entry_service == service):
+                    yield raw_key.decode("utf-8"), entry_service, value[offset:], codec_id, created_at, expires_at
+
+    def iter_identifiers(self, service: str, endpoint: str) -> Iterator[str]:
+        now = time.time()
+        prefix = self._generate_key(service, endpoint, "").encode("utf-8")
+        with self._env.begin() as txn:
+            cursor = txn.cursor()
+            found = cursor.set_range(prefix)
+            while found and cursor.key().startswith(prefix):
+                _, _, expires_at, entry_service, _, _ = unpack_header(cursor.value())
+                if expires_at > now and entry_service == service:
+                    yield cursor.key()[len(prefix):].decode("utf-8")
+                found = cursor.next()
+
+    def _keys_for_identifier(self, identifier: str) -> List[str]:
+        keys = []
+        with self._env.begin(buffers=True) as txn:
+            cursor = txn.cursor()
+            found = cursor.first()
+            while found:
+                key = bytes(cursor.key()).decode("utf-8")
+                service = unpack_header(cursor.value())[3]
+                endpoint, _ = self.split_key(service, key)
+                prefix = self._generate_key(service, endpoint, "").encode("utf-8")
+                if txn.get(prefix + identifier.encode("utf-8")) is not None:
+                    keys.append(self._generate_key(service, endpoint, identifier))
+                # Jump past every key with this prefix: "`" sorts right after the trailing "_"
+                found = cursor.set_range(prefix[:-1] + b"`")
+        return keys
+
+    def _expired_keys(self, cutoff: float, start: Optional[bytes] = None, limit: Optional[int] = None):
+        """Return (expired keys, last key visited) scanning from start; the last key is None at the end."""
+        expired = []
+        with self._env.begin(buffers=True) as txn:
+            cursor = txn.cursor()
+            found = cursor.set_range(start) if start is not None else cursor.first()
+            while found:
+                if limit is not None and len(expired) >= limit:
+                    return expired, bytes(cursor.key())
+                if unpack_header(cursor.value())[2] <= cutoff:
+                    expired.append(bytes(cursor.key()))
+                found = cursor.next()
+        return expired, None
+
+    def _delete_raw(self, raw_keys: List[bytes]) -> int:
+        if not raw_keys:
+            return 0
+        with self._env.begin(write=True) as txn:
+            return sum(1 for key in raw_keys if txn.delete(key))
+
+    def cleanup_expired(self) -> int:
+        expired, _ = self._expired_keys(self._expiry_cutoff())
+        return self._delete_raw(expired)
+
+    def sweep(self, batch_size: int = 500, time_budget_seconds: float = 0.05,
+              vacuum_pages: int = 256) -> Dict[str, Any]:
+        """
+        Delete expired entries batch_size at a time, walking the keyspace from
+        where the previous sweep stopped. LMDB reuses freed pages itself, so
+        vacuum_pages does not apply.
+        """
+        deadline = time.perf_counter() + time_budget_seconds
+        removed = 0
+        complete = True
+        while True:
+            expired, self._sweep_key = self._expired_keys(self._expiry_cutoff(), self._sweep_key, batch_size)
+            removed += self._delete_raw(expired)
+            if self._sweep_key is None:
+                break
+            if time.perf_counter() >= deadline:
+                complete = False
+                break
+        return {"expired_removed": removed, "vacuumed_pages": 0, "complete": complete}
+
+    def _storage_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        valid_entries = 0
+        expired_entries = 0
+        total_bytes = 0
+        api_sources = set()
+        with self._env.begin(buffers=True) as txn:
+            for key, value in txn.cursor():
+                _, _, expires_at, service, _, _ = unpack_header(value)
+                total_bytes += len(value)
+                api_sources.add(service)
+                if expires_at > now:
+                    valid_entries += 1
+                else:
+                    expired_entries += 1
+        return {
+            "valid_entries": valid_entries,
+            "expired_entries": expired_entries,
+            "api_sources": len(api_sources),
+            "total_bytes": total_bytes,
+            "lmdb_path": self.path,
+            "map_size": self.map_size
+        }
+
+    def close(self):
+        self._stop_background()
+        self._unregister()
+        self._env.close()
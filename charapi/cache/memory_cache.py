@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class MemoryCache:
+    """
+    Size-bounded in-process tier holding decoded cache values.
+
+    Entries are bounded by count and/or by the size of their encoded payload,
+    and expire with the SQLite entry they mirror. max_age_seconds caps how long
+    an entry is trusted, which bounds staleness when another process rewrites
+    the database. Values are shared, not copied: callers must not mutate them.
+
+    Eviction is "lru" (hits refresh an entry) or "fifo" (insertion order only).
+    """
+    EVICTION_POLICIES = ("lru", "fifo")
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 eviction: str = "lru", max_age_seconds: Optional[float] = None):
+        if eviction not in self.EVICTION_POLICIES:
+            raise ValueError(f"Unknown memory cache eviction '{eviction}'")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.eviction = eviction
+        self.max_age_seconds = max_age_seconds
+
+        # key -> (value, expires_at, size, trusted_until); trusted_until also applies max_age_seconds
+        self._entries: "OrderedDict[str, Tuple[Any, float, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, memory_config: Optional[Dict[str, Any]]) -> Optional["MemoryCache"]:
+        if not memory_config or not memory_config.get("enabled", True):
+            return None
+        if memory_config.get("max_entries") is None and memory_config.get("max_bytes") is None:
+            return None
+        return cls(
+            max_entries=memory_config.get("max_entries"),
+            max_bytes=memory_config.get("max_bytes"),
+            eviction=memory_config.get("eviction", "lru"),
+            max_age_seconds=memory_config.get("max_age_seconds")
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.get_entry(key)
+        return None if entry is None else entry[0]
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, expires_at) for an entry that is unexpired and within max_age_seconds."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, size, trusted_until = entry
+            if trusted_until <= time.time():
+                self._remove(key)
+                return None
+            if self.eviction == "lru":
+                self._entries.move_to_end(key)
+            return value, expires_at
+
+    def put(self, key: str, value: Any, expires_at: float, size: int):
+        trusted_until = expires_at
+        if self.max_age_seconds is not None:
+            trusted_until = min(expires_at, time.time() + self.max_age_seconds)
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.invalidate(key)
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, expires_at, size, trusted_until)
+            self._bytes += size
+            while self._entries and (
+                (self.max_entries is not None and len(self._entries) > self.max_entries)
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"memory_entries": len(self._entries), "memory_bytes": self._bytes}
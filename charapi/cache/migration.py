@@ -0,0 +1,88 @@
+import threading
+from typing import Any, Dict, Optional
+
+
+class CacheMigrator:
+    """
+    Daemon thread that runs the cache's migrate() until every row is upgraded.
+
+    Each call is bounded by time_budget_seconds and followed by pause_seconds,
+    so request-path writers only ever wait for one batch; the thread exits
+    once a migration pass is complete. Failed calls are retried with the pause
+    doubling up to max_backoff_seconds; after max_failures in a row the thread
+    gives up, leaving last_error in the stats, rather than keep competing with
+    writers for a database it cannot migrate (read-only, full disk).
+    """
+
+    def __init__(self, cache, batch_size: int = 500, time_budget_seconds: float = 0.05, pause_seconds: float = 0.1,
+                 max_failures: int = 10, max_backoff_seconds: float = 60.0):
+        self.cache = cache
+        self.batch_size = batch_size
+        self.time_budget_seconds = time_budget_seconds
+        self.pause_seconds = pause_seconds
+        self.max_failures = max_failures
+        self.max_backoff_seconds = max_backoff_seconds
+
+        self.migrated = 0
+        self.complete = False
+        self.failures = 0
+        self.gave_up = False
+        self.last_error: Optional[str] = None
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="charapi-cache-migrator", daemon=True)
+
+    @classmethod
+    def for_cache(cls, cache, migration_config: Dict[str, Any]) -> Optional["CacheMigrator"]:
+        """Start migrating the cache in the background if it has rows to upgrade and no migrator yet."""
+        with cache.sweeper_lock:
+            if cache.migrator is None and cache.migration_remaining() > 0:
+                cache.migrator = cls(
+                    cache,
+                    batch_size=migration_config.get("batch_size", 500),
+                    time_budget_seconds=migration_config.get("time_budget_ms", 50) / 1000,
+                    pause_seconds=migration_config.get("pause_ms", 100) / 1000,
+                    max_failures=migration_config.get("max_failures", 10),
+                    max_backoff_seconds=migration_config.get("max_backoff_ms", 60000) / 1000
+                )
+                cache.migrator.start()
+            return cache.migrator
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def migrate_once(self) -> Dict[str, Any]:
+        result = self.cache.migrate(self.batch_size, self.time_budget_seconds)
+        self.migrated += result["migrated"]
+        self.complete = result["complete"]
+        return result
+
+    def _run(self):
+        while not self.complete and not self._stop.is_set():
+            try:
+                self.migrate_once()
+                self.failures = 0
+                self.last_error = None
+            except Exception as e:
+                # Back off through transient errors such as a locked database; give up on persistent ones
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                if self.failures >= self.max_failures:
+                    self.gave_up = True
+                    return
+            if not self.complete:
+                self._stop.wait(min(self.pause_seconds * 2 ** self.failures, self.max_backoff_seconds))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "migration_migrated": self.migrated,
+            "migration_complete": self.complete,
+            "migration_failures": self.failures,
+            "migration_gave_up": self.gave_up,
+            "migration_last_error": self.last_error
+        }
@@ -0,0 +1,262 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .api_cache import APICache
+from .backend import CacheBackend, Entry, StoredEntry
+from .memory_cache import MemoryCache
+from .telemetry import CacheTelemetry
+
+# Overlay rows with this codec hide the replica entry with the same key
+TOMBSTONE_CODEC = -1
+TOMBSTONE_TTL_SECONDS = 10 * 365 * 24 * 3600
+
+
+class ReplicaCache(CacheBackend):
+    """
+    Read-only SQLite replica with a small writable overlay (caching.backend: replica).
+
+    The replica is a file published by APICache.publish_replica() and is
+    opened with SQLite's immutable flag: no locks, no journal, no change
+    detection, so any number of worker processes read it concurrently and
+    share its pages through the OS page cache (memory-mapped up to
+    mmap_size). Publish a new replica by writing a new file and renaming it
+    over the old one; running workers keep reading the file they opened.
+    With immutable=False the file is opened read-only instead, which takes
+    shared locks but tolerates a writer.
+
+    Writes go to an ordinary APICache at overlay_path, which reads consult
+    first. Invalidating a key that exists only in the replica writes a
+    tombstone to the overlay. Expiry, sweeps and size limits apply to the
+    overlay only. Replicas published before the endpoint/identifier columns
+    existed are searched by key suffix instead, and replicas published before
+    payload dedup are read through a temporary view without shared payloads.
+    """
+    name = "replica"
+
+    def __init__(self, replica_path: str, overlay_path: str, immutable: bool = True, mmap_size: int = 1 << 30,
+                 default_ttl_hours: float = 24, memory: Optional[MemoryCache] = None, codec: str = "zlib",
+                 compression_level: Optional[int] = None, max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None, eviction: str = "lru", telemetry: Optional[CacheTelemetry] = None,
+                 stale_grace_seconds: float = 0, dedup_min_bytes: Optional[int] = None):
+        if not Path(replica_path).exists():
+            raise FileNotFoundError(f"Cache replica not found: {replica_path}")
+        super().__init__(default_ttl_hours, memory, codec, compression_level, telemetry, stale_grace_seconds)
+        self.replica_path = replica_path
+        self.immutable = immutable
+        self.mmap_size = mmap_size
+        self.overlay = APICache(
+            overlay_path,
+            default_ttl_hours=default_ttl_hours,
+            codec=codec,
+            compression_level=compression_level,
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            eviction=eviction,
+            telemetry=self.telemetry,
+            stale_grace_seconds=stale_grace_seconds,
+            dedup_min_bytes=dedup_min_bytes
+        )
+        self.sweeper_lock = self.overlay.sweeper_lock
+
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        columns = {row[1] for row in self._get_connection().execute("PRAGMA main.table_info(api_cache)")}
+        self._indexed = "identifier" in columns
+
+    def _get_connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            flag = "immutable=1" if self.immutable else "mode=ro"
+            uri = f"{Path(self.replica_path).resolve().as_uri()}?{flag}"
+            conn = sqlite3.connect(uri, uri=True, isolation_level=None, check_same_thread=False)
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'cache_blobs'").fetchone() is None:
+                # Published before payload dedup: shadow the tables with what the shared queries join on
+                conn.execute("CREATE TEMP TABLE cache_blobs (hash BLOB PRIMARY KEY, data BLOB NOT NULL)")
+                conn.execute("CREATE TEMP VIEW api_cache AS SELECT *, NULL AS blob_hash FROM main.api_cache")
+            self._local.connection = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _read_replica(self, keys: List[str]) -> Dict[str, StoredEntry]:
+        now = time.time()
+        entries = {}
+        conn = self._get_connection()
+        for start in range(0, len(keys), APICache.MANY_CHUNK_SIZE):
+            chunk = keys[start:start + APICache.MANY_CHUNK_SIZE]
+            sql = APICache.SELECT_MANY_SQL.format(placeholders=",".join("?" * len(chunk)))
+            for cache_key, data, codec_id, expires_at in conn.execute(sql, (now, *chunk)):
+                entries[cache_key] = (data, codec_id, expires_at)
+        return entries
+
+    def _read_entries(self, keys: List[str]) -> Dict[str, StoredEntry]:
+        overlay_entries = self.overlay._read_entries(keys)
+        remaining = [key for key in keys if key not in overlay_entries]
+        entries = self._read_replica(remaining) if remaining else {}
+        for key, entry in overlay_entries.items():
+            if entry[1] != TOMBSTONE_CODEC:
+                entries[key] = entry
+        return entries
+
+    def _read_entry(self, key: str) -> Optional[StoredEntry]:
+        entry = self.overlay._read_entry(key)
+        if entry is None:
+            return self._get_connection().execute(APICache.SELECT_SQL, (key, time.time())).fetchone()
+        return None if entry[1] == TOMBSTONE_CODEC else entry
+
+    def _read_stale_entry(self, key: str) -> Optional[StoredEntry]:
+        entry = self.overlay._read_stale_entry(key)
+        if entry is None:
+            return self._get_connection().execute(APICache.SELECT_STALE_SQL, (key,)).fetchone()
+        return None if entry[1] == TOMBSTONE_CODEC else entry
+
+    def _write_entries(self, entries: List[Entry]):
+        self.overlay.load_entries(entries)
+
+    def _tombstone(self, keys: List[Tuple[str, str]]):
+        """Hide (key, service) replica entries behind overlay rows."""
+        now = time.time()
+        self.overlay.load_entries([
+            (key, service, b"", TOMBSTONE_CODEC, now, now + TOMBSTONE_TTL_SECONDS) for key, service in keys
+        ])
+
+    def _replica_services(self, keys: List[str]) -> List[Tuple[str, str]]:
+        """Return (key, service) for the keys with an unexpired replica entry."""
+        found = []
+        conn = self._get_connection()
+        for start in range(0, len(keys), APICache.MANY_CHUNK_SIZE):
+            chunk = keys[start:start + APICache.MANY_CHUNK_SIZE]
+            found.extend(conn.execute(
+                "SELECT cache_key, api_source FROM api_cache WHERE expires_at > ? AND cache_key IN ({})".format(
+                    ",".join("?" * len(chunk))), (time.time(), *chunk)
+            ))
+        return found
+
+    def _delete_entries(self, keys: List[str]):
+        self.overlay._delete_entries(keys)
+        in_replica = self._replica_services(keys)
+        if in_replica:
+            self._tombstone(in_replica)
+
+    def _clear_entries(self):
+        self.overlay.clear_all()
+        replica_keys = self._get_connection().execute("SELECT cache_key, api_source FROM api_cache").fetchall()
+        for start in range(0, len(replica_keys), APICache.MANY_CHUNK_SIZE):
+            self._tombstone(replica_keys[start:start + APICache.MANY_CHUNK_SIZE])
+
+    def _keys_for_identifier(self, identifier: str) -> List[str]:
+        if self._indexed:
+            rows = self._get_connection().execute(APICache.IDENTIFIER_KEYS_SQL, (identifier,))
+        else:
+            rows = self._get_connection().execute(
+                "SELECT cache_key FROM api_cache WHERE SUBSTR(cache_key, -?) = ?",
+                (len(identifier) + 1, "_" + identifier)
+            )
+        keys = {row[0] for row in rows}
+        # Tombstones already hide their replica entry and are replaced when it is deleted again
+        keys.update(self.overlay._keys_for_identifier(identifier))
+        return list(keys)
+
+    def iter_identifiers(self, service: str, endpoint: str) -> Iterator[str]:
+        if not self._indexed:
+            yield from super().iter_identifiers(service, endpoint)
+            return
+        now = time.time()
+        overlay_rows = self.overlay._get_connection().execute(
+            "SELECT identifier, codec FROM api_cache WHERE api_source = ? AND endpoint = ? AND expires_at > ?",
+            (service, endpoint, now)
+        ).fetchall()
+        shadowed = set()
+        for identifier, codec_id in overlay_rows:
+            shadowed.add(identifier)
+            if codec_id != TOMBSTONE_CODEC:
+                yield identifier
+        for identifier in APICache.query_identifiers(self._get_connection(), service, endpoint):
+            if identifier not in shadowed:
+                yield identifier
+
+    def _acquire_lease(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        return self.overlay._acquire_lease(key, owner, ttl_seconds)
+
+    def _release_lease(self, key: str, owner: str):
+        self.overlay._release_lease(key, owner)
+
+    def exists(self, service: str, endpoint: str, identifier: str) -> bool:
+        return self._read_entry(self._generate_key(service, endpoint, identifier)) is not None
+
+    def iter_entries(self, service: Optional[str] = None) -> Iterator[Entry]:
+        overlay_keys = set()
+        for entry in self.overlay.iter_entries():
+            overlay_keys.add(entry[0])
+            if entry[3] != TOMBSTONE_CODEC and (service is None or entry[1] == service):
+                yield entry
+
+        cursor = self._get_connection().cursor()
+        if service is None:
+            cursor.execute(APICache.ITER_SQL, (time.time(),))
+        else:
+            cursor.execute(APICache.ITER_SQL + " AND api_source = ?", (time.time(), service))
+        for entry in cursor:
+            if entry[0] not in overlay_keys:
+                yield entry
+
+    def cleanup_expired(self) -> int:
+        return self.overlay.cleanup_expired()
+
+    def sweep(self, batch_size: int = 500, time_budget_seconds: float = 0.05,
+              vacuum_pages: int = 256) -> Dict[str, Any]:
+        return self.overlay.sweep(batch_size, time_budget_seconds, vacuum_pages)
+
+    def migration_remaining(self) -> int:
+        # The replica is rewritten by publishing it again, from a migrated database
+        return self.overlay.migration_remaining()
+
+    def migrate(self, batch_size: int = 500, time_budget_seconds: float = 0.05) -> Dict[str, Any]:
+        return self.overlay.migrate(batch_size, time_budget_seconds)
+
+    def _storage_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        conn = self._get_connection()
+        replica_valid, replica_expired = conn.execute(
+            "SELECT COALESCE(SUM(expires_at > ?), 0), COALESCE(SUM(expires_at <= ?), 0) FROM api_cache", (now, now)
+        ).fetchone()
+        overlay_stats = self.overlay._storage_stats()
+        overlay_valid = self.overlay._get_connection().execute(
+            "SELECT COUNT(*) FROM api_cache WHERE expires_at > ? AND codec != ?", (now, TOMBSTONE_CODEC)
+        ).fetchone()[0]
+        # Replica entries replaced or hidden by the overlay are counted once, from the overlay
+        overlay_keys = [row[0] for row in self.overlay._get_connection().execute(
+            "SELECT cache_key FROM api_cache WHERE expires_at > ?", (now,)
+        )]
+        shadowed = len(self._read_replica(overlay_keys))
+        api_sources = {row[0] for row in conn.execute("SELECT DISTINCT api_source FROM api_cache")}
+        api_sources.update(row[0] for row in self.overlay._get_connection().execute(
+            "SELECT DISTINCT api_source FROM api_cache WHERE codec != ?", (TOMBSTONE_CODEC,)
+        ))
+        return {
+            "valid_entries": replica_valid - shadowed + overlay_valid,
+            "expired_entries": replica_expired + overlay_stats["expired_entries"],
+            "replica_entries": replica_valid,
+            "overlay_entries": overlay_valid,
+            "tombstones": overlay_stats["valid_entries"] - overlay_valid,
+            "api_sources": len(api_sources),
+            "total_bytes": Path(self.replica_path).stat().st_size + overlay_stats["total_bytes"],
+            "replica_path": self.replica_path,
+            "overlay_path": self.overlay.database_path
+        }
+
+    def close(self):
+        self._stop_background()
+        self._unregister()
+        with self._connections_lock:
+            connections = self._connections
+            self._connections = []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+        self.overlay.close()
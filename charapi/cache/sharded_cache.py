@@ -0,0 +1,189 @@
+import time
+import zlib
+from collections import defaultdict
+from itertools import chain
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .api_cache import APICache
+from .backend import CacheBackend, Entry, StoredEntry
+from .memory_cache import MemoryCache
+from .telemetry import CacheTelemetry
+
+
+class ShardedCache(CacheBackend):
+    """
+    Cache spread over several SQLite files by EIN hash (caching.backend: sharded).
+
+    Every SQLite file has a single writer at a time, so one shared database
+    serializes all processes of a pool during cold runs. Here each entry is
+    routed by a hash of its identifier (the part of the key after the last
+    "_", i.e. the EIN for every EIN-keyed endpoint) to one of `shards`
+    APICache files, so writers for different EINs rarely wait on each other
+    and every entry for one EIN lives in the same file, which is also the
+    only file invalidate_ein() has to touch.
+
+    max_entries and max_bytes are split evenly across shards. sweep() visits
+    the shards round-robin within one time budget; stats are aggregated.
+    """
+    name = "sharded"
+
+    def __init__(self, database_path: str, shards: int = 8, default_ttl_hours: float = 24,
+                 busy_timeout_seconds: float = 30, memory: Optional[MemoryCache] = None, codec: str = "zlib",
+                 compression_level: Optional[int] = None, max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None, eviction: str = "lru", telemetry: Optional[CacheTelemetry] = None,
+                 stale_grace_seconds: float = 0, dedup_min_bytes: Optional[int] = None):
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        super().__init__(default_ttl_hours, memory, codec, compression_level, telemetry, stale_grace_seconds)
+        self.database_path = database_path
+        path = Path(database_path)
+        self.shards = [
+            APICache(
+                str(path.with_name(f"{path.stem}.shard{index:02d}{path.suffix}")),
+                default_ttl_hours=default_ttl_hours,
+                busy_timeout_seconds=busy_timeout_seconds,
+                codec=codec,
+                compression_level=compression_level,
+                max_entries=None if max_entries is None else max(1, max_entries // shards),
+                max_bytes=None if max_bytes is None else max(1, max_bytes // shards),
+                eviction=eviction,
+                telemetry=self.telemetry,
+                stale_grace_seconds=stale_grace_seconds,
+                dedup_min_bytes=dedup_min_bytes
+            )
+            for index in range(shards)
+        ]
+        self._sweep_shard = 0
+
+    def shard_for(self, key: str) -> APICache:
+        identifier = key.rsplit("_", 1)[-1]
+        return self.shards[zlib.crc32(identifier.encode("utf-8")) % len(self.shards)]
+
+    def _group(self, items: Iterable, key_of=lambda item: item) -> Dict[APICache, list]:
+        groups = defaultdict(list)
+        for item in items:
+            groups[self.shard_for(key_of(item))].append(item)
+        return groups
+
+    def _read_entry(self, key: str) -> Optional[StoredEntry]:
+        return self.shard_for(key)._read_entry(key)
+
+    def _read_stale_entry(self, key: str) -> Optional[StoredEntry]:
+        return self.shard_for(key)._read_stale_entry(key)
+
+    def _read_entries(self, keys: List[str]) -> Dict[str, StoredEntry]:
+        entries = {}
+        for shard, shard_keys in self._group(keys).items():
+            entries.update(shard._read_entries(shard_keys))
+        return entries
+
+    def _write_entries(self, entries: List[Entry]):
+        for shard, shard_entries in self._group(entries, lambda entry: entry[0]).items():
+            shard.load_entries(shard_entries)
+
+    def _delete_entries(self, keys: List[str]):
+        for shard, shard_keys in self._group(keys).items():
+            shard._delete_entries(shard_keys)
+
+    def _clear_entries(self):
+        for shard in self.shards:
+            shard.clear_all()
+
+    def _acquire_lease(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        return self.shard_for(key)._acquire_lease(key, owner, ttl_seconds)
+
+    def _release_lease(self, key: str, owner: str):
+        self.shard_for(key)._release_lease(key, owner)
+
+    def _keys_for_identifier(self, identifier: str) -> List[str]:
+        # Routing only looks at the text after the last "_", which the identifier ends with
+        return self.shard_for(identifier)._keys_for_identifier(identifier)
+
+    def iter_identifiers(self, service: str, endpoint: str) -> Iterator[str]:
+        return chain.from_iterable(shard.iter_identifiers(service, endpoint) for shard in self.shards)
+
+    def _entries_read(self, keys: Iterable[str]):
+        for shard, shard_keys in self._group(keys).items():
+            shard._record_access(shard_keys)
+
+    def iter_entries(self, service: Optional[str] = None) -> Iterator[Entry]:
+        return chain.from_iterable(shard.iter_entries(service) for shard in self.shards)
+
+    def flush_access(self):
+        for shard in self.shards:
+            shard.flush_access()
+
+    def cleanup_expired(self) -> int:
+        return sum(shard.cleanup_expired() for shard in self.shards)
+
+    def sweep(self, batch_size: int = 500, time_budget_seconds: float = 0.05,
+              vacuum_pages: int = 256) -> Dict[str, Any]:
+        """
+        Sweep the shards in turn, starting after the shard the previous sweep
+        ended on, until all are done or the time budget is spent.
+        """
+        deadline = time.perf_counter() + time_budget_seconds
+        removed = 0
+        vacuumed = 0
+        complete = True
+        for visited in range(len(self.shards)):
+            shard = self.shards[self._sweep_shard]
+            result = shard.sweep(batch_size, max(0.0, deadline - time.perf_counter()), vacuum_pages)
+            removed += result["expired_removed"]
+            vacuumed += result["vacuumed_pages"]
+            if not result["complete"]:
+                complete = False
+                break
+            self._sweep_shard = (self._sweep_shard + 1) % len(self.shards)
+            if visited + 1 < len(self.shards) and time.perf_counter() >= deadline:
+                complete = False
+                break
+        return {"expired_removed": removed, "vacuumed_pages": vacuumed, "complete": complete}
+
+    def migration_remaining(self) -> int:
+        return sum(shard.migration_remaining() for shard in self.shards)
+
+    def migrate(self, batch_size: int = 500, time_budget_seconds: float = 0.05) -> Dict[str, Any]:
+        deadline = time.perf_counter() + time_budget_seconds
+        migrated = 0
+        for shard in self.shards:
+            result = shard.migrate(batch_size, max(0.0, deadline - time.perf_counter()))
+            migrated += result["migrated"]
+            if not result["complete"]:
+                return {"migrated": migrated, "complete": False}
+        return {"migrated": migrated, "complete": True}
+
+    def compact(self) -> Dict[str, int]:
+        totals = {"expired_removed": 0, "evicted": 0, "bytes_before": 0, "bytes_after": 0}
+        for shard in self.shards:
+            for name, value in shard.compact().items():
+                totals[name] += value
+        return totals
+
+    def _storage_stats(self) -> Dict[str, Any]:
+        shard_stats = [shard._storage_stats() for shard in self.shards]
+        api_sources = set()
+        for shard in self.shards:
+            api_sources.update(row[0] for row in shard._get_connection().execute(
+                "SELECT DISTINCT api_source FROM api_cache"
+            ))
+        return {
+            "valid_entries": sum(stats["valid_entries"] for stats in shard_stats),
+            "expired_entries": sum(stats["expired_entries"] for stats in shard_stats),
+            "api_sources": len(api_sources),
+            "total_bytes": sum(stats["total_bytes"] for stats in shard_stats),
+            "evicted_entries": sum(stats["evicted_entries"] for stats in shard_stats),
+            "shared_payloads": sum(stats["shared_payloads"] for stats in shard_stats),
+            "dedup_saved_bytes": sum(stats["dedup_saved_bytes"] for stats in shard_stats),
+            "migration_remaining": sum(stats["migration_remaining"] for stats in shard_stats),
+            "shards": len(self.shards),
+            "shard_entries": [stats["valid_entries"] for stats in shard_stats],
+            "database_path": self.database_path
+        }
+
+    def close(self):
+        self._stop_background()
+        self._unregister()
+        for shard in self.shards:
+            shard.close()
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional
+
+from .backend import CacheBackend, Entry, normalize_ein, pack_entry, unpack_header
+
+SNAPSHOT_MAGIC = b"CHARAPI-CACHE-SNAPSHOT-1\n"
+RECORD_LENGTH = struct.Struct("<I")
+# entry count; followed by the SHA-256 of every byte before the digest
+SNAPSHOT_FOOTER = struct.Struct("<Q")
+DIGEST_SIZE = hashlib.sha256().digest_size
+
+# Entries per load_entries call, i.e. per write transaction on SQLite
+IMPORT_BATCH_SIZE = 5000
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+class _HashingWriter:
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data: bytes):
+        self.sha256.update(data)
+        self.f.write(data)
+
+
+def export_snapshot(cache: CacheBackend, path: Path, services: Optional[Iterable[str]] = None,
+                    endpoints: Optional[Iterable[str]] = None, eins: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Write the cache's unexpired entries to a snapshot file, optionally only
+    for some services, endpoints and/or EINs.
+
+    Payloads are copied still encoded, so nothing is decoded or recompressed,
+    and each entry keeps its original expiry time.
+    """
+    service_filter = sorted(set(services)) if services else None
+    endpoint_filter = set(endpoints) if endpoints else None
+    ein_filter = {normalize_ein(ein) for ein in eins} if eins is not None else None
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(path.suffix + ".tmp")
+    count = 0
+    with open(temp_path, "wb") as f:
+        writer = _HashingWriter(f)
+        writer.write(SNAPSHOT_MAGIC)
+        for service in service_filter or [None]:
+            for key, entry_service, data, codec_id, created_at, expires_at in cache.iter_entries(service):
+                if endpoint_filter is not None or ein_filter is not None:
+                    endpoint, identifier = cache.split_key(entry_service, key)
+                    if endpoint_filter is not None and endpoint not in endpoint_filter:
+                        continue
+                    if ein_filter is not None and identifier not in ein_filter:
+                        continue
+                record = pack_entry(entry_service, data, codec_id, created_at, expires_at, key)
+                writer.write(RECORD_LENGTH.pack(len(record)))
+                writer.write(record)
+                count += 1
+        writer.write(RECORD_LENGTH.pack(0))
+        writer.write(SNAPSHOT_FOOTER.pack(count))
+        f.write(writer.sha256.digest())
+    os.replace(temp_path, path)
+    return {"entries": count, "bytes": path.stat().st_size}
+
+
+def _read_records(f: BinaryIO) -> Iterator[bytes]:
+    if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+        raise SnapshotError("Not a cache snapshot")
+    while True:
+        header = f.read(RECORD_LENGTH.size)
+        if len(header) < RECORD_LENGTH.size:
+            raise SnapshotError("Truncated cache snapshot")
+        length = RECORD_LENGTH.unpack(header)[0]
+        if length == 0:
+            return
+        record = f.read(length)
+        if len(record) < length:
+            raise SnapshotError("Truncated cache snapshot")
+        yield record
+
+
+def verify_snapshot(path: Path) -> int:
+    """Check a snapshot's checksum and structure; return its entry count or raise SnapshotError."""
+    with open(path, "rb") as f:
+        count = sum(1 for _ in _read_records(f))
+        footer = f.read(SNAPSHOT_FOOTER.size)
+        checksum_end = f.tell()
+        digest = f.read(DIGEST_SIZE)
+        if len(footer) < SNAPSHOT_FOOTER.size or len(digest) < DIGEST_SIZE or f.read(1):
+            raise SnapshotError("Truncated cache snapshot")
+        if SNAPSHOT_FOOTER.unpack(footer)[0] != count:
+            raise SnapshotError("Cache snapshot entry count does not match its records")
+
+        f.seek(0)
+        sha256 = hashlib.sha256()
+        remaining = checksum_end
+        while remaining:
+            chunk = f.read(min(remaining, 1 << 20))
+            sha256.update(chunk)
+            remaining -= len(chunk)
+        if sha256.digest() != digest:
+            raise SnapshotError("Cache snapshot checksum mismatch")
+    return count
+
+
+def import_snapshot(cache: CacheBackend, path: Path) -> Dict[str, int]:
+    """
+    Verify a snapshot, then bulk-load its entries into the cache, replacing
+    existing entries with the same key. Entries that expired since the
+    export are skipped; the rest keep their original expiry time.
+    """
+    verify_snapshot(path)
+    imported = 0
+    expired = 0
+    now = time.time()
+    batch = []
+    with open(path, "rb") as f:
+        for record in _read_records(f):
+            codec_id, created_at, expires_at, service, key, offset = unpack_header(record)
+            if expires_at <= now:
+                expired += 1
+                continue
+            entry: Entry = (key, service, record[offset:], codec_id, created_at, expires_at)
+            batch.append(entry)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                cache.load_entries(batch)
+                imported += len(batch)
+                batch = []
+    cache.load_entries(batch)
+    imported += len(batch)
+    return {"imported": imported, "expired_skipped": expired}
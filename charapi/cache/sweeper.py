@@ -0,0 +1,80 @@
+import threading
+from typing import Any, Dict, Optional
+
+
+class CacheSweeper:
+    """
+    Daemon thread that runs the cache's sweep() every interval_seconds.
+
+    Each sweep is bounded by time_budget_seconds; when expired entries are left
+    over, the next sweep follows after backlog_pause_seconds instead of a full
+    interval, so a large backlog drains steadily without monopolizing the
+    database.
+    """
+
+    def __init__(self, cache, interval_seconds: float = 60, batch_size: int = 500,
+                 time_budget_seconds: float = 0.05, vacuum_pages: int = 256, backlog_pause_seconds: float = 0.5):
+        self.cache = cache
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.time_budget_seconds = time_budget_seconds
+        self.vacuum_pages = vacuum_pages
+        self.backlog_pause_seconds = backlog_pause_seconds
+
+        self.sweeps = 0
+        self.expired_removed = 0
+        self.vacuumed_pages = 0
+        self.last_error: Optional[str] = None
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="charapi-cache-sweeper", daemon=True)
+
+    @classmethod
+    def for_cache(cls, cache, sweeper_config: Dict[str, Any]) -> "CacheSweeper":
+        """Start the cache's sweeper unless one is already running."""
+        with cache.sweeper_lock:
+            if cache.sweeper is None:
+                cache.sweeper = cls(
+                    cache,
+                    interval_seconds=sweeper_config.get("interval_seconds", 60),
+                    batch_size=sweeper_config.get("batch_size", 500),
+                    time_budget_seconds=sweeper_config.get("time_budget_ms", 50) / 1000,
+                    vacuum_pages=sweeper_config.get("vacuum_pages", 256)
+                )
+                cache.sweeper.start()
+            return cache.sweeper
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def sweep_once(self) -> Dict[str, Any]:
+        result = self.cache.sweep(self.batch_size, self.time_budget_seconds, self.vacuum_pages)
+        self.sweeps += 1
+        self.expired_removed += result["expired_removed"]
+        self.vacuumed_pages += result["vacuumed_pages"]
+        return result
+
+    def _run(self):
+        delay = 0.0
+        while not self._stop.wait(delay):
+            try:
+                result = self.sweep_once()
+                self.last_error = None
+                delay = self.interval_seconds if result["complete"] else self.backlog_pause_seconds
+            except Exception as e:
+                # Keep sweeping through transient errors such as a locked database
+                self.last_error = f"{type(e).__name__}: {e}"
+                delay = self.interval_seconds
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "sweeps": self.sweeps,
+            "sweep_expired_removed": self.expired_removed,
+            "sweep_vacuumed_pages": self.vacuumed_pages,
+            "sweep_last_error": self.last_error
+        }
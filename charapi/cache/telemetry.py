@@ -0,0 +1,227 @@
+import os
+import re
+import threading
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+
+# Upper bounds in seconds, Prometheus-style; the last bucket is +Inf
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+RESULTS = ("hit", "negative_hit", "stale_hit", "miss")
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        buckets = []
+        running = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), self.counts):
+            running += count
+            buckets.append(("+Inf" if bound == float("inf") else repr(bound), running))
+        return buckets
+
+    def snapshot(self) -> Dict[str, Any]:
+        count = self.count
+        return {
+            "count": count,
+            "sum_seconds": self.total,
+            "mean_seconds": self.total / count if count else 0.0,
+            "buckets": dict(self.cumulative())
+        }
+
+
+class EndpointCounters:
+    def __init__(self):
+        self.results = {result: 0 for result in RESULTS}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.errors: Dict[str, int] = {}
+        self.lookup_latency = LatencyHistogram()
+        self.fetch_latency = LatencyHistogram()
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = sum(self.results.values())
+        served = lookups - self.results["miss"]
+        return {
+            **self.results,
+            "hit_ratio": served / lookups if lookups else 0.0,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "errors": dict(self.errors),
+            "lookup_latency": self.lookup_latency.snapshot(),
+            "fetch_latency": self.fetch_latency.snapshot()
+        }
+
+
+def classify_error(error: Exception) -> str:
+    """Group upstream failures into a small set of classes (http_<status>, timeout, connection, ...)."""
+    if isinstance(error, requests.HTTPError):
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+        if status is None:
+            prefix = str(error).split(" ", 1)[0]
+            status = prefix if prefix.isdigit() else None
+        return f"http_{status}" if status else "http"
+    if isinstance(error, requests.Timeout):
+        return "timeout"
+    if isinstance(error, requests.exceptions.SSLError):
+        return "ssl"
+    if isinstance(error, requests.ConnectionError):
+        return "connection"
+    if isinstance(error, ValueError):
+        return "decode"
+    return type(error).__name__
+
+
+class CacheTelemetry:
+    """
+    In-process counters for cache lookups and upstream fetches, per service and endpoint.
+
+    Clients record lookup results, fetch latency and error classes; APICache
+    records payload bytes read and written. snapshot() returns the counters as
+    nested dicts and prometheus_text() renders them in the Prometheus text
+    exposition format.
+    """
+    _shared: Optional["CacheTelemetry"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._endpoints: Dict[Tuple[str, str], EndpointCounters] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "CacheTelemetry":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def _counters(self, service: str, endpoint: str) -> EndpointCounters:
+        counters = self._endpoints.get((service, endpoint))
+        if counters is None:
+            counters = self._endpoints.setdefault((service, endpoint), EndpointCounters())
+        return counters
+
+    def record_lookup(self, service: str, endpoint: str, result: str, seconds: Optional[float] = None):
+        with self._lock:
+            counters = self._counters(service, endpoint)
+            counters.results[result] += 1
+            if seconds is not None:
+                counters.lookup_latency.observe(seconds)
+
+    def record_fetch(self, service: str, endpoint: str, seconds: float, error: Optional[Exception] = None):
+        with self._lock:
+            counters = self._counters(service, endpoint)
+            counters.fetch_latency.observe(seconds)
+            if error is not None:
+                error_class = classify_error(error)
+                counters.errors[error_class] = counters.errors.get(error_class, 0) + 1
+
+    def mean_fetch_seconds(self, service: str, endpoint: str) -> Optional[float]:
+        """Mean upstream fetch latency so far, or None before the first fetch."""
+        with self._lock:
+            counters = self._endpoints.get((service, endpoint))
+            if counters is None or not counters.fetch_latency.count:
+                return None
+            return counters.fetch_latency.total / counters.fetch_latency.count
+
+    def record_bytes(self, service: str, endpoint: str, read: int = 0, written: int = 0):
+        with self._lock:
+            counters = self._counters(service, endpoint)
+            counters.bytes_read += read
+            counters.bytes_written += written
+
+    def snapshot(self, service: Optional[str] = None) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        with self._lock:
+            result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+            for (counter_service, endpoint), counters in sorted(self._endpoints.items()):
+                if service is None or counter_service == service:
+                    result.setdefault(counter_service, {})[endpoint] = counters.snapshot()
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def prometheus_text(self) -> str:
+        lines = [
+            "# HELP charapi_cache_lookups_total Cache lookups by result.",
+            "# TYPE charapi_cache_lookups_total counter",
+        ]
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            for (service, endpoint), counters in endpoints:
+                for result, count in counters.results.items():
+                    lines.append(f'charapi_cache_lookups_total{{{_labels(service, endpoint)},result="{result}"}} {count}')
+
+            lines += [
+                "# HELP charapi_cache_bytes_total Encoded payload bytes read from and written to the cache.",
+                "# TYPE charapi_cache_bytes_total counter",
+            ]
+            for (service, endpoint), counters in endpoints:
+                labels = _labels(service, endpoint)
+                lines.append(f'charapi_cache_bytes_total{{{labels},direction="read"}} {counters.bytes_read}')
+                lines.append(f'charapi_cache_bytes_total{{{labels},direction="written"}} {counters.bytes_written}')
+
+            lines += [
+                "# HELP charapi_upstream_errors_total Failed upstream fetches by error class.",
+                "# TYPE charapi_upstream_errors_total counter",
+            ]
+            for (service, endpoint), counters in endpoints:
+                for error_class, count in sorted(counters.errors.items()):
+                    lines.append(
+                        f'charapi_upstream_errors_total{{{_labels(service, endpoint)},error="{error_class}"}} {count}'
+                    )
+
+            for name, attribute, description in (
+                ("charapi_cache_lookup_seconds", "lookup_latency", "Cache lookup latency."),
+                ("charapi_upstream_fetch_seconds", "fetch_latency", "Upstream fetch latency."),
+            ):
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+                for (service, endpoint), counters in endpoints:
+                    labels = _labels(service, endpoint)
+                    histogram = getattr(counters, attribute)
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f"{name}_sum{{{labels}}} {histogram.total}")
+                    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path):
+        """Atomically write the text dump, e.g. for node_exporter's textfile collector."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(temp_path, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(temp_path, path)
+
+
+def read_fetch_latency(path: Path) -> Dict[Tuple[str, str], float]:
+    """Mean upstream fetch seconds per (service, endpoint) from a write_prometheus() dump."""
+    pattern = re.compile(r'^charapi_upstream_fetch_seconds_(sum|count)\{service="([^"]*)",endpoint="([^"]*)"\} (\S+)$')
+    totals: Dict[Tuple[str, str], Dict[str, float]] = {}
+    for line in Path(path).read_text().splitlines():
+        match = pattern.match(line)
+        if match:
+            kind, service, endpoint, value = match.groups()
+            totals.setdefault((service, endpoint), {})[kind] = float(value)
+    return {key: values["sum"] / values["count"] for key, values in totals.items() if values.get("count") and "sum" in values}
+
+
+def _labels(service: str, endpoint: str) -> str:
+    return f'service="{service}",endpoint="{endpoint}"'
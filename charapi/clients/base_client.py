@@ -1,8 +1,16 @@
+import math
+import random
+import time
 import yaml
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any, Callable
-from ..cache.api_cache import APICache
+from typing import Optional, Dict, Any, Callable, Iterable, List, Tuple
+from ..cache.backend import create_cache, normalize_ein
+from ..cache.migration import CacheMigrator
+from ..cache.sweeper import CacheSweeper
+from ..cache.telemetry import CacheTelemetry
+from .transport import create_transport
+from .ttl_policy import FilingTTLPolicy
 
 
 class BaseAPIClient:
@@ -14,8 +22,10 @@ class BaseAPIClient:
         self.service_name = service_name
         self.service_config = self.config[service_name]
 
+        self.telemetry = CacheTelemetry.shared()
         self._initialize_mock_mode()
         self._initialize_cache()
+        self._initialize_transport()
 
     def _initialize_mock_mode(self):
         global_mock = self.config.get("mock_mode", False)
@@ -29,20 +39,43 @@ class BaseAPIClient:
     def _initialize_cache(self):
         cache_config = self.config.get("caching", {})
         self.cache_enabled = cache_config.get("enabled", False) and not self.mock_mode
+        self._prefetched: Dict[str, Dict[str, Any]] = {}
+        self.stampede: Optional[Dict[str, Any]] = None
+        self.ttl_policy: Optional[FilingTTLPolicy] = None
 
         if self.cache_enabled:
-            database_path_str = cache_config.get("database_path", "cache/charapi_cache.db")
-            database_path = self._resolve_path(database_path_str)
-
-            self.cache = APICache(
-                database_path=str(database_path),
-                default_ttl_hours=cache_config.get("default_ttl_hours", 24)
-            )
+            self.cache = create_cache(cache_config, self._resolve_path)
             self.service_ttl = cache_config.get(f"{self.service_name}_ttl_hours", 24)
+            self.ttl_policy = FilingTTLPolicy.from_config(cache_config.get("ttl_policy"))
+
+            stampede_config = cache_config.get("stampede") or {}
+            self.stampede = stampede_config if stampede_config.get("enabled", False) else None
 
-            if cache_config.get("cleanup_on_startup", False):
+            migration_config = cache_config.get("migration") or {}
+            if migration_config.get("enabled", True):
+                # Rows from older releases stay readable; this upgrades them off the request path
+                CacheMigrator.for_cache(self.cache, migration_config)
+
+            sweeper_config = cache_config.get("sweeper") or {}
+            if sweeper_config.get("enabled", False):
+                # The sweeper's first pass runs immediately, in the background
+                CacheSweeper.for_cache(self.cache, sweeper_config)
+            elif cache_config.get("cleanup_on_startup", False) and not self.cache.startup_cleanup_done:
+                # Clients share the cache, so clean up once per process rather than per client
+                self.cache.startup_cleanup_done = True
                 self.cache.cleanup_expired()
 
+    def _initialize_transport(self):
+        transport_config = dict(self.config.get("transport", {}))
+        transport_config.update(self.service_config.get("transport", {}))
+
+        cassette_path = None
+        if transport_config.get("cassette_path"):
+            cassette_path = self._resolve_path(transport_config["cassette_path"])
+
+        self.transport = create_transport(self.service_name, transport_config, cassette_path)
+        self.rate_limit: Optional[Dict[str, Any]] = transport_config.get("rate_limits", {}).get(self.service_name)
+
     def _resolve_path(self, path_str: str) -> Path:
         path = Path(path_str)
         if path.is_absolute():
@@ -60,6 +93,50 @@ class BaseAPIClient:
             current = current.parent
         return start_path.parent
 
+    def prefetch_cached(self, endpoint: str, identifiers: Iterable[str]):
+        """
+        Load cache state for many identifiers with one bulk read.
+
+        Each prefetched entry (hit or miss) answers the next get_cached_or_fetch
+        for that identifier without another SQLite round trip.
+        """
+        if not self.cache_enabled:
+            return
+        identifiers = list(identifiers)
+        hits = self.cache.get_many(self.service_name, endpoint, identifiers)
+        prefetched = self._prefetched.setdefault(endpoint, {})
+        for identifier in identifiers:
+            prefetched[identifier] = hits.get(identifier)
+
+    def cached_endpoints(self) -> Dict[str, Callable[[str], Any]]:
+        """
+        Endpoints an evaluation reads from this client for every EIN, keyed by
+        the normalized EIN, each with the function that fetches it for an EIN.
+        """
+        return {}
+
+    def upstream_requests(self, endpoints: List[str]) -> List[str]:
+        """Endpoints among those given whose fetch sends a request upstream, one each."""
+        return list(endpoints)
+
+    def warm(self, ein: str, endpoints: List[str]) -> bool:
+        """Fetch and store the given endpoints for one EIN, cached or not. Returns False if a fetch failed."""
+        fetchers = self.cached_endpoints()
+        identifier = normalize_ein(ein)
+        return all([
+            self.refresh(endpoint, identifier, lambda fetch=fetchers[endpoint]: fetch(ein)) is not None
+            for endpoint in endpoints
+        ])
+
+    def refresh(self, endpoint: str, identifier: str, fetch_function: Callable[[], Any]) -> Any:
+        """Fetch one entry and store it even if it is cached; None if the fetch failed."""
+        current = self.cache.get(self.service_name, endpoint, identifier) if self.cache_enabled else None
+        if current is None or self.is_error_entry(current):
+            return self._fetch(endpoint, identifier, fetch_function)
+        # A failed refresh keeps the cached entry rather than replacing it with an error
+        result = self._fetch(endpoint, identifier, fetch_function, stale_value=current)
+        return None if result is current else result
+
     def get_cached_or_fetch(
         self,
         endpoint: str,
@@ -70,21 +147,149 @@ class BaseAPIClient:
         if self.mock_mode and mock_function:
             return mock_function()
 
-        if self.cache_enabled:
+        if not self.cache_enabled:
+            return self._fetch(endpoint, identifier, fetch_function)
+        if self.stampede is not None:
+            return self._get_with_lease(endpoint, identifier, fetch_function)
+
+        lookup_start = time.perf_counter()
+        prefetched = self._prefetched.get(endpoint, {})
+        if identifier in prefetched:
+            cached_result = prefetched.pop(identifier)
+        else:
             cached_result = self.cache.get(self.service_name, endpoint, identifier)
-            if cached_result is not None:
-                if isinstance(cached_result, dict) and cached_result.get("_error_cache"):
+        lookup_seconds = time.perf_counter() - lookup_start
+
+        if cached_result is not None:
+            if self.is_error_entry(cached_result):
+                self.telemetry.record_lookup(self.service_name, endpoint, "negative_hit", lookup_seconds)
+                return None
+            self.telemetry.record_lookup(self.service_name, endpoint, "hit", lookup_seconds)
+            return cached_result
+        self.telemetry.record_lookup(self.service_name, endpoint, "miss", lookup_seconds)
+        return self._fetch(endpoint, identifier, fetch_function)
+
+    @staticmethod
+    def is_error_entry(cached_result: Any) -> bool:
+        return isinstance(cached_result, dict) and bool(cached_result.get("_error_cache"))
+
+    def _get_with_lease(self, endpoint: str, identifier: str, fetch_function: Callable[[], Any]) -> Any:
+        """
+        Cache lookup with stampede protection (caching.stampede).
+
+        One process at a time refreshes an entry, holding a lease in the
+        cache. Others serve the entry stale (up to stale_grace_seconds past
+        expiry) or, with nothing to serve, wait up to wait_seconds for the
+        refresher to store it. Fresh entries are refreshed early with
+        probability rising towards expiry (XFetch), using the endpoint's mean
+        fetch latency, so a cohort written together does not expire together.
+        """
+        lookup_start = time.perf_counter()
+        prefetched = self._prefetched.get(endpoint, {})
+        if prefetched.get(identifier) is not None:
+            # Bulk reads do not return expiry times, so prefetched hits are never refreshed early
+            entry = (prefetched.pop(identifier), None)
+        else:
+            prefetched.pop(identifier, None)
+            entry = self.cache.get_entry(self.service_name, endpoint, identifier, allow_stale=True)
+        lookup_seconds = time.perf_counter() - lookup_start
+
+        if entry is not None:
+            value, expires_at = entry
+            fresh = expires_at is None or expires_at > time.time()
+            if self.is_error_entry(value):
+                if fresh:
+                    self.telemetry.record_lookup(self.service_name, endpoint, "negative_hit", lookup_seconds)
                     return None
-                return cached_result
+                # A lapsed error is not worth serving stale; retry as a miss
+                entry = None
+
+        if entry is not None:
+            if fresh:
+                self.telemetry.record_lookup(self.service_name, endpoint, "hit", lookup_seconds)
+                if not self._refresh_early(endpoint, expires_at) or not self._acquire_lease(endpoint, identifier):
+                    return value
+                return self._fetch_under_lease(endpoint, identifier, fetch_function, value)
+            if not self._acquire_lease(endpoint, identifier):
+                self.telemetry.record_lookup(self.service_name, endpoint, "stale_hit", lookup_seconds)
+                return value
+            self.telemetry.record_lookup(self.service_name, endpoint, "miss", lookup_seconds)
+            return self._fetch_under_lease(endpoint, identifier, fetch_function, value)
+
+        self.telemetry.record_lookup(self.service_name, endpoint, "miss", lookup_seconds)
+        if self._acquire_lease(endpoint, identifier):
+            return self._fetch_under_lease(endpoint, identifier, fetch_function, None)
+
+        deadline = time.monotonic() + self.stampede.get("wait_seconds", 5)
+        while time.monotonic() < deadline:
+            time.sleep(self.stampede.get("poll_seconds", 0.05))
+            value = self.cache.get(self.service_name, endpoint, identifier)
+            if value is not None:
+                return None if self.is_error_entry(value) else value
+            if self._acquire_lease(endpoint, identifier):
+                value = self.cache.get(self.service_name, endpoint, identifier)
+                if value is not None:
+                    # Stored just before the lease was released
+                    self.cache.release_lease(self.service_name, endpoint, identifier)
+                    return None if self.is_error_entry(value) else value
+                # The refresher gave up without storing anything
+                return self._fetch_under_lease(endpoint, identifier, fetch_function, None)
+        return self._fetch(endpoint, identifier, fetch_function)
+
+    def _acquire_lease(self, endpoint: str, identifier: str) -> bool:
+        return self.cache.acquire_lease(
+            self.service_name, endpoint, identifier, ttl_seconds=self.stampede.get("lease_seconds", 30)
+        )
+
+    def _refresh_early(self, endpoint: str, expires_at: Optional[float]) -> bool:
+        beta = self.stampede.get("early_refresh_beta", 1.0)
+        if expires_at is None or beta <= 0:
+            return False
+        delta = self.telemetry.mean_fetch_seconds(self.service_name, endpoint) or 1.0
+        return time.time() - delta * beta * math.log(1.0 - random.random()) >= expires_at
+
+    def _fetch_under_lease(self, endpoint: str, identifier: str, fetch_function: Callable[[], Any],
+                           stale_value: Any) -> Any:
+        try:
+            return self._fetch(endpoint, identifier, fetch_function, stale_value)
+        finally:
+            self.cache.release_lease(self.service_name, endpoint, identifier)
+
+    def filing_cadence(self, endpoint: str, payload: Any) -> Tuple[Optional[Tuple[int, int]], Optional[int]]:
+        """
+        Return (latest tax period as (year, month), acct_pd) found in a fetched
+        payload, for caching.ttl_policy. Clients override this for endpoints
+        whose payloads carry filing data; (None, None) keeps the flat TTL.
+        """
+        return None, None
+
+    def ttl_hours_for(self, endpoint: str, payload: Any) -> float:
+        """TTL policy hook: hours to cache one fetched payload."""
+        if self.ttl_policy is None:
+            return self.service_ttl
+        tax_period, acct_pd = self.filing_cadence(endpoint, payload)
+        return self.ttl_policy.ttl_hours(tax_period, acct_pd, self.service_ttl)
+
+    def _entry_ttl_hours(self, endpoint: str, payload: Any) -> float:
+        jitter = self.stampede.get("ttl_jitter", 0.1) if self.stampede is not None else 0
+        # Only shorten TTLs, so jitter never serves data older than configured
+        return self.ttl_hours_for(endpoint, payload) * (1 - jitter * random.random())
 
+    def _fetch(self, endpoint: str, identifier: str, fetch_function: Callable[[], Any], stale_value: Any = None) -> Any:
+        fetch_start = time.perf_counter()
         try:
             result = fetch_function()
+            self.telemetry.record_fetch(self.service_name, endpoint, time.perf_counter() - fetch_start)
 
             if self.cache_enabled:
-                self.cache.set(self.service_name, endpoint, identifier, result, self.service_ttl)
+                self.cache.set(self.service_name, endpoint, identifier, result, self._entry_ttl_hours(endpoint, result))
 
             return result
         except Exception as e:
+            self.telemetry.record_fetch(self.service_name, endpoint, time.perf_counter() - fetch_start, error=e)
+            if stale_value is not None:
+                # Keep serving the stale entry rather than replacing it with an error
+                return stale_value
             if self.cache_enabled:
                 error_cache_entry = {
                     "_error_cache": True,
@@ -111,10 +316,12 @@ class BaseAPIClient:
             return error_msg
 
     def get_cache_stats(self) -> Dict[str, Any]:
+        telemetry = self.telemetry.snapshot(self.service_name).get(self.service_name, {})
         if self.cache_enabled:
-            return self.cache.get_stats()
-        return {"cache_enabled": False}
+            return {**self.cache.get_stats(), "telemetry": telemetry}
+        return {"cache_enabled": False, "telemetry": telemetry}
 
     def clear_cache(self):
         if self.cache_enabled:
+            self._prefetched = {}
             self.cache.clear_all()
\ No newline at end of file
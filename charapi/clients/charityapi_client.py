@@ -1,15 +1,27 @@
-import requests
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, List, Tuple
 from .base_client import BaseAPIClient
+from .ttl_policy import parse_tax_period
+from ..irs.bmf_store import BMFStore
 
 
 class CharityAPIClient(BaseAPIClient):
     def __init__(self, config_path: str):
         super().__init__(config_path, "charityapi")
         self.base_url = self.service_config["base_url"]
-        self.api_key = self.service_config["api_key"]
+        self.api_key = self.service_config.get("api_key")
         self.timeout = self.service_config.get("timeout", 30)
+        self._initialize_backend()
+
+    def _initialize_backend(self):
+        self.backend = self.service_config.get("backend", "api")
+        self.bmf_store = None
+
+        if self.backend == "bmf" and not self.mock_mode:
+            local_data_dir = self.config.get("irs", {}).get("local_data_dir", "cache")
+            self.bmf_store = BMFStore.open(self._resolve_path(local_data_dir) / BMFStore.FILENAME)
+        elif self.backend not in ("api", "bmf"):
+            raise ValueError(f"Unknown charityapi backend '{self.backend}'")
 
     def _normalize_ein(self, ein: str) -> str:
         return ein.replace("-", "")
@@ -17,6 +29,9 @@ class CharityAPIClient(BaseAPIClient):
     def get_organization(self, ein: str):
         normalized_ein = self._normalize_ein(ein)
 
+        if self.bmf_store is not None:
+            return self.bmf_store.get_organization(normalized_ein)
+
         return self.get_cached_or_fetch(
             endpoint="organizations",
             identifier=normalized_ein,
@@ -24,11 +39,24 @@ class CharityAPIClient(BaseAPIClient):
             mock_function=lambda: self._get_mock_data(ein)
         )
 
+    def prefetch(self, eins: List[str]):
+        if self.bmf_store is None:
+            self.prefetch_cached("organizations", [self._normalize_ein(ein) for ein in eins])
+
+    def cached_endpoints(self) -> Dict[str, Callable[[str], Any]]:
+        return {} if self.bmf_store is not None else {"organizations": self._fetch_organization}
+
+    def filing_cadence(self, endpoint: str, payload: Any) -> Tuple[Optional[Tuple[int, int]], Optional[int]]:
+        if endpoint != "organizations" or not isinstance(payload, dict):
+            return None, None
+        acct_pd = payload.get("acct_pd")
+        return parse_tax_period(payload.get("tax_period")), acct_pd if isinstance(acct_pd, int) else None
+
     def _fetch_organization(self, ein: str):
         url = f"{self.base_url}/organizations/{ein}"
         headers = {"apikey": self.api_key}
 
-        response = requests.get(url, headers=headers, timeout=self.timeout)
+        response = self.transport.get(url, headers=headers, timeout=self.timeout)
         response.raise_for_status()
 
         json_response = response.json()
@@ -24,6 +24,7 @@ class ManualDataClient:
             self.manual_dir = manual_dir_path
 
         self.filename = config.get("manual_data", {}).get("filename", "manual_data.yaml")
+        self.extracted_filename = config.get("manual_data", {}).get("extracted_filename", "extracted_expenses.yaml")
 
         if ManualDataClient._global_data is None:
             self._load_data()
@@ -37,11 +38,13 @@ class ManualDataClient:
         return start_path.parent
 
     def _load_data(self):
-        yaml_path = self.manual_dir / self.filename
+        extracted_data = self._load_yaml(self.manual_dir / self.extracted_filename)
+        user_data = self._load_yaml(self.manual_dir / self.filename)
+        ManualDataClient._global_data = self._merge(extracted_data, user_data)
 
+    def _load_yaml(self, yaml_path: Path) -> dict:
         if not yaml_path.exists():
-            ManualDataClient._global_data = {}
-            return
+            return {}
 
         with open(yaml_path, "r") as f:
             raw_data = yaml.safe_load(f) or {}
@@ -56,7 +59,23 @@ class ManualDataClient:
             else:
                 normalized_data[key] = value
 
-        ManualDataClient._global_data = normalized_data
+        return normalized_data
+
+    def _merge(self, extracted: dict, user: dict) -> dict:
+        # User-entered values win, except the 0/empty placeholders the manual
+        # files use for data nobody has filled in yet
+        merged = dict(extracted)
+        for key, value in user.items():
+            if isinstance(value, dict) and isinstance(merged.get(key), dict):
+                merged[key] = self._merge(merged[key], value)
+            elif self._is_placeholder(value) and not self._is_placeholder(merged.get(key)):
+                continue
+            else:
+                merged[key] = value
+        return merged
+
+    def _is_placeholder(self, value) -> bool:
+        return value is None or (type(value) is int and value == 0)
 
     def get_data(self, ein: str) -> dict:
         normalized_ein = ein.replace("-", "")
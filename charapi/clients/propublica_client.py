@@ -1,6 +1,7 @@
-import requests
-from typing import List, Dict
+from typing import Any, Callable, List, Dict, Optional, Tuple
 from .base_client import BaseAPIClient
+from .ttl_policy import latest_tax_period
+from ..irs.soi_store import SOI_DIRNAME, SOIFilingsStore
 from ..data.mock_data import MOCK_ORGANIZATION_DATA, MOCK_SEARCH_RESULTS
 
 
@@ -9,6 +10,17 @@ class ProPublicaClient(BaseAPIClient):
         super().__init__(config_path, "propublica")
         self.base_url = self.service_config["base_url"]
         self.timeout = self.service_config["timeout"]
+        self._initialize_filings_backend()
+
+    def _initialize_filings_backend(self):
+        self.filings_backend = self.service_config.get("filings_backend", "api")
+        self.soi_store = None
+
+        if self.filings_backend == "soi" and not self.mock_mode:
+            local_data_dir = self.config.get("irs", {}).get("local_data_dir", "cache")
+            self.soi_store = SOIFilingsStore.open(self._resolve_path(local_data_dir) / SOI_DIRNAME)
+        elif self.filings_backend not in ("api", "soi"):
+            raise ValueError(f"Unknown propublica filings_backend '{self.filings_backend}'")
 
     def _normalize_ein(self, ein: str) -> str:
         return ein.replace("-", "")
@@ -16,7 +28,7 @@ class ProPublicaClient(BaseAPIClient):
     def search_organizations(self, query: str) -> List[Dict]:
         def fetch():
             url = f"{self.base_url}/search.json"
-            response = requests.get(url, params={"q": query}, timeout=self.timeout)
+            response = self.transport.get(url, params={"q": query}, timeout=self.timeout)
             response.raise_for_status()
             return response.json().get("organizations", [])
 
@@ -30,32 +42,69 @@ class ProPublicaClient(BaseAPIClient):
     def get_organization(self, ein: str) -> Dict:
         normalized_ein = self._normalize_ein(ein)
 
-        def fetch():
-            url = f"{self.base_url}/organizations/{ein}.json"
-            response = requests.get(url, timeout=self.timeout)
-            response.raise_for_status()
-            return response.json()
-
         return self.get_cached_or_fetch(
             "organization",
             normalized_ein,
-            fetch,
+            lambda: self._fetch_organization(ein),
             lambda: self._mock_organization(ein)
         )
+
+    def _fetch_organization(self, ein: str) -> Dict:
+        url = f"{self.base_url}/organizations/{ein}.json"
+        response = self.transport.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
     
     def get_all_filings(self, ein: str) -> List[Dict]:
         normalized_ein = self._normalize_ein(ein)
 
-        def fetch():
-            return self.get_organization(ein).get("filings_with_data", [])
+        if self.soi_store is not None:
+            return self.soi_store.get_filings(normalized_ein)
 
         return self.get_cached_or_fetch(
             "filings",
             normalized_ein,
-            fetch,
+            lambda: self._fetch_filings(ein),
             lambda: self._mock_filings(ein)
         )
 
+    def prefetch(self, eins: List[str]):
+        normalized_eins = [self._normalize_ein(ein) for ein in eins]
+        self.prefetch_cached("organization", normalized_eins)
+        if self.soi_store is None:
+            self.prefetch_cached("filings", normalized_eins)
+
+    def _fetch_filings(self, ein: str) -> List[Dict]:
+        # Read from the organization payload, which is cached or fetched first
+        return self.get_organization(ein).get("filings_with_data", [])
+
+    def cached_endpoints(self) -> Dict[str, Callable[[str], Any]]:
+        endpoints = {"organization": self._fetch_organization}
+        if self.soi_store is None:
+            endpoints["filings"] = self._fetch_filings
+        return endpoints
+
+    def upstream_requests(self, endpoints: List[str]) -> List[str]:
+        # Filings are read from the organization payload, which is cached or fetched alongside
+        return ["organization"] if "organization" in endpoints else []
+
+    def filing_cadence(self, endpoint: str, payload: Any) -> Tuple[Optional[Tuple[int, int]], Optional[int]]:
+        if endpoint == "organization" and isinstance(payload, dict):
+            filings = payload.get("filings_with_data") or []
+            organization = payload.get("organization") or {}
+            periods = [organization.get("tax_period")] + [self._filing_period(filing) for filing in filings]
+            return latest_tax_period(periods), None
+        if endpoint == "filings" and isinstance(payload, list):
+            return latest_tax_period(self._filing_period(filing) for filing in payload), None
+        return None, None
+
+    @staticmethod
+    def _filing_period(filing: Dict) -> Any:
+        if filing.get("tax_prd"):
+            return filing["tax_prd"]
+        # Only the year: December is the earliest the period can end, so the TTL errs short
+        return f"{filing['tax_prd_yr']}12" if filing.get("tax_prd_yr") else None
+
     def _mock_search(self, query: str) -> List[Dict]:
         query_lower = query.lower()
         for search_term, results in MOCK_SEARCH_RESULTS.items():
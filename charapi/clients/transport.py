@@ -0,0 +1,376 @@
+import gzip
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+
+@dataclass
+class TransportResponse:
+    url: str
+    status_code: int
+    text: str
+    elapsed_seconds: float
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            reason = "Client Error" if self.status_code < 500 else "Server Error"
+            raise requests.HTTPError(f"{self.status_code} {reason} for url: {self.url}")
+
+
+class CassetteMiss(Exception):
+    pass
+
+
+class HTTPTransport:
+    def get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+            timeout: Optional[float] = None) -> TransportResponse:
+        start = time.perf_counter()
+        response = requests.get(url, params=params, headers=headers, timeout=timeout)
+        elapsed = time.perf_counter() - start
+        return TransportResponse(
+            url=url,
+            status_code=response.status_code,
+            text=response.text,
+            elapsed_seconds=elapsed
+        )
+
+
+class Cassette:
+    """
+    Gzip-compressed JSON-lines file of recorded upstream interactions.
+
+    Each interaction is appended as its own gzip member, so a recording can be
+    interrupted at any point and still be read back. Request headers are never
+    stored because they carry API keys.
+    """
+    _loaded: Dict[str, "Cassette"] = {}
+    _loaded_lock = threading.Lock()
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._interactions: Dict[Tuple, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[Tuple, int] = {}
+
+    @classmethod
+    def open(cls, path: Path) -> "Cassette":
+        key = str(path.resolve())
+        with cls._loaded_lock:
+            if key not in cls._loaded:
+                cassette = cls(path)
+                cassette._load()
+                cls._loaded[key] = cassette
+            return cls._loaded[key]
+
+    @staticmethod
+    def request_key(service: str, url: str, params: Optional[Dict]) -> Tuple:
+        sorted_params = tuple(sorted((params or {}).items()))
+        return (service, "GET", url, sorted_params)
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                interaction = json.loads(line)
+                key = self.request_key(interaction["service"], interaction["url"], interaction["params"])
+                self._interactions.setdefault(key, []).append(interaction)
+
+    def append(self, interaction: Dict[str, Any]):
+        line = json.dumps(interaction, separators=(",", ":")) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(line)
+            key = self.request_key(interaction["service"], interaction["url"], interaction["params"])
+            self._interactions.setdefault(key, []).append(interaction)
+
+    def next_interaction(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            recorded = self._interactions.get(key)
+            if not recorded:
+                return None
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            return recorded[min(cursor, len(recorded) - 1)]
+
+    def rewind(self):
+        with self._lock:
+            self._cursors = {}
+
+    @classmethod
+    def rewind_all(cls):
+        with cls._loaded_lock:
+            for cassette in cls._loaded.values():
+                cassette.rewind()
+
+    def __len__(self) -> int:
+        return sum(len(recorded) for recorded in self._interactions.values())
+
+
+class RecordingTransport:
+    def __init__(self, service: str, cassette: Cassette, inner: HTTPTransport):
+        self.service = service
+        self.cassette = cassette
+        self.inner = inner
+
+    def get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+            timeout: Optional[float] = None) -> TransportResponse:
+        response = self.inner.get(url, params=params, headers=headers, timeout=timeout)
+        self.cassette.append({
+            "service": self.service,
+            "url": url,
+            "params": params or {},
+            "status": response.status_code,
+            "elapsed": round(response.elapsed_seconds, 6),
+            "body": response.text
+        })
+        return response
+
+
+class ReplayTransport:
+    """
+    Serves recorded interactions back in recording order.
+
+    Repeated identical requests walk through the recorded responses for that
+    request and then keep returning the last one. Latency is the recorded
+    elapsed time multiplied by latency_scale (0 replays instantly).
+    """
+
+    def __init__(self, service: str, cassette: Cassette, latency_scale: float):
+        self.service = service
+        self.cassette = cassette
+        self.latency_scale = latency_scale
+
+    def get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+            timeout: Optional[float] = None) -> TransportResponse:
+        key = Cassette.request_key(self.service, url, params)
+        interaction = self.cassette.next_interaction(key)
+        if interaction is None:
+            raise CassetteMiss(f"No recorded {self.service} response for {url} {params or ''}".rstrip())
+
+        delay = interaction["elapsed"] * self.latency_scale
+        if delay > 0:
+            time.sleep(delay)
+
+        return TransportResponse(
+            url=url,
+            status_code=interaction["status"],
+            text=interaction["body"],
+            elapsed_seconds=delay
+        )
+
+
+class FaultInjector:
+    """
+    Decides which requests to a service fail, according to a fault profile.
+
+    Profile keys (all optional):
+        error_rate       probability that a request starts a fault burst
+        errors           error kinds to pick from: timeout, connection, http_<status>
+        burst_length     consecutive requests that fail once a burst starts
+        timeout_seconds  time spent before an injected timeout is raised
+        slow_rate        probability that a request is delayed by slow_seconds
+        slow_seconds     added latency for slow responses
+        truncate_rate    probability that a response body is cut in half
+        seed             random seed, so a profile injects the same faults every run
+
+    Injectors are shared per service and profile within a process, so the fault
+    sequence carries on across the short-lived clients evaluate_charity creates.
+    """
+    ERROR_KINDS = ("timeout", "connection")
+
+    _shared: Dict[Tuple[str, str], "FaultInjector"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, service: str, profile: dict):
+        self.service = service
+        self.error_rate = profile.get("error_rate", 0.0)
+        self.errors = profile.get("errors", ["timeout"])
+        self.burst_length = profile.get("burst_length", 1)
+        self.timeout_seconds = profile.get("timeout_seconds", 0.0)
+        self.slow_rate = profile.get("slow_rate", 0.0)
+        self.slow_seconds = profile.get("slow_seconds", 0.0)
+        self.truncate_rate = profile.get("truncate_rate", 0.0)
+        self.random = random.Random(profile.get("seed"))
+
+        # Status codes of the http_<status> kinds, parsed up front so a typo fails here rather than mid-run
+        self.http_statuses: Dict[str, int] = {}
+        for kind in self.errors:
+            if kind in self.ERROR_KINDS:
+                continue
+            match = re.fullmatch(r"http_(\d{3})", kind)
+            if match is None:
+                raise ValueError(f"Unknown fault kind '{kind}' for service {service}; "
+                                 f"expected {', '.join(self.ERROR_KINDS)} or http_<3-digit status>")
+            self.http_statuses[kind] = int(match.group(1))
+
+        self._lock = threading.Lock()
+        self._burst_remaining = 0
+        self._burst_kind = None
+        self.requests = 0
+        self.injected: Dict[str, int] = {}
+
+    @classmethod
+    def for_profile(cls, service: str, profile: dict) -> "FaultInjector":
+        key = (service, json.dumps(profile, sort_keys=True))
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(service, profile)
+            return cls._shared[key]
+
+    @classmethod
+    def all_injectors(cls) -> List["FaultInjector"]:
+        with cls._shared_lock:
+            return list(cls._shared.values())
+
+    @classmethod
+    def reset_all(cls):
+        with cls._shared_lock:
+            cls._shared = {}
+
+    def _count(self, kind: str):
+        self.injected[kind] = self.injected.get(kind, 0) + 1
+
+    def roll(self) -> Tuple[Optional[str], bool, bool]:
+        with self._lock:
+            self.requests += 1
+            if self._burst_remaining == 0 and self.random.random() < self.error_rate:
+                self._burst_remaining = self.burst_length
+                self._burst_kind = self.random.choice(self.errors)
+
+            error_kind = None
+            if self._burst_remaining > 0:
+                self._burst_remaining -= 1
+                error_kind = self._burst_kind
+                self._count(error_kind)
+
+            slow = self.random.random() < self.slow_rate
+            truncate = error_kind is None and self.random.random() < self.truncate_rate
+            if slow:
+                self._count("slow")
+            if truncate:
+                self._count("truncated")
+            return error_kind, slow, truncate
+
+
+class FaultInjectingTransport:
+    def __init__(self, inner, injector: FaultInjector):
+        self.inner = inner
+        self.injector = injector
+
+    def get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+            timeout: Optional[float] = None) -> TransportResponse:
+        error_kind, slow, truncate = self.injector.roll()
+
+        if slow:
+            time.sleep(self.injector.slow_seconds)
+
+        if error_kind == "timeout":
+            time.sleep(self.injector.timeout_seconds)
+            raise requests.Timeout(f"Injected timeout for {url}")
+        elif error_kind == "connection":
+            raise requests.ConnectionError(f"Injected connection error for {url}")
+        elif error_kind is not None:
+            status_code = self.injector.http_statuses[error_kind]
+            return TransportResponse(url=url, status_code=status_code, text="", elapsed_seconds=0.0)
+
+        response = self.inner.get(url, params=params, headers=headers, timeout=timeout)
+        if truncate:
+            response.text = response.text[:len(response.text) // 2]
+        return response
+
+
+class RateLimiter:
+    """
+    Token bucket that spaces out requests to one service (transport.rate_limits).
+
+    Allows requests_per_second on average and bursts of up to burst requests.
+    Limiters are shared per service within a process, so every client and
+    thread calling the service draws from the same budget.
+    """
+
+    _shared: Dict[Tuple[str, str], "RateLimiter"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, requests_per_second: float, burst: int = 1):
+        if requests_per_second <= 0:
+            raise ValueError("requests_per_second must be positive")
+        self.requests_per_second = requests_per_second
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited_seconds = 0.0
+
+    @classmethod
+    def for_service(cls, service: str, limit: dict) -> "RateLimiter":
+        key = (service, json.dumps(limit, sort_keys=True))
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(limit["requests_per_second"], limit.get("burst", 1))
+            return cls._shared[key]
+
+    @classmethod
+    def reset_all(cls):
+        with cls._shared_lock:
+            cls._shared = {}
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.requests_per_second)
+            self._updated = now
+            # Take the token now, even if it is owed, so waiting threads queue up in order
+            self._tokens -= 1
+            wait = -self._tokens / self.requests_per_second if self._tokens < 0 else 0.0
+            self.waited_seconds += wait
+        if wait > 0:
+            time.sleep(wait)
+
+
+class RateLimitedTransport:
+    def __init__(self, inner, limiter: RateLimiter):
+        self.inner = inner
+        self.limiter = limiter
+
+    def get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+            timeout: Optional[float] = None) -> TransportResponse:
+        self.limiter.acquire()
+        return self.inner.get(url, params=params, headers=headers, timeout=timeout)
+
+
+def create_transport(service: str, transport_config: dict, cassette_path: Optional[Path]):
+    mode = transport_config.get("mode", "live")
+
+    if mode == "live":
+        transport = HTTPTransport()
+    elif mode == "record":
+        transport = RecordingTransport(service, Cassette.open(cassette_path), HTTPTransport())
+    elif mode == "replay":
+        latency_scale = transport_config.get("latency_scale", 1.0)
+        transport = ReplayTransport(service, Cassette.open(cassette_path), latency_scale)
+    else:
+        raise ValueError(f"Unknown transport mode '{mode}' for service {service}")
+
+    fault_profile = transport_config.get("faults", {}).get(service)
+    if fault_profile:
+        transport = FaultInjectingTransport(transport, FaultInjector.for_profile(service, fault_profile))
+
+    rate_limit = transport_config.get("rate_limits", {}).get(service)
+    if rate_limit:
+        transport = RateLimitedTransport(transport, RateLimiter.for_service(service, rate_limit))
+    return transport
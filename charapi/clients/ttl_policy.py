@@ -0,0 +1,81 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+def parse_tax_period(value: Any) -> Optional[Tuple[int, int]]:
+    """Return (year, month) for a tax period given as 202306, "202306" or "2023-06-30", or None."""
+    if value is None or isinstance(value, bool):
+        return None
+    digits = str(value).replace("-", "")[:6]
+    if len(digits) != 6 or not digits.isdigit():
+        return None
+    year, month = int(digits[:4]), int(digits[4:])
+    return (year, month) if 1 <= month <= 12 else None
+
+
+def latest_tax_period(values: Iterable[Any]) -> Optional[Tuple[int, int]]:
+    periods = [period for period in map(parse_tax_period, values) if period is not None]
+    return max(periods) if periods else None
+
+
+def add_months(year: int, month: int, months: int) -> Tuple[int, int]:
+    index = year * 12 + (month - 1) + months
+    return index // 12, index % 12 + 1
+
+
+class FilingTTLPolicy:
+    """
+    Per-entry TTLs from an organization's filing cadence (caching.ttl_policy).
+
+    An annual return covers a fiscal year and is due filing_lag_months after
+    it ends, so a payload whose latest filing is for the year ending 2023-06
+    cannot change until the return for 2024-06 is due, late in 2024. Entries
+    are cached until that date, clamped to [min_ttl_hours, max_ttl_hours].
+    Once the next filing is due the floor applies, so overdue organizations
+    are rechecked often. Without a tax period, acct_pd (the month the fiscal
+    year ends) gives the next due date on its own.
+    """
+
+    def __init__(self, filing_lag_months: int = 5, min_ttl_hours: float = 24, max_ttl_hours: float = 720):
+        if min_ttl_hours > max_ttl_hours:
+            raise ValueError("min_ttl_hours must not exceed max_ttl_hours")
+        self.filing_lag_months = filing_lag_months
+        self.min_ttl_hours = min_ttl_hours
+        self.max_ttl_hours = max_ttl_hours
+
+    @classmethod
+    def from_config(cls, policy_config: Optional[Dict[str, Any]]) -> Optional["FilingTTLPolicy"]:
+        if not policy_config or not policy_config.get("enabled", False):
+            return None
+        return cls(
+            filing_lag_months=policy_config.get("filing_lag_months", 5),
+            min_ttl_hours=policy_config.get("min_ttl_hours", 24),
+            max_ttl_hours=policy_config.get("max_ttl_hours", 720)
+        )
+
+    def next_filing_due(self, tax_period: Optional[Tuple[int, int]] = None, acct_pd: Optional[int] = None,
+                        now: Optional[datetime] = None) -> Optional[datetime]:
+        """Return when the next annual return is expected, or None without a tax period or acct_pd."""
+        now = now or datetime.now()
+        if tax_period is not None:
+            # The return after tax_period covers the fiscal year ending twelve months later
+            year, month = add_months(*tax_period, 12 + self.filing_lag_months)
+            return datetime(year, month, 15)
+        if acct_pd is None or not 1 <= acct_pd <= 12:
+            return None
+        # The first due date still ahead, for fiscal years ending in month acct_pd
+        year, month = add_months(now.year - 1, acct_pd, self.filing_lag_months)
+        due = datetime(year, month, 15)
+        while due <= now:
+            due = due.replace(year=due.year + 1)
+        return due
+
+    def ttl_hours(self, tax_period: Optional[Tuple[int, int]], acct_pd: Optional[int], default_hours: float,
+                  now: Optional[datetime] = None) -> float:
+        """TTL for one payload; default_hours when the payload has no filing cadence."""
+        now = now or datetime.now()
+        due = self.next_filing_due(tax_period, acct_pd, now)
+        if due is None:
+            return default_hours
+        hours = (due - now).total_seconds() / 3600
+        return min(self.max_ttl_hours, max(self.min_ttl_hours, hours))
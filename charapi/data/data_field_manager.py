@@ -2,6 +2,10 @@ from datetime import datetime
 from typing import Optional, Dict, Any
 from ..clients.manual_data_client import ManualDataClient
 from ..data.charity_evaluation_result import Ident
+from ..irs.efile_store import EFILE_FILENAME, EXPENSE_COLUMNS, EfileExpenseStore
+from ..irs.ein_index import EINIndex
+from ..irs.exempt_lists import PUB78_INDEX_FILENAME, REVOKED_INDEX_FILENAME
+from ..irs.local_data import resolve_local_data_dir
 
 
 class DataFieldManager:
@@ -26,6 +30,10 @@ class DataFieldManager:
             return self._get_from_manual(field_config, field_name_str, ein)
         elif source == "charityapi":
             return self._get_from_charityapi(field_config, field_name_str)
+        elif source == "efile":
+            return self._get_from_efile(field_config, field_name_str, ein)
+        elif source == "irs":
+            return self._get_from_irs(field_name_str, ein)
         elif source == "propublicaapi":
             raise NotImplementedError(f"ProPublica API source for {field_name_str} must be handled by caller")
         else:
@@ -62,6 +70,27 @@ class DataFieldManager:
         else:
             return self.charityapi_data.get(charityapi_field)
 
+    def _get_from_efile(self, field_config: dict, field_name_str: str, ein: str):
+        efile_field = field_config.get("field", field_name_str)
+        if efile_field not in ["tax_period"] + EXPENSE_COLUMNS:
+            raise ValueError(f"E-file source does not provide field {efile_field}")
+
+        store = EfileExpenseStore.open(resolve_local_data_dir(self.config) / EFILE_FILENAME)
+        expenses = store.get_latest_expenses(ein)
+        if not expenses:
+            return None
+        return expenses.get(efile_field)
+
+    def _get_from_irs(self, field_name_str: str, ein: str):
+        local_data_dir = resolve_local_data_dir(self.config)
+
+        if field_name_str == "in_pub78":
+            return ein in EINIndex.open(local_data_dir / PUB78_INDEX_FILENAME)
+        elif field_name_str == "is_revoked":
+            return ein in EINIndex.open(local_data_dir / REVOKED_INDEX_FILENAME)
+        else:
+            raise ValueError(f"IRS list source does not provide field {field_name_str}")
+
     def _check_recent_filing(self, charityapi_data: dict) -> bool:
         tax_period = charityapi_data.get("tax_period")
         if not tax_period:
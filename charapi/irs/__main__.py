@@ -0,0 +1,124 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+from .bmf_store import BMFStore, ingest_bmf
+from .efile_store import EFILE_FILENAME, ingest_efiles
+from .exempt_lists import ingest_pub78, ingest_revocations
+from .form990_pdf import PDF_CACHE_DIRNAME, extract_pdfs, write_extracted_yaml
+from .soi_store import SOI_DIRNAME, ingest_soi
+from .local_data import find_project_root, resolve_local_data_dir
+
+
+def load_config(config_path: str) -> dict:
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+    config["_config_file_path"] = config_path
+    return config
+
+
+def ingest_bmf_command(args):
+    database_path = resolve_local_data_dir(load_config(args.config)) / BMFStore.FILENAME
+    start = time.perf_counter()
+    count = ingest_bmf([Path(p) for p in args.files], database_path)
+    print(f"Ingested {count:,} EO BMF records into {database_path} in {time.perf_counter() - start:.1f}s")
+
+
+def ingest_pub78_command(args):
+    local_data_dir = resolve_local_data_dir(load_config(args.config))
+    start = time.perf_counter()
+    count = ingest_pub78([Path(p) for p in args.files], local_data_dir)
+    print(f"Indexed {count:,} Publication 78 EINs in {local_data_dir} in {time.perf_counter() - start:.1f}s")
+
+
+def ingest_revocations_command(args):
+    local_data_dir = resolve_local_data_dir(load_config(args.config))
+    start = time.perf_counter()
+    count = ingest_revocations([Path(p) for p in args.files], local_data_dir)
+    print(f"Indexed {count:,} revoked EINs in {local_data_dir} in {time.perf_counter() - start:.1f}s")
+
+
+def ingest_efiles_command(args):
+    database_path = resolve_local_data_dir(load_config(args.config)) / EFILE_FILENAME
+    start = time.perf_counter()
+    count = ingest_efiles([Path(p) for p in args.paths], database_path, workers=args.workers)
+    print(f"Ingested {count:,} Form 990 expense records into {database_path} in {time.perf_counter() - start:.1f}s")
+
+
+def ingest_soi_command(args):
+    store_dir = resolve_local_data_dir(load_config(args.config)) / SOI_DIRNAME
+    start = time.perf_counter()
+    count = ingest_soi([Path(p) for p in args.files], store_dir)
+    print(f"Ingested {count:,} SOI filings into {store_dir} in {time.perf_counter() - start:.1f}s")
+
+
+def extract_pdfs_command(args):
+    config = load_config(args.config)
+    manual_config = config.get("manual_data", {})
+    manual_dir = Path(manual_config.get("directory", "manual"))
+    if not manual_dir.is_absolute():
+        manual_dir = find_project_root(Path(args.config).resolve()) / manual_dir
+
+    pdf_dir = Path(args.directory) if args.directory else manual_dir / "irs990"
+    output_path = manual_dir / manual_config.get("extracted_filename", "extracted_expenses.yaml")
+    cache_dir = resolve_local_data_dir(config) / PDF_CACHE_DIRNAME
+
+    start = time.perf_counter()
+    results = extract_pdfs(sorted(pdf_dir.glob("*.pdf")), cache_dir, workers=args.workers)
+    written = write_extracted_yaml(results, output_path)
+
+    for result in results:
+        source = "cached" if result["cached"] else "parsed"
+        print(f"  {result['file']:50s} {result['status']:10s} ({source})")
+    print(f"Wrote {written} fiscal years to {output_path} from {len(results)} PDFs "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m charapi.irs", description="Build local IRS data stores")
+    parser.add_argument("--config", default="charapi/config/config.yaml", help="Config file with irs.local_data_dir")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    bmf_parser = subparsers.add_parser("bmf", help="Ingest EO BMF extract CSVs (eo1.csv ... eo4.csv, eo_xx.csv)")
+    bmf_parser.add_argument("files", nargs="+")
+    bmf_parser.set_defaults(handler=ingest_bmf_command)
+
+    pub78_parser = subparsers.add_parser("pub78", help="Index the Publication 78 data file (data-download-pub78.txt)")
+    pub78_parser.add_argument("files", nargs="+")
+    pub78_parser.set_defaults(handler=ingest_pub78_command)
+
+    revocations_parser = subparsers.add_parser(
+        "revocations", help="Index the automatic revocation list (data-download-revocation.txt)"
+    )
+    revocations_parser.add_argument("files", nargs="+")
+    revocations_parser.set_defaults(handler=ingest_revocations_command)
+
+    efile_parser = subparsers.add_parser(
+        "efile", help="Ingest Form 990 e-file XML (files, zip archives or directories) for Part IX expenses"
+    )
+    efile_parser.add_argument("paths", nargs="+")
+    efile_parser.add_argument("--workers", type=int, help="Parser processes (default: CPU count)")
+    efile_parser.set_defaults(handler=ingest_efiles_command)
+
+    soi_parser = subparsers.add_parser(
+        "soi", help="Ingest IRS SOI annual 990 extracts (e.g. 22eoextract990.csv/.dat/.xlsx) as a filings store"
+    )
+    soi_parser.add_argument("files", nargs="+")
+    soi_parser.set_defaults(handler=ingest_soi_command)
+
+    pdf_parser = subparsers.add_parser(
+        "pdf", help="Extract Part IX expenses from Form 990 PDFs into the manual data directory"
+    )
+    pdf_parser.add_argument("directory", nargs="?", help="PDF directory (default: <manual_data.directory>/irs990)")
+    pdf_parser.add_argument("--workers", type=int, help="Parser processes (default: CPU count)")
+    pdf_parser.set_defaults(handler=extract_pdfs_command)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
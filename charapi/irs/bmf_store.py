@@ -0,0 +1,165 @@
+import csv
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+
+# EO BMF extract columns, in file order, with the type CharityAPI returns them as
+BMF_FIELDS = [
+    ("ein", str),
+    ("name", str),
+    ("ico", str),
+    ("street", str),
+    ("city", str),
+    ("state", str),
+    ("zip", str),
+    ("group", int),
+    ("subsection", int),
+    ("affiliation", int),
+    ("classification", int),
+    ("ruling", int),
+    ("deductibility", int),
+    ("foundation", int),
+    ("activity", int),
+    ("organization", int),
+    ("status", int),
+    ("tax_period", int),
+    ("asset_cd", int),
+    ("income_cd", int),
+    ("filing_req_cd", int),
+    ("pf_filing_req_cd", int),
+    ("acct_pd", int),
+    ("asset_amt", int),
+    ("income_amt", int),
+    ("revenue_amt", int),
+    ("ntee_cd", str),
+    ("sort_name", str),
+]
+
+BMF_COLUMNS = [name for name, _ in BMF_FIELDS]
+
+
+class BMFStore:
+    """
+    Read-only lookup of IRS Exempt Organizations Business Master File records.
+
+    The store is a SQLite table keyed by EIN, built by ingest_bmf() from the
+    IRS eo_*.csv extracts. Records come back in the same shape as CharityAPI's
+    organization payload, so callers can use either source interchangeably.
+    """
+    FILENAME = "irs_bmf.db"
+
+    _open_stores: Dict[str, "BMFStore"] = {}
+    _open_stores_lock = threading.Lock()
+
+    def __init__(self, database_path: Path):
+        if not database_path.exists():
+            raise FileNotFoundError(
+                f"EO BMF store not found at {database_path}. "
+                "Run 'python -m charapi.irs bmf <eo_*.csv>' to build it."
+            )
+        self.database_path = database_path
+        self._conn = sqlite3.connect(
+            f"file:{database_path}?mode=ro",
+            uri=True,
+            check_same_thread=False
+        )
+        quoted_columns = ", ".join(f'"{column}"' for column in BMF_COLUMNS)
+        self._select_sql = f"SELECT {quoted_columns} FROM bmf WHERE ein = ?"
+
+    @classmethod
+    def open(cls, database_path: Path) -> "BMFStore":
+        key = str(database_path.resolve())
+        with cls._open_stores_lock:
+            if key not in cls._open_stores:
+                cls._open_stores[key] = cls(database_path)
+            return cls._open_stores[key]
+
+    def get_organization(self, ein: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(self._select_sql, (ein.replace("-", ""),)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(BMF_COLUMNS, row))
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM bmf").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+def _convert(value: Optional[str], field_type):
+    if value is None:
+        return None
+    value = value.strip()
+    if value == "":
+        return None
+    if field_type is int:
+        try:
+            return int(value)
+        except ValueError:
+            return None
+    return value
+
+
+def _read_rows(csv_paths: Iterable[Path]):
+    for csv_path in csv_paths:
+        with open(csv_path, "r", newline="", encoding="latin-1") as f:
+            reader = csv.DictReader(f)
+            for record in reader:
+                upper_record = {key.strip().upper(): value for key, value in record.items() if key}
+                row = tuple(
+                    _convert(upper_record.get(name.upper()), field_type)
+                    for name, field_type in BMF_FIELDS
+                )
+                if row[0]:
+                    yield row
+
+
+def ingest_bmf(csv_paths: Iterable[Path], database_path: Path, batch_size: int = 10000) -> int:
+    """
+    Load EO BMF extract CSVs into a fresh store at database_path.
+
+    The store is built in a temporary file and renamed into place, so readers
+    never see a partially ingested store. Later files win for duplicate EINs.
+    """
+    database_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = database_path.with_suffix(".building")
+    if temp_path.exists():
+        temp_path.unlink()
+
+    column_defs = ", ".join(
+        f'"{name}" {"INTEGER" if field_type is int else "TEXT"}' + (" PRIMARY KEY" if name == "ein" else "")
+        for name, field_type in BMF_FIELDS
+    )
+    quoted_columns = ", ".join(f'"{name}"' for name in BMF_COLUMNS)
+    placeholders = ", ".join("?" for _ in BMF_COLUMNS)
+    insert_sql = f"INSERT OR REPLACE INTO bmf ({quoted_columns}) VALUES ({placeholders})"
+
+    conn = sqlite3.connect(temp_path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(f"CREATE TABLE bmf ({column_defs}) WITHOUT ROWID")
+
+        count = 0
+        batch = []
+        for row in _read_rows(csv_paths):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.executemany(insert_sql, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            conn.executemany(insert_sql, batch)
+            count += len(batch)
+
+        conn.commit()
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    os.replace(temp_path, database_path)
+    return count
@@ -0,0 +1,253 @@
+import os
+import sqlite3
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import iterparse
+
+
+EFILE_FILENAME = "irs_efile.db"
+
+# Part IX line 25 (total functional expenses) in the 2013+ and pre-2013 schemas
+FUNCTIONAL_EXPENSE_GROUPS = {
+    "TotalFunctionalExpensesGrp": {
+        "TotalAmt": "total",
+        "ProgramServicesAmt": "program",
+        "ManagementAndGeneralAmt": "admin",
+        "FundraisingAmt": "fundraising",
+    },
+    "TotalFunctionalExpenses": {
+        "Total": "total",
+        "ProgramServices": "program",
+        "ManagementAndGeneral": "admin",
+        "Fundraising": "fundraising",
+    },
+}
+TAX_PERIOD_TAGS = ("TaxPeriodEndDt", "TaxPeriodEndDate")
+RETURN_TYPE_TAGS = ("ReturnTypeCd", "ReturnType")
+
+EXPENSE_COLUMNS = ["total", "program", "admin", "fundraising"]
+
+# A source is an XML file on disk, or a member of a zip archive
+Source = Tuple[str, Optional[str]]
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_return(stream) -> Optional[Dict[str, Any]]:
+    """
+    Extract EIN, tax period and Part IX expense totals from one 990 e-file.
+
+    The document is parsed incrementally and elements are cleared as soon as
+    they close, so memory stays flat regardless of schedule size. Parsing stops
+    once the functional expense totals have been read.
+    """
+    record: Dict[str, Any] = {}
+    path: List[str] = []
+    in_filer = False
+    expense_group = None
+
+    for event, elem in iterparse(stream, events=("start", "end")):
+        name = _local_name(elem.tag)
+
+        if event == "start":
+            path.append(name)
+            if name == "Filer":
+                in_filer = True
+            elif name in FUNCTIONAL_EXPENSE_GROUPS:
+                expense_group = FUNCTIONAL_EXPENSE_GROUPS[name]
+            continue
+
+        path.pop()
+        text = (elem.text or "").strip()
+
+        if name == "Filer":
+            in_filer = False
+        elif in_filer and name == "EIN" and "ein" not in record:
+            record["ein"] = text
+        elif name in TAX_PERIOD_TAGS and "tax_period" not in record:
+            record["tax_period"] = int(text[:4] + text[5:7])
+        elif name in RETURN_TYPE_TAGS and "return_type" not in record:
+            record["return_type"] = text
+        elif expense_group is not None and name in expense_group:
+            record[expense_group[name]] = int(float(text)) if text else None
+        elif name in FUNCTIONAL_EXPENSE_GROUPS:
+            break
+
+        if len(path) > 1:
+            elem.clear()
+
+    if record.get("return_type") not in ("990", None):
+        return None
+    if not record.get("ein") or not record.get("tax_period") or "total" not in record:
+        return None
+    return record
+
+
+def _parse_batch(sources: List[Source]) -> List[Dict[str, Any]]:
+    records = []
+    open_archive = None
+    open_archive_path = None
+
+    try:
+        for file_path, member in sources:
+            try:
+                if member is None:
+                    with open(file_path, "rb") as f:
+                        record = parse_return(f)
+                else:
+                    if open_archive_path != file_path:
+                        if open_archive is not None:
+                            open_archive.close()
+                        open_archive = zipfile.ZipFile(file_path)
+                        open_archive_path = file_path
+                    with open_archive.open(member) as f:
+                        record = parse_return(f)
+            except Exception:
+                # Malformed or truncated returns are skipped rather than aborting the batch
+                record = None
+            if record is not None:
+                records.append(record)
+    finally:
+        if open_archive is not None:
+            open_archive.close()
+
+    return records
+
+
+def iter_sources(paths: Iterable[Path]) -> Iterator[Source]:
+    for path in paths:
+        if path.is_dir():
+            for child in sorted(path.rglob("*")):
+                if child.suffix.lower() in (".xml", ".zip"):
+                    yield from iter_sources([child])
+        elif path.suffix.lower() == ".zip":
+            with zipfile.ZipFile(path) as archive:
+                members = [name for name in archive.namelist() if name.lower().endswith(".xml")]
+            for member in members:
+                yield (str(path), member)
+        else:
+            yield (str(path), None)
+
+
+def _batched(sources: Iterator[Source], batch_size: int) -> Iterator[List[Source]]:
+    batch = []
+    for source in sources:
+        batch.append(source)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class EfileExpenseStore:
+    """
+    Read-only lookup of Part IX functional expenses ingested from 990 e-files.
+
+    Rows are keyed by (EIN, tax period), where the tax period is the YYYYMM
+    the fiscal year ends in, matching the manual data's fiscal_year_<YYYY>.
+    Rows ingested into the open store are visible at once; open() connects
+    again when the file has been deleted and rebuilt (its inode changed).
+    """
+    _open_stores: Dict[str, "EfileExpenseStore"] = {}
+    _open_stores_lock = threading.Lock()
+
+    SELECT_LATEST_SQL = (
+        "SELECT tax_period, total, program, admin, fundraising FROM expenses "
+        "WHERE ein = ? AND total > 0 ORDER BY tax_period DESC LIMIT 1"
+    )
+
+    def __init__(self, database_path: Path):
+        if not database_path.exists():
+            raise FileNotFoundError(
+                f"Form 990 e-file store not found at {database_path}. "
+                "Run 'python -m charapi.irs efile <xml files, zips or directories>' to build it."
+            )
+        self.database_path = database_path
+        self._inode = os.stat(database_path).st_ino
+        self._conn = sqlite3.connect(
+            f"file:{database_path}?mode=ro",
+            uri=True,
+            check_same_thread=False
+        )
+
+    @classmethod
+    def open(cls, database_path: Path) -> "EfileExpenseStore":
+        key = str(database_path.resolve())
+        inode = os.stat(database_path).st_ino
+        with cls._open_stores_lock:
+            store = cls._open_stores.get(key)
+            if store is None or store._inode != inode:
+                store = cls._open_stores[key] = cls(database_path)
+            return store
+
+    def get_latest_expenses(self, ein: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(self.SELECT_LATEST_SQL, (ein.replace("-", ""),)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(["tax_period"] + EXPENSE_COLUMNS, row))
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM expenses").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+def ingest_efiles(paths: Iterable[Path], database_path: Path, workers: Optional[int] = None,
+                  batch_size: int = 256) -> int:
+    """
+    Parse 990 e-files across a process pool into the expense store.
+
+    Files are handed to workers in batches with a bounded number of batches in
+    flight, so memory does not grow with the size of the input. Ingestion adds
+    to an existing store; a later filing for the same EIN and period wins.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 4
+
+    database_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(database_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS expenses ("
+        "ein TEXT NOT NULL, tax_period INTEGER NOT NULL, "
+        "total INTEGER, program INTEGER, admin INTEGER, fundraising INTEGER, "
+        "PRIMARY KEY (ein, tax_period)) WITHOUT ROWID"
+    )
+    insert_sql = (
+        "INSERT OR REPLACE INTO expenses (ein, tax_period, total, program, admin, fundraising) "
+        "VALUES (?, ?, ?, ?, ?, ?)"
+    )
+
+    count = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = []
+            batches = _batched(iter_sources(paths), batch_size)
+
+            for batch in batches:
+                in_flight.append(executor.submit(_parse_batch, batch))
+                if len(in_flight) >= max_in_flight:
+                    count += _store_records(conn, insert_sql, in_flight.pop(0).result())
+            for future in in_flight:
+                count += _store_records(conn, insert_sql, future.result())
+    finally:
+        conn.close()
+
+    return count
+
+
+def _store_records(conn: sqlite3.Connection, insert_sql: str, records: List[Dict[str, Any]]) -> int:
+    conn.executemany(insert_sql, [
+        (record["ein"], record["tax_period"], record.get("total"), record.get("program"),
+         record.get("admin"), record.get("fundraising"))
+        for record in records
+    ])
+    conn.commit()
+    return len(records)
@@ -0,0 +1,77 @@
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable
+
+
+class EINIndex:
+    """
+    Membership index over a set of EINs.
+
+    The file is an 8-byte magic header followed by the EINs as a sorted array
+    of unsigned 32-bit integers (a million EINs is 4 MB). Opening it memory-maps
+    the array, so lookups are a binary search over the OS page cache with no
+    load step. Rebuilds replace the file, so open() maps it again once its
+    inode or mtime changes.
+    """
+    MAGIC = b"CHEIN001"
+
+    _open_indexes: Dict[str, "EINIndex"] = {}
+    _open_indexes_lock = threading.Lock()
+
+    def __init__(self, path: Path):
+        if not path.exists():
+            raise FileNotFoundError(
+                f"EIN index not found at {path}. "
+                "Run 'python -m charapi.irs pub78|revocations <files>' to build it."
+            )
+        self.path = path
+
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size < len(self.MAGIC):
+                raise ValueError(f"{path} is not an EIN index")
+            self._file_id = (stat.st_ino, stat.st_mtime_ns)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(self.MAGIC)] != self.MAGIC:
+            raise ValueError(f"{path} is not an EIN index")
+        self._eins = memoryview(self._mmap)[len(self.MAGIC):].cast("I")
+
+    @classmethod
+    def open(cls, path: Path) -> "EINIndex":
+        key = str(path.resolve())
+        stat = os.stat(path)
+        with cls._open_indexes_lock:
+            index = cls._open_indexes.get(key)
+            if index is None or index._file_id != (stat.st_ino, stat.st_mtime_ns):
+                # Earlier maps stay valid for callers still holding them
+                index = cls._open_indexes[key] = cls(path)
+            return index
+
+    @staticmethod
+    def _to_int(ein) -> int:
+        return int(str(ein).replace("-", ""))
+
+    def __contains__(self, ein) -> bool:
+        target = self._to_int(ein)
+        position = bisect_left(self._eins, target)
+        return position < len(self._eins) and self._eins[position] == target
+
+    def __len__(self) -> int:
+        return len(self._eins)
+
+    @classmethod
+    def build(cls, eins: Iterable[int], path: Path) -> int:
+        sorted_eins = array("I", sorted(set(eins)))
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(".building")
+        with open(temp_path, "wb") as f:
+            f.write(cls.MAGIC)
+            sorted_eins.tofile(f)
+        os.replace(temp_path, path)
+        return len(sorted_eins)
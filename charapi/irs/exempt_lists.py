@@ -0,0 +1,72 @@
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .ein_index import EINIndex
+
+
+PUB78_INDEX_FILENAME = "irs_pub78.idx"
+REVOKED_INDEX_FILENAME = "irs_revoked.idx"
+
+# Auto-revocation list columns (pipe-delimited, no header)
+REVOCATION_DATE_COLUMN = 9
+REINSTATEMENT_DATE_COLUMN = 11
+
+
+def _read_pipe_rows(paths: Iterable[Path]) -> Iterator[List[str]]:
+    for path in paths:
+        with open(path, "r", encoding="latin-1") as f:
+            for line in f:
+                fields = line.rstrip("\r\n").split("|")
+                ein = fields[0].strip()
+                if len(ein) == 9 and ein.isdigit():
+                    yield fields
+
+
+def _parse_date(value: str) -> Optional[date]:
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%d-%b-%Y").date()
+    except ValueError:
+        return None
+
+
+def parse_pub78(paths: Iterable[Path]) -> Iterator[int]:
+    for fields in _read_pipe_rows(paths):
+        yield int(fields[0])
+
+
+def parse_revocations(paths: Iterable[Path]) -> Iterator[int]:
+    """
+    Yield EINs whose exemption is currently revoked.
+
+    An EIN can appear several times; it counts as revoked when its latest
+    revocation is not followed by a reinstatement.
+    """
+    latest: Dict[int, Tuple[Optional[date], Optional[date]]] = {}
+
+    for fields in _read_pipe_rows(paths):
+        ein = int(fields[0])
+        revoked_on = _parse_date(fields[REVOCATION_DATE_COLUMN]) if len(fields) > REVOCATION_DATE_COLUMN else None
+        reinstated_on = _parse_date(fields[REINSTATEMENT_DATE_COLUMN]) if len(fields) > REINSTATEMENT_DATE_COLUMN else None
+
+        previous_revoked, previous_reinstated = latest.get(ein, (None, None))
+        if previous_revoked and (revoked_on is None or previous_revoked > revoked_on):
+            revoked_on = previous_revoked
+        if previous_reinstated and (reinstated_on is None or previous_reinstated > reinstated_on):
+            reinstated_on = previous_reinstated
+        latest[ein] = (revoked_on, reinstated_on)
+
+    for ein, (revoked_on, reinstated_on) in latest.items():
+        if reinstated_on is None or (revoked_on is not None and reinstated_on < revoked_on):
+            yield ein
+
+
+def ingest_pub78(paths: Iterable[Path], local_data_dir: Path) -> int:
+    return EINIndex.build(parse_pub78(paths), local_data_dir / PUB78_INDEX_FILENAME)
+
+
+def ingest_revocations(paths: Iterable[Path], local_data_dir: Path) -> int:
+    return EINIndex.build(parse_revocations(paths), local_data_dir / REVOKED_INDEX_FILENAME)
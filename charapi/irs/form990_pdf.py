@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import yaml
+
+
+PDF_CACHE_DIRNAME = "form990_pdf"
+EXTRACTOR_VERSION = 1
+# Outcomes that depend only on the PDF bytes; anything else is retried on the next run
+CACHED_STATUSES = ("ok", "unparsed", "no_text")
+
+# Form 990 filenames as downloaded from ProPublica: <ein>_<YYYYMM>_990_<id>.pdf
+FILENAME_PATTERN = re.compile(r"^(\d{9})_(\d{6})_990")
+AMOUNT_PATTERN = re.compile(r"\(?\d{1,3}(?:,\d{3})+\)?|\(?\d+\)?")
+# Part IX is on page 10 of the core form, so try it before scanning every page
+PART_IX_PAGE_INDEX = 9
+
+
+def _parse_amount(text: str) -> int:
+    negative = text.startswith("(")
+    value = int(text.strip("()").replace(",", ""))
+    return -value if negative else value
+
+
+def parse_part_ix_text(text: str) -> Optional[Dict[str, int]]:
+    """
+    Find Part IX line 25 in a page of Form 990 text and return its four columns.
+
+    Returns None unless the program, management and fundraising columns add up
+    to the total (within rounding), which rejects lines the text layer or OCR
+    mangled.
+    """
+    if "Statement of Functional Expenses" not in text:
+        return None
+
+    start = text.find("Total functional expenses")
+    if start < 0:
+        return None
+    segment = text[start + len("Total functional expenses"):]
+    end = segment.find("Joint costs")
+    if end >= 0:
+        # Drop line 26's own number, which precedes "Joint costs"
+        segment = re.sub(r"\s26\s*$", " ", segment[:end])
+    segment = re.sub(r"Add lines 1 through 24e", " ", segment, flags=re.IGNORECASE)
+    segment = segment.lstrip(" .\n")
+
+    amounts = [_parse_amount(match) for match in AMOUNT_PATTERN.findall(segment)]
+    if len(amounts) < 3:
+        return None
+
+    total, program, admin = amounts[:3]
+    fundraising = amounts[3] if len(amounts) > 3 else 0
+    if total <= 0 or abs(program + admin + fundraising - total) > max(2, total // 1000):
+        return None
+
+    return {"total": total, "program": program, "admin": admin, "fundraising": fundraising}
+
+
+def _page_texts(pdf_path: str, use_ocr: bool):
+    try:
+        from pypdf import PdfReader
+    except ImportError as e:
+        raise ImportError("Form 990 PDF extraction requires pypdf: pip install 'charapi[pdf]'") from e
+
+    reader = PdfReader(pdf_path)
+    page_count = len(reader.pages)
+    order = list(range(page_count))
+    if PART_IX_PAGE_INDEX < page_count:
+        order.remove(PART_IX_PAGE_INDEX)
+        order.insert(0, PART_IX_PAGE_INDEX)
+
+    has_text = False
+    for index in order:
+        text = reader.pages[index].extract_text() or ""
+        if text.strip():
+            has_text = True
+            yield text
+
+    if has_text or not use_ocr:
+        return
+
+    # Scanned filing with no text layer
+    from pdf2image import convert_from_path
+    import pytesseract
+    for index in order:
+        images = convert_from_path(pdf_path, first_page=index + 1, last_page=index + 1)
+        for image in images:
+            yield pytesseract.image_to_string(image)
+
+
+def extract_pdf(pdf_path: str, use_ocr: bool) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"file": Path(pdf_path).name, "status": "no_text"}
+    try:
+        for text in _page_texts(pdf_path, use_ocr):
+            result["status"] = "unparsed"
+            expenses = parse_part_ix_text(text)
+            if expenses is not None:
+                result["status"] = "ok"
+                result["expenses"] = expenses
+                break
+    except ImportError:
+        raise
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def ocr_available() -> bool:
+    """True if the OCR packages and the tesseract and poppler binaries they drive are all installed."""
+    try:
+        import pdf2image
+        import pytesseract
+    except ImportError:
+        return False
+    try:
+        pytesseract.get_tesseract_version()
+    except Exception:
+        return False
+    return all(shutil.which(tool) for tool in ("pdfinfo", "pdftoppm"))
+
+
+def _content_key(pdf_path: Path, use_ocr: bool) -> str:
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return f"{digest.hexdigest()}-v{EXTRACTOR_VERSION}{'-ocr' if use_ocr else ''}"
+
+
+def extract_pdfs(pdf_paths: Iterable[Path], cache_dir: Path, workers: Optional[int] = None,
+                 use_ocr: Optional[bool] = None) -> List[Dict[str, Any]]:
+    """
+    Extract Part IX totals from Form 990 PDFs, reusing results by content hash.
+
+    Deterministic results (ok, unparsed, no_text) are cached as
+    <sha256>-v<version>.json in cache_dir, so unchanged PDFs are never parsed
+    twice; bumping EXTRACTOR_VERSION or enabling OCR invalidates earlier
+    results. Errors are not cached, since they may come from the environment
+    (e.g. a missing OCR binary), and are retried on the next run. Cache misses
+    are parsed across a process pool.
+    """
+    if use_ocr is None:
+        use_ocr = ocr_available()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    misses = []
+    for pdf_path in sorted(Path(p) for p in pdf_paths):
+        key = _content_key(pdf_path, use_ocr)
+        cache_path = cache_dir / f"{key}.json"
+        if cache_path.exists():
+            with open(cache_path, "r") as f:
+                result = json.load(f)
+            result["cached"] = True
+            results[str(pdf_path)] = result
+        else:
+            misses.append((pdf_path, cache_path))
+
+    if misses:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+            futures = [(pdf_path, cache_path, executor.submit(extract_pdf, str(pdf_path), use_ocr))
+                       for pdf_path, cache_path in misses]
+            for pdf_path, cache_path, future in futures:
+                result = future.result()
+                if result["status"] in CACHED_STATUSES:
+                    with open(cache_path, "w") as f:
+                        json.dump(result, f)
+                result["cached"] = False
+                results[str(pdf_path)] = result
+
+    extracted = []
+    for pdf_path_str, result in results.items():
+        match = FILENAME_PATTERN.match(Path(pdf_path_str).name)
+        if match:
+            result["ein"] = match.group(1)
+            result["fiscal_year"] = int(match.group(2)[:4])
+        result["file"] = Path(pdf_path_str).name
+        extracted.append(result)
+    return extracted
+
+
+def write_extracted_yaml(results: List[Dict[str, Any]], output_path: Path) -> int:
+    """Write successful extractions in the brief_manual.yaml layout."""
+    data: Dict[str, Dict[str, Any]] = {}
+    for result in results:
+        if result.get("status") != "ok" or "ein" not in result:
+            continue
+        expenses = result["expenses"]
+        organization = data.setdefault(f"ein_{result['ein']}", {})
+        organization[f"fiscal_year_{result['fiscal_year']}"] = {
+            "expenses": {
+                "program": expenses["program"],
+                "admin": expenses["admin"],
+                "fundraising": expenses["fundraising"],
+            }
+        }
+
+    header = (
+        "# GENERATED by 'python -m charapi.irs pdf' from Form 990 PDFs - do not edit.\n"
+        "# Values entered in the manual data file take precedence over these.\n"
+    )
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output_path.with_suffix(".tmp")
+    with open(temp_path, "w") as f:
+        f.write(header)
+        yaml.safe_dump(data, f, sort_keys=True)
+    os.replace(temp_path, output_path)
+    return sum(len(years) for years in data.values())
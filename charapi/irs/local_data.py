@@ -0,0 +1,25 @@
+from pathlib import Path
+
+
+def find_project_root(start_path: Path) -> Path:
+    current = start_path.parent
+    while current != current.parent:
+        if (current / "pyproject.toml").exists():
+            return current
+        current = current.parent
+    return start_path.parent
+
+
+def resolve_config_path(config_path: str, path_str: str) -> Path:
+    """Resolve a path from the config file relative to the project root, as clients do."""
+    path = Path(path_str)
+    return path if path.is_absolute() else find_project_root(Path(config_path).resolve()) / path
+
+
+def resolve_local_data_dir(config: dict) -> Path:
+    local_data_dir = Path(config.get("irs", {}).get("local_data_dir", "cache"))
+    if local_data_dir.is_absolute() or "_config_file_path" not in config:
+        return local_data_dir
+
+    config_file_path = Path(config["_config_file_path"]).resolve()
+    return find_project_root(config_file_path) / local_data_dir
@@ -0,0 +1,214 @@
+import csv
+import json
+import mmap
+import os
+import shutil
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+SOI_DIRNAME = "irs_soi"
+
+# Column name -> array typecode. ein and tax_pd are the key columns.
+KEY_COLUMNS = {"ein": "I", "tax_pd": "I"}
+VALUE_COLUMNS = {
+    "totrevenue": "q",
+    "totfuncexpns": "q",
+    "totassetsend": "q",
+    "totliabend": "q",
+}
+COLUMNS = {**KEY_COLUMNS, **VALUE_COLUMNS}
+
+# Stored in value columns where the extract has no value
+MISSING = -(2 ** 63)
+
+
+class SOIFilingsStore:
+    """
+    Columnar store of IRS SOI annual 990 extract fields, keyed by EIN and tax period.
+
+    Each column is a flat binary array file, sorted by EIN and then by tax period
+    (newest first), and memory-mapped on open. A lookup is a binary search on the
+    EIN column followed by slicing every column over the same row range; the
+    slices are memoryviews onto the mapped files, so nothing is copied until a
+    caller turns them into filing dicts.
+    """
+    _open_stores: Dict[str, "SOIFilingsStore"] = {}
+    _open_stores_lock = threading.Lock()
+
+    def __init__(self, store_dir: Path):
+        meta_path = store_dir / "meta.json"
+        if not meta_path.exists():
+            raise FileNotFoundError(
+                f"SOI filings store not found at {store_dir}. "
+                "Run 'python -m charapi.irs soi <extract files>' to build it."
+            )
+        with open(meta_path, "r") as f:
+            self.meta = json.load(f)
+        if self.meta["byteorder"] != sys.byteorder:
+            raise ValueError(f"SOI filings store at {store_dir} was built on a {self.meta['byteorder']}-endian host")
+
+        self.store_dir = store_dir
+        self.rows = self.meta["rows"]
+        self._mmaps = []
+        self.columns: Dict[str, memoryview] = {}
+        for name, typecode in COLUMNS.items():
+            self.columns[name] = self._map_column(store_dir / f"{name}.bin", typecode)
+
+    def _map_column(self, path: Path, typecode: str) -> memoryview:
+        if self.rows == 0:
+            return memoryview(array(typecode))
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mmaps.append(mapped)
+        return memoryview(mapped).cast(typecode)
+
+    @classmethod
+    def open(cls, store_dir: Path) -> "SOIFilingsStore":
+        key = str(store_dir.resolve())
+        with cls._open_stores_lock:
+            if key not in cls._open_stores:
+                cls._open_stores[key] = cls(store_dir)
+            return cls._open_stores[key]
+
+    def _row_range(self, ein: str) -> Tuple[int, int]:
+        target = int(ein.replace("-", ""))
+        eins = self.columns["ein"]
+        return bisect_left(eins, target), bisect_right(eins, target)
+
+    def get_columns(self, ein: str) -> Dict[str, memoryview]:
+        start, end = self._row_range(ein)
+        return {name: column[start:end] for name, column in self.columns.items()}
+
+    def get_filings(self, ein: str) -> List[Dict]:
+        """Return filings newest first, shaped like ProPublica's filings_with_data."""
+        normalized_ein = ein.replace("-", "")
+        columns = self.get_columns(normalized_ein)
+
+        filings = []
+        for row in range(len(columns["ein"])):
+            tax_pd = columns["tax_pd"][row]
+            year, month = divmod(tax_pd, 100)
+            filing = {
+                "ein": normalized_ein,
+                "tax_prd": tax_pd,
+                # IRS tax year is the calendar year the accounting period began in
+                "tax_prd_yr": year if month == 12 else year - 1,
+            }
+            for name in VALUE_COLUMNS:
+                value = columns[name][row]
+                if value != MISSING:
+                    filing[name] = value
+            filings.append(filing)
+        return filings
+
+    def close(self):
+        self.columns = {}
+        for mapped in self._mmaps:
+            mapped.close()
+        self._mmaps = []
+
+
+def _parse_int(value) -> Optional[int]:
+    if value is None:
+        return None
+    text = str(value).strip()
+    if text == "" or text.lower() == "nan":
+        return None
+    try:
+        return int(float(text))
+    except ValueError:
+        return None
+
+
+def _read_extract(path: Path) -> Iterator[Dict[str, object]]:
+    suffix = path.suffix.lower()
+    if suffix in (".xlsx", ".xls"):
+        try:
+            import pandas
+            frame = pandas.read_excel(path, dtype=str)
+        except ImportError as e:
+            raise ImportError("Reading Excel SOI extracts requires openpyxl (xlrd for .xls): "
+                              "pip install 'charapi[soi]'") from e
+        frame.columns = [str(column).strip().lower() for column in frame.columns]
+        yield from frame.to_dict("records")
+        return
+
+    with open(path, "r", newline="", encoding="latin-1") as f:
+        header = f.readline()
+        delimiter = "," if "," in header else None
+        names = [name.strip().lower() for name in (header.split(delimiter) if delimiter else header.split())]
+        if delimiter:
+            for values in csv.reader(f, delimiter=delimiter):
+                yield dict(zip(names, values))
+        else:
+            for line in f:
+                yield dict(zip(names, line.split()))
+
+
+def ingest_soi(paths: Iterable[Path], store_dir: Path) -> int:
+    """
+    Build the columnar SOI store from annual extract files (.csv, .dat or .xlsx).
+
+    Later files win when the same EIN and tax period appear more than once.
+    The store is written to a sibling directory and swapped in when complete.
+    """
+    paths = [Path(path) for path in paths]
+    data = {name: array(typecode) for name, typecode in COLUMNS.items()}
+
+    for path in paths:
+        for record in _read_extract(path):
+            ein = _parse_int(record.get("ein"))
+            tax_pd = _parse_int(record.get("tax_pd"))
+            if ein is None or tax_pd is None:
+                continue
+            data["ein"].append(ein)
+            data["tax_pd"].append(tax_pd)
+            for name in VALUE_COLUMNS:
+                value = _parse_int(record.get(name))
+                data[name].append(MISSING if value is None else value)
+
+    eins = data["ein"]
+    tax_pds = data["tax_pd"]
+    order = sorted(range(len(eins)), key=lambda i: (eins[i], -tax_pds[i], -i))
+
+    kept = []
+    previous_key = None
+    for i in order:
+        key = (eins[i], tax_pds[i])
+        if key != previous_key:
+            kept.append(i)
+            previous_key = key
+
+    building_dir = store_dir.with_name(store_dir.name + ".building")
+    if building_dir.exists():
+        shutil.rmtree(building_dir)
+    building_dir.mkdir(parents=True)
+
+    for name, typecode in COLUMNS.items():
+        column = data[name]
+        with open(building_dir / f"{name}.bin", "wb") as f:
+            array(typecode, (column[i] for i in kept)).tofile(f)
+
+    with open(building_dir / "meta.json", "w") as f:
+        json.dump({
+            "rows": len(kept),
+            "columns": COLUMNS,
+            "byteorder": sys.byteorder,
+            "sources": [str(path) for path in paths]
+        }, f, indent=2)
+
+    old_dir = store_dir.with_name(store_dir.name + ".old")
+    if store_dir.exists():
+        if old_dir.exists():
+            shutil.rmtree(old_dir)
+        os.replace(store_dir, old_dir)
+    os.replace(building_dir, store_dir)
+    if old_dir.exists():
+        shutil.rmtree(old_dir)
+
+    return len(kept)
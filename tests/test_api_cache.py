@@ -1,8 +1,16 @@
+import io
 import unittest
 import tempfile
 import os
+import sqlite3
+import threading
 import time
+from contextlib import redirect_stdout
 from datetime import datetime, timedelta
+
+import yaml
+
+from charapi.cache.__main__ import main
 from charapi.cache.api_cache import APICache
 
 
@@ -13,8 +21,10 @@ class TestAPICache(unittest.TestCase):
         self.cache = APICache(self.db_path, default_ttl_hours=1)
 
     def tearDown(self):
-        if os.path.exists(self.db_path):
-            os.remove(self.db_path)
+        self.cache.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
         os.rmdir(self.temp_dir)
 
     def test_database_creation(self):
@@ -166,6 +176,68 @@ class TestAPICache(unittest.TestCase):
             data = self.cache.get("test", "endpoint", f"key_{i}")
             self.assertEqual(data["index"], i)
 
+    def test_concurrent_threads_read_and_write(self):
+        """Test that threads sharing one cache never hit 'database is locked'"""
+        errors = []
+
+        def worker(thread_index):
+            try:
+                for i in range(50):
+                    identifier = f"{thread_index}_{i}"
+                    self.cache.set("test", "endpoint", identifier, {"index": i})
+                    self.assertEqual(self.cache.get("test", "endpoint", identifier), {"index": i})
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.cache.get_stats()["valid_entries"], 400)
+
+    def test_wal_journal_mode(self):
+        """Test that the database runs in WAL mode"""
+        mode = self.cache._get_connection().execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def test_open_shares_instance_per_path(self):
+        """Test that open returns one shared cache per database path"""
+        shared = APICache.open(self.db_path)
+        try:
+            self.assertIs(APICache.open(self.db_path), shared)
+        finally:
+            shared.close()
+        self.assertIsNot(APICache.open(self.db_path), shared)
+        APICache.open(self.db_path).close()
+
+    def test_get_many_returns_valid_hits(self):
+        """Test bulk reads return only identifiers with valid entries"""
+        self.cache.set("test", "endpoint", "1", {"data": 1})
+        self.cache.set("test", "endpoint", "2", {"data": 2}, ttl_hours=0.0001)
+        self.cache.set("test", "other", "3", {"data": 3})
+        time.sleep(1)
+
+        results = self.cache.get_many("test", "endpoint", ["1", "2", "3", "missing"])
+
+        self.assertEqual(results, {"1": {"data": 1}})
+
+    def test_set_many_and_get_many_round_trip(self):
+        """Test bulk writes are readable in bulk, across the IN (...) chunk size"""
+        items = {str(i): {"index": i} for i in range(APICache.MANY_CHUNK_SIZE + 10)}
+
+        self.cache.set_many("test", "endpoint", items)
+
+        self.assertEqual(self.cache.get_many("test", "endpoint", list(items)), items)
+        self.assertEqual(self.cache.get("test", "endpoint", "7"), {"index": 7})
+
+    def test_set_many_empty(self):
+        """Test that an empty bulk write is a no-op"""
+        self.cache.set_many("test", "endpoint", {})
+        self.assertEqual(self.cache.get_stats()["valid_entries"], 0)
+
     def test_default_ttl_usage(self):
         """Test that default TTL is used when not specified"""
         test_data = {"test": "data"}
@@ -178,6 +250,62 @@ class TestAPICache(unittest.TestCase):
 
         # Verify it's stored with default TTL by checking it exists
 
+    def test_identifier_lookups_use_indexes(self):
+        """Test that per-EIN and per-endpoint lookups are index searches, not table scans"""
+        conn = self.cache._get_connection()
+        for sql, params in [
+            (APICache.IDENTIFIER_KEYS_SQL, ("530196605",)),
+            (APICache.ITER_IDENTIFIERS_SQL, ("propublica", "organization", time.time())),
+        ]:
+            plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+            self.assertIn("USING", plan)
+            self.assertNotIn("SCAN api_cache", plan)
+
+    def test_key_columns_backfilled_for_existing_rows(self):
+        """Test that rows written before the endpoint/identifier columns get them from their keys"""
+        legacy_path = os.path.join(self.temp_dir, "legacy.db")
+        conn = sqlite3.connect(legacy_path)
+        conn.execute(
+            "CREATE TABLE api_cache (cache_key TEXT PRIMARY KEY, api_source TEXT NOT NULL, "
+            "data TEXT NOT NULL, created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        expires_at = time.time() + 3600
+        conn.executemany("INSERT INTO api_cache VALUES (?, ?, ?, ?, ?)", [
+            ("propublica_organization_530196605", "propublica", '{"a": 1}', time.time(), expires_at),
+            ("charity_navigator_ratings_530196605", "charity_navigator", '{"b": 2}', time.time(), expires_at),
+            ("propublica_search_red_cross", "propublica", "[]", time.time(), expires_at),
+        ])
+        conn.commit()
+        conn.close()
+
+        cache = APICache(legacy_path)
+        try:
+            self.assertEqual(list(cache.iter_identifiers("propublica", "search")), ["red_cross"])
+            self.assertEqual(list(cache.iter_identifiers("charity_navigator", "ratings")), ["530196605"])
+            self.assertEqual(cache.invalidate_ein("53-0196605"), 2)
+            self.assertIsNone(cache.get("propublica", "organization", "530196605"))
+            self.assertEqual(cache.get("propublica", "search", "red_cross"), [])
+        finally:
+            cache.close()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(legacy_path + suffix):
+                    os.remove(legacy_path + suffix)
+
+    def test_cli_invalidate_ein_and_identifiers(self):
+        """Test the invalidate-ein and identifiers maintenance commands"""
+        config_path = os.path.join(self.temp_dir, "config.yaml")
+        with open(config_path, "w") as f:
+            yaml.dump({"caching": {"database_path": self.db_path}}, f)
+        self.cache.set_many("propublica", "organization", {"530196605": {}, "131644147": {}})
+        self.cache.set("charityapi", "organizations", "530196605", {})
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            main(["--config", config_path, "invalidate-ein", "53-0196605"])
+            main(["--config", config_path, "identifiers", "propublica", "organization"])
+        self.assertEqual(output.getvalue().splitlines(), ["Removed 2 entries for 1 EINs", "131644147"])
+        os.remove(config_path)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
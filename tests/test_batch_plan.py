@@ -0,0 +1,123 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+import yaml
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.api.batch_plan import plan_batch
+from charapi.cache.__main__ import main
+from charapi.cache.telemetry import CacheTelemetry, read_fetch_latency
+from charapi.clients.charityapi_client import CharityAPIClient
+from charapi.clients.transport import RateLimiter
+
+EINS = ["04-3255365", "13-2500888", "13-1930176"]
+
+
+@pytest.fixture(autouse=True)
+def reset_shared_state():
+    CacheTelemetry.shared().reset()
+    RateLimiter.reset_all()
+    yield
+    CacheTelemetry.shared().reset()
+    RateLimiter.reset_all()
+
+
+def write_config(temp_dir, telemetry_path=None):
+    config_path = os.path.join(temp_dir, "config.yaml")
+    with open(config_path, "w") as f:
+        yaml.dump({
+            "propublica": {"base_url": "https://example.org/propublica", "timeout": 30},
+            "charityapi": {"base_url": "https://example.org/charityapi", "api_key": "test_key"},
+            "transport": {"rate_limits": {"charityapi": {"requests_per_second": 0.5}}},
+            "caching": {"enabled": True, "database_path": os.path.join(temp_dir, "cache.db"),
+                        "migration": {"enabled": False}, "telemetry_path": telemetry_path,
+                        "prefetch": {"max_workers": 4, "default_latency_seconds": 0.5}}
+        }, f)
+    return config_path
+
+
+def fill_cache(config_path):
+    """04-3255365 fully cached; 13-2500888 with a cached ProPublica error and nothing from CharityAPI"""
+    client = CharityAPIClient(config_path)
+    client.cache.set("propublica", "organization", "043255365", {"organization": {}}, ttl_hours=24)
+    client.cache.set("propublica", "filings", "043255365", [], ttl_hours=24)
+    client.cache.set("charityapi", "organizations", "043255365", {"status": 1}, ttl_hours=24)
+    client.cache.set("propublica", "organization", "132500888", {"_error_cache": True}, ttl_hours=1)
+    client.cache.close()
+
+
+def test_plan_counts_requests_and_orders_cache_hot_first():
+    """Test request counts per service, with filings read from a cached organization and cached errors served"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path = write_config(temp_dir)
+        fill_cache(config_path)
+
+        plan = plan_batch(list(reversed(EINS)) + ["043255365"], config_path)
+        assert plan["eins"] == 3
+        assert plan["cached_eins"] == 1
+        assert plan["fresh_entries"] == 4
+        assert {service: estimate["requests"] for service, estimate in plan["services"].items()} == {
+            "propublica": 1, "charityapi": 2
+        }
+        assert plan["order"] == ["04-3255365", "13-2500888", "13-1930176"]
+
+        # Entries about to expire count as fetched when asked to look ahead
+        ahead = plan_batch(EINS, config_path, refresh_within_hours=48)
+        assert ahead["services"]["propublica"]["requests"] == 3
+
+
+def test_plan_estimates_time_from_latency_and_rate_limits():
+    """Test that estimates use the default latency until fetches are observed, and respect rate limits"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path = write_config(temp_dir)
+        fill_cache(config_path)
+
+        plan = plan_batch(EINS, config_path)
+        propublica, charityapi = plan["services"]["propublica"], plan["services"]["charityapi"]
+        assert (propublica["mean_latency_seconds"], propublica["latency_source"]) == (0.5, "default")
+        assert propublica["prefetch_seconds"] == pytest.approx(0.125)
+        # Two requests at 0.5/s: the second waits 2s for the limit, longer than the fetches take
+        assert charityapi["prefetch_seconds"] == pytest.approx(2.0)
+        assert plan["prefetch_seconds"] == pytest.approx(2.0)
+        assert plan["evaluate_seconds"] == pytest.approx(2.0)
+
+        CacheTelemetry.shared().record_fetch("propublica", "organization", 3.0)
+        plan = plan_batch(EINS, config_path)
+        assert plan["services"]["propublica"]["latency_source"] == "telemetry"
+        assert plan["evaluate_seconds"] == pytest.approx(3.0 + 2 * 0.5)
+
+
+def test_plan_reads_latency_from_telemetry_dump():
+    """Test that fetch latency recorded by an earlier run's telemetry_path dump is used"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        telemetry_path = os.path.join(temp_dir, "metrics.prom")
+        earlier_run = CacheTelemetry()
+        earlier_run.record_fetch("charityapi", "organizations", 0.2)
+        earlier_run.record_fetch("charityapi", "organizations", 0.4)
+        earlier_run.record_lookup("propublica", "organization", "hit", 0.001)
+        earlier_run.write_prometheus(Path(telemetry_path))
+        # Endpoints that were only looked up have no fetch latency
+        assert read_fetch_latency(telemetry_path) == {("charityapi", "organizations"): pytest.approx(0.3)}
+
+        plan = plan_batch(EINS, write_config(temp_dir, telemetry_path))
+        charityapi = plan["services"]["charityapi"]
+        assert (charityapi["mean_latency_seconds"], charityapi["latency_source"]) == (pytest.approx(0.3), "telemetry_path")
+
+
+def test_cli_plan(capsys):
+    """Test the plan command and its cache-hot-first order file"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path = write_config(temp_dir)
+        fill_cache(config_path)
+        order_path = os.path.join(temp_dir, "order.txt")
+
+        main(["--config", config_path, "plan", "--ein", EINS[2], "--ein", EINS[0], "--write-order", order_path])
+        output = capsys.readouterr().out
+        assert "2 EINs: 1 served entirely from cache" in output
+        assert "charityapi: 1 requests, 0.50s each (default), limit 0.5/s" in output
+        assert "Estimated 1s for batch_evaluate" in output
+        with open(order_path) as f:
+            assert f.read().split() == [EINS[0], EINS[2]]
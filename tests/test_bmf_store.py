@@ -0,0 +1,125 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+import yaml
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.clients.charityapi_client import CharityAPIClient
+from charapi.irs.__main__ import main as irs_main
+from charapi.irs.bmf_store import BMFStore, ingest_bmf
+
+
+BMF_HEADER = (
+    "EIN,NAME,ICO,STREET,CITY,STATE,ZIP,GROUP,SUBSECTION,AFFILIATION,CLASSIFICATION,RULING,"
+    "DEDUCTIBILITY,FOUNDATION,ACTIVITY,ORGANIZATION,STATUS,TAX_PERIOD,ASSET_CD,INCOME_CD,"
+    "FILING_REQ_CD,PF_FILING_REQ_CD,ACCT_PD,ASSET_AMT,INCOME_AMT,REVENUE_AMT,NTEE_CD,SORT_NAME\n"
+)
+RED_CROSS_ROW = (
+    "530196605,AMERICAN NATIONAL RED CROSS,GAIL MCGOVERN,2025 E STREET NW,WASHINGTON,DC,20006-5009,"
+    "0000,03,3,1000,191801,1,15,540000000,1,01,202306,9,9,01,0,06,3019994931,3217077611,3217077611,P12,\n"
+)
+PASSIM_ROW = (
+    "043255365,47 PALMER INC,,47 PALMER ST,CAMBRIDGE,MA,02138-5707,0000,03,3,1000,199601,1,15,"
+    "000000000,1,01,202306,5,5,01,0,06,2146090,1938467,1938467,A60,PASSIM\n"
+)
+
+
+def write_bmf_csv(directory, name, rows):
+    path = Path(directory) / name
+    path.write_text(BMF_HEADER + "".join(rows), encoding="latin-1")
+    return path
+
+
+def test_ingest_and_lookup():
+    """Test that ingested BMF rows come back in CharityAPI shape"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_path = write_bmf_csv(temp_dir, "eo1.csv", [RED_CROSS_ROW, PASSIM_ROW])
+        database_path = Path(temp_dir) / BMFStore.FILENAME
+
+        assert ingest_bmf([csv_path], database_path) == 2
+
+        store = BMFStore(database_path)
+        org = store.get_organization("53-0196605")
+        store.close()
+
+        assert org["name"] == "AMERICAN NATIONAL RED CROSS"
+        assert org["subsection"] == 3
+        assert org["foundation"] == 15
+        assert org["deductibility"] == 1
+        assert org["status"] == 1
+        assert org["filing_req_cd"] == 1
+        assert org["ruling"] == 191801
+        assert org["tax_period"] == 202306
+        assert org["ntee_cd"] == "P12"
+        assert org["sort_name"] is None
+
+
+def test_leading_zero_eins_preserved():
+    """Test that EINs keep their leading zeros"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_path = write_bmf_csv(temp_dir, "eo1.csv", [PASSIM_ROW])
+        database_path = Path(temp_dir) / BMFStore.FILENAME
+        ingest_bmf([csv_path], database_path)
+
+        store = BMFStore(database_path)
+        org = store.get_organization("043255365")
+        store.close()
+
+        assert org["ein"] == "043255365"
+        assert org["state"] == "MA"
+
+
+def test_unknown_ein_returns_none():
+    """Test that EINs missing from the BMF return None"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_path = write_bmf_csv(temp_dir, "eo1.csv", [RED_CROSS_ROW])
+        database_path = Path(temp_dir) / BMFStore.FILENAME
+        ingest_bmf([csv_path], database_path)
+
+        store = BMFStore(database_path)
+        assert store.get_organization("999999999") is None
+        store.close()
+
+
+def test_reingest_replaces_store():
+    """Test that re-ingesting builds a fresh store rather than appending"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_path = Path(temp_dir) / BMFStore.FILENAME
+        ingest_bmf([write_bmf_csv(temp_dir, "eo1.csv", [RED_CROSS_ROW, PASSIM_ROW])], database_path)
+        ingest_bmf([write_bmf_csv(temp_dir, "eo2.csv", [PASSIM_ROW])], database_path)
+
+        store = BMFStore(database_path)
+        assert store.count() == 1
+        store.close()
+
+
+def test_missing_store_raises():
+    """Test that opening a store that was never ingested explains how to build it"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with pytest.raises(FileNotFoundError, match="charapi.irs bmf"):
+            BMFStore(Path(temp_dir) / BMFStore.FILENAME)
+
+
+def test_charityapi_client_bmf_backend():
+    """Test that the bmf backend answers CharityAPIClient lookups locally"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_path = write_bmf_csv(temp_dir, "eo1.csv", [RED_CROSS_ROW])
+        config = {
+            "charityapi": {"base_url": "https://api.charityapi.org/api", "backend": "bmf"},
+            "irs": {"local_data_dir": temp_dir},
+            "caching": {"enabled": False}
+        }
+        config_path = os.path.join(temp_dir, "config.yaml")
+        with open(config_path, "w") as f:
+            yaml.dump(config, f)
+
+        irs_main(["--config", config_path, "bmf", str(csv_path)])
+
+        client = CharityAPIClient(config_path)
+        assert client.get_ntee_code("530196605") == "P12"
+        assert client.get_deductibility_status("530196605") == True
+        assert client.get_ruling_year("530196605") == 1918
+        assert client.get_organization("999999999") is None
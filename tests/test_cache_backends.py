@@ -0,0 +1,307 @@
+import os
+import sys
+import tempfile
+import threading
+
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.cache.api_cache import APICache
+from charapi.cache.backend import CacheBackend, create_cache
+from charapi.cache.file_cache import ShardedFileCache
+from charapi.cache.memory_cache import MemoryCache
+from charapi.cache.sweeper import CacheSweeper
+from charapi.cache.telemetry import CacheTelemetry
+
+
+def make_sqlite(temp_dir, **options):
+    return APICache(os.path.join(temp_dir, "cache.db"), **options)
+
+
+def make_sharded(temp_dir, **options):
+    from charapi.cache.sharded_cache import ShardedCache
+    return ShardedCache(os.path.join(temp_dir, "sharded.db"), shards=3, **options)
+
+
+def make_filesystem(temp_dir, **options):
+    return ShardedFileCache(os.path.join(temp_dir, "cache"), shards=16, **options)
+
+
+def make_lmdb(temp_dir, **options):
+    pytest.importorskip("lmdb")
+    from charapi.cache.lmdb_cache import LMDBCache
+    return LMDBCache(os.path.join(temp_dir, "cache.lmdb"), map_size=1 << 26, **options)
+
+
+def make_replica(temp_dir, **options):
+    from charapi.cache.replica_cache import ReplicaCache
+    replica_path = os.path.join(temp_dir, "replica.db")
+    if not os.path.exists(replica_path):
+        writer = APICache(os.path.join(temp_dir, "writer.db"))
+        writer.publish_replica(replica_path)
+        writer.close()
+    return ReplicaCache(replica_path, os.path.join(temp_dir, "overlay.db"), **options)
+
+
+@pytest.fixture(
+    params=[make_sqlite, make_sharded, make_filesystem, make_lmdb, make_replica],
+    ids=["sqlite", "sharded", "filesystem", "lmdb", "replica"]
+)
+def make_cache(request):
+    caches = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        def factory(**options):
+            options.setdefault("telemetry", CacheTelemetry())
+            cache = request.param(temp_dir, **options)
+            caches.append(cache)
+            return cache
+        yield factory
+        for cache in caches:
+            cache.close()
+
+
+def test_set_get_roundtrip(make_cache):
+    """Test that every backend stores and returns the same data"""
+    cache = make_cache()
+    data = {"ein": "123456789", "revenue": [1, 2.5, None], "name": "Ünïcode Charity"}
+    cache.set("propublica", "organization", "123456789", data)
+    assert cache.get("propublica", "organization", "123456789") == data
+    assert cache.get("propublica", "organization", "987654321") is None
+    assert cache.exists("propublica", "organization", "123456789")
+    assert not cache.exists("propublica", "filings", "123456789")
+
+
+def test_many_roundtrip(make_cache):
+    """Test that set_many and get_many agree with single-entry access"""
+    cache = make_cache()
+    items = {str(i): {"value": i} for i in range(1200)}
+    cache.set_many("test", "endpoint", items)
+    assert cache.get_many("test", "endpoint", list(items) + ["missing"]) == items
+    assert cache.get("test", "endpoint", "7") == {"value": 7}
+
+
+@pytest.mark.parametrize("codec", ["json", "zlib"])
+def test_codecs(make_cache, codec):
+    """Test that each backend stores payloads from every codec"""
+    cache = make_cache(codec=codec)
+    cache.set("test", "endpoint", "key", {"text": "x" * 1000})
+    assert cache.get("test", "endpoint", "key") == {"text": "x" * 1000}
+
+
+def test_overwrite_invalidate_and_clear(make_cache):
+    """Test that writes replace entries and invalidate/clear_all remove them"""
+    cache = make_cache()
+    cache.set("test", "endpoint", "key", {"version": 1})
+    cache.set("test", "endpoint", "key", {"version": 2})
+    cache.set("test", "endpoint", "other", {"version": 1})
+    assert cache.get("test", "endpoint", "key") == {"version": 2}
+
+    cache.invalidate("test", "endpoint", "key")
+    assert cache.get("test", "endpoint", "key") is None
+    assert cache.get("test", "endpoint", "other") == {"version": 1}
+
+    cache.clear_all()
+    assert cache.get("test", "endpoint", "other") is None
+    assert cache.get_stats()["valid_entries"] == 0
+
+
+def test_expired_entries_are_missing_and_swept(make_cache):
+    """Test that expired entries read as missing until cleanup or sweep removes them"""
+    cache = make_cache()
+    cache.set_many("test", "endpoint", {str(i): {"value": i} for i in range(50)}, ttl_hours=-1)
+    cache.set("test", "endpoint", "valid", {"ok": True})
+
+    assert cache.get("test", "endpoint", "1") is None
+    assert cache.get_many("test", "endpoint", ["1", "2", "valid"]) == {"valid": {"ok": True}}
+    assert not cache.exists("test", "endpoint", "1")
+
+    stats = cache.get_stats()
+    assert stats["valid_entries"] == 1
+    assert stats["expired_entries"] == 50
+
+    result = cache.sweep(batch_size=10, time_budget_seconds=10)
+    assert result["expired_removed"] == 50
+    assert result["complete"] == True
+    assert cache.get_stats()["expired_entries"] == 0
+
+    cache.set("test", "endpoint", "late", {"value": 0}, ttl_hours=-1)
+    assert cache.cleanup_expired() == 1
+    assert cache.get("test", "endpoint", "valid") == {"ok": True}
+
+
+def test_sweep_resumes_after_budget(make_cache):
+    """Test that a sweep cut short by its budget leaves work for the next one"""
+    cache = make_cache()
+    cache.set_many("test", "endpoint", {str(i): {"value": i} for i in range(300)}, ttl_hours=-1)
+
+    first = cache.sweep(batch_size=10, time_budget_seconds=0)
+    assert first["complete"] == False
+    assert first["expired_removed"] < 300
+
+    second = cache.sweep(batch_size=10, time_budget_seconds=10)
+    assert first["expired_removed"] + second["expired_removed"] == 300
+    assert cache.get_stats()["expired_entries"] == 0
+
+
+def test_stats(make_cache):
+    """Test that stats report the backend name, entry counts and sources"""
+    cache = make_cache()
+    cache.set("propublica", "organization", "1", {"a": 1})
+    cache.set("charityapi", "organization", "1", {"a": 1})
+    stats = cache.get_stats()
+    assert stats["backend"] == cache.name
+    assert stats["valid_entries"] == 2
+    assert stats["api_sources"] == 2
+    assert stats["total_bytes"] > 0
+
+
+def test_memory_tier(make_cache):
+    """Test that the memory tier serves reads and follows invalidation on every backend"""
+    cache = make_cache(memory=MemoryCache(max_entries=100))
+    cache.set("test", "endpoint", "key", {"value": 1})
+    assert cache.get_stats()["memory_entries"] == 1
+    cache.invalidate("test", "endpoint", "key")
+    assert cache.get("test", "endpoint", "key") is None
+    assert cache.get_stats()["memory_entries"] == 0
+
+
+def test_telemetry_bytes(make_cache):
+    """Test that every backend reports payload bytes read and written"""
+    telemetry = CacheTelemetry()
+    cache = make_cache(telemetry=telemetry)
+    cache.set("test", "endpoint", "key", {"value": "x" * 100})
+    cache.get("test", "endpoint", "key")
+    counters = telemetry.snapshot()["test"]["endpoint"]
+    assert counters["bytes_written"] > 0
+    assert counters["bytes_read"] == counters["bytes_written"]
+
+
+def test_concurrent_access(make_cache):
+    """Test that threads can share one backend instance"""
+    cache = make_cache()
+    errors = []
+
+    def worker(thread_id):
+        try:
+            for i in range(50):
+                cache.set("test", "endpoint", f"{thread_id}_{i}", {"value": i})
+                assert cache.get("test", "endpoint", f"{thread_id}_{i}") == {"value": i}
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert cache.get_stats()["valid_entries"] == 200
+
+
+def test_invalidate_ein(make_cache):
+    """Test that invalidate_ein removes one EIN's entries in every service and endpoint, stale ones too"""
+    cache = make_cache(memory=MemoryCache(max_entries=100))
+    cache.set("propublica", "organization", "530196605", {"a": 1})
+    cache.set("propublica", "filings", "530196605", [1, 2])
+    cache.set("charityapi", "organizations", "530196605", {"b": 2}, ttl_hours=-1)
+    cache.set("propublica", "organization", "131644147", {"c": 3})
+    cache.set("propublica", "search", "red_cross", [])
+
+    assert cache.invalidate_ein("53-0196605") == 3
+    assert cache.get("propublica", "organization", "530196605") is None
+    assert cache.get("propublica", "filings", "530196605") is None
+    assert cache.get("propublica", "organization", "131644147") == {"c": 3}
+    assert cache.get("propublica", "search", "red_cross") == []
+    assert cache.invalidate_ein("530196605") == 0
+
+
+def test_iter_identifiers(make_cache):
+    """Test listing the cached identifiers of one service endpoint"""
+    cache = make_cache()
+    cache.set_many("propublica", "organization", {"1": {}, "2": {}, "3": {}})
+    cache.set("propublica", "organization", "expired", {}, ttl_hours=-1)
+    cache.set("propublica", "filings", "4", [])
+    cache.set("charityapi", "organization", "5", {})
+    cache.set("propublica", "search", "red_cross", [])
+    cache.invalidate("propublica", "organization", "2")
+
+    assert sorted(cache.iter_identifiers("propublica", "organization")) == ["1", "3"]
+    assert list(cache.iter_identifiers("propublica", "search")) == ["red_cross"]
+    assert list(cache.iter_identifiers("charityapi", "filings")) == []
+
+
+def test_leases(make_cache):
+    """Test that a fill lease has one owner until it is released or lapses"""
+    cache = make_cache()
+    assert cache.acquire_lease("test", "endpoint", "key", ttl_seconds=30, owner="a")
+    assert not cache.acquire_lease("test", "endpoint", "key", ttl_seconds=30, owner="b")
+    cache.release_lease("test", "endpoint", "key", owner="b")
+    assert not cache.acquire_lease("test", "endpoint", "key", ttl_seconds=30, owner="b")
+    cache.release_lease("test", "endpoint", "key", owner="a")
+    assert cache.acquire_lease("test", "endpoint", "key", ttl_seconds=0, owner="b")
+    assert cache.acquire_lease("test", "endpoint", "key", ttl_seconds=30, owner="a")
+
+
+def test_sweeper_runs_on_any_backend(make_cache):
+    """Test that the background sweeper drives each backend's sweep"""
+    cache = make_cache()
+    cache.set_many("test", "endpoint", {str(i): {"value": i} for i in range(20)}, ttl_hours=-1)
+    sweeper = CacheSweeper(cache)
+    assert sweeper.sweep_once()["expired_removed"] == 20
+    assert sweeper.get_stats()["sweeps"] == 1
+
+
+def test_create_cache_selects_backend():
+    """Test that caching.backend picks the backend and its path settings"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        resolve = lambda path: os.path.join(temp_dir, path)
+        sqlite_cache = create_cache({"database_path": "cache.db"}, resolve)
+        file_cache = create_cache({"backend": "filesystem", "directory": "files", "shards": 4}, resolve)
+        try:
+            assert isinstance(sqlite_cache, APICache)
+            assert isinstance(file_cache, ShardedFileCache)
+            assert file_cache.shards == 4
+            assert create_cache({"backend": "filesystem", "directory": "files", "shards": 4}, resolve) is file_cache
+            with pytest.raises(ValueError, match="shards"):
+                create_cache({"backend": "filesystem", "directory": "files"}, resolve)
+        finally:
+            sqlite_cache.close()
+            file_cache.close()
+
+        with pytest.raises(ValueError):
+            create_cache({"backend": "redis"}, resolve)
+
+
+def test_reopening_with_other_settings_raises():
+    """Test that a shared cache is reused only with the same settings, and its memory tier is built once"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        resolve = lambda path: os.path.join(temp_dir, path)
+        config = {"database_path": "cache.db", "memory": {"max_entries": 10}}
+        cache = create_cache(config, resolve)
+        try:
+            memory = cache.memory
+            assert isinstance(memory, MemoryCache)
+            assert create_cache(dict(config), resolve) is cache
+            assert cache.memory is memory
+            for changed in ({"codec": "json"}, {"max_entries": 100}, {"memory": {"max_entries": 20}},
+                            {"stampede": {"enabled": True}}, {"dedup": {"enabled": True}}):
+                with pytest.raises(ValueError, match="already open"):
+                    create_cache(dict(config, **changed), resolve)
+        finally:
+            cache.close()
+        # Once closed, the path can be opened with other settings
+        reopened = create_cache(dict(config, codec="json"), resolve)
+        assert reopened.codecs.codec.name == "json"
+        reopened.close()
+
+
+def test_backend_missing_a_storage_hook_cannot_be_created():
+    """Test that a backend that leaves a required storage hook unimplemented fails at construction"""
+    class IncompleteCache(CacheBackend):
+        name = "incomplete"
+
+        def _read_entries(self, keys):
+            return {}
+
+    with pytest.raises(TypeError, match="_write_entries"):
+        IncompleteCache()
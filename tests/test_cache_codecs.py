@@ -0,0 +1,96 @@
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.cache.api_cache import APICache
+from charapi.cache.codecs import CodecRegistry, JSONCodec, ZlibCodec, create_codec, split_codec_id
+
+
+PAYLOAD = {
+    "organization": {"ein": 530196605, "name": "AMERICAN NATIONAL RED CROSS", "state": "DC"},
+    "filings_with_data": [{"tax_prd": 202306, "totrevenue": 3217077611, "pct_compnsatncurrofcr": 0.0123}] * 20
+}
+
+
+@pytest.mark.parametrize("name", ["json", "zlib", "zstd"])
+def test_codec_round_trip(name):
+    """Test that every codec decodes what it encodes"""
+    if name == "zstd":
+        pytest.importorskip("zstandard")
+    codec = create_codec(name)
+    assert codec.decode(codec.encode(PAYLOAD)) == PAYLOAD
+
+
+def test_zlib_is_smaller_than_json():
+    """Test that compressed payloads take fewer bytes than JSON text"""
+    assert len(ZlibCodec().encode(PAYLOAD)) < len(JSONCodec().encode(PAYLOAD)) / 2
+
+
+def test_unknown_codec_rejected():
+    """Test that unknown codec names and ids are rejected"""
+    with pytest.raises(ValueError):
+        create_codec("lz4")
+    with pytest.raises(ValueError):
+        CodecRegistry("zlib").decode(b"", 99)
+
+
+def test_payload_versions():
+    """Test that stored ids carry the payload version and older payloads are upgraded in order"""
+    upgrades = {0: lambda value: {**value, "v1": True}, 1: lambda value: {**value, "v2": True}}
+    old = CodecRegistry("zlib")
+    new = CodecRegistry("zlib", payload_version=2, upgrades=upgrades)
+    assert old.codec_id == 1
+    assert split_codec_id(new.codec_id) == (1, 2)
+
+    assert new.decode(old.encode({"a": 1}), old.codec_id) == {"a": 1, "v1": True, "v2": True}
+    assert new.decode(new.encode({"a": 1}), new.codec_id) == {"a": 1}
+    with pytest.raises(ValueError):
+        old.decode(new.encode({"a": 1}), new.codec_id)
+    with pytest.raises(ValueError):
+        CodecRegistry("zlib", payload_version=16)
+
+
+def test_legacy_json_rows_stay_readable():
+    """Test that a database written before codecs existed is upgraded in place"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_path = os.path.join(temp_dir, "cache.db")
+        conn = sqlite3.connect(database_path)
+        conn.execute(
+            "CREATE TABLE api_cache (cache_key TEXT PRIMARY KEY, api_source TEXT NOT NULL, "
+            "data TEXT NOT NULL, created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "INSERT INTO api_cache VALUES (?, ?, ?, ?, ?)",
+            ("propublica_organization_530196605", "propublica", json.dumps(PAYLOAD), time.time(), time.time() + 3600)
+        )
+        conn.commit()
+        conn.close()
+
+        cache = APICache(database_path, codec="zlib")
+        assert cache.get("propublica", "organization", "530196605") == PAYLOAD
+
+        cache.set("propublica", "organization", "043255365", PAYLOAD)
+        assert cache.get_many("propublica", "organization", ["530196605", "043255365"]) == {
+            "530196605": PAYLOAD, "043255365": PAYLOAD}
+        codecs = dict(cache._get_connection().execute("SELECT cache_key, codec FROM api_cache"))
+        assert codecs == {"propublica_organization_530196605": 0, "propublica_organization_043255365": 1}
+        cache.close()
+
+
+def test_rows_readable_after_codec_change():
+    """Test that switching the configured codec keeps earlier rows readable"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_path = os.path.join(temp_dir, "cache.db")
+        writer = APICache(database_path, codec="zlib", compression_level=9)
+        writer.set("propublica", "organization", "1", PAYLOAD)
+        writer.close()
+
+        reader = APICache(database_path, codec="json")
+        assert reader.get("propublica", "organization", "1") == PAYLOAD
+        reader.close()
@@ -0,0 +1,177 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.cache.api_cache import APICache
+from charapi.cache.backend import create_cache
+from charapi.cache.memory_cache import MemoryCache
+from charapi.cache.replica_cache import ReplicaCache
+from charapi.cache.sharded_cache import ShardedCache
+
+PAYLOAD = {"results": [{"ein": f"{i:09d}", "name": f"ORGANIZATION {i}"} for i in range(20)]}
+
+
+@pytest.fixture
+def cache():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = APICache(os.path.join(temp_dir, "cache.db"), dedup_min_bytes=64)
+        yield cache
+        cache.close()
+
+
+def blob_refs(cache):
+    """Return ({hash: refs} from cache_blobs, {hash: rows} counted from api_cache)."""
+    conn = cache._get_connection()
+    refs = dict(conn.execute("SELECT hash, refs FROM cache_blobs"))
+    rows = dict(conn.execute(
+        "SELECT blob_hash, COUNT(*) FROM api_cache WHERE blob_hash IS NOT NULL GROUP BY blob_hash"
+    ))
+    return refs, rows
+
+
+def test_identical_payloads_share_one_blob(cache):
+    """Test that identical payloads under different keys are stored once and read back whole"""
+    cache.set_many("propublica", "search", {"red cross": PAYLOAD, "american red cross": PAYLOAD})
+    cache.set("charityapi", "search", "red cross", PAYLOAD)
+
+    refs, rows = blob_refs(cache)
+    assert list(refs.values()) == [3]
+    assert refs == rows
+    assert cache.get("propublica", "search", "american red cross") == PAYLOAD
+    assert cache.get_many("charityapi", "search", ["red cross"]) == {"red cross": PAYLOAD}
+    assert [entry[2] for entry in cache.iter_entries("charityapi")] == [cache.codecs.encode(PAYLOAD)]
+
+    stats = cache.get_stats()
+    assert stats["shared_payloads"] == 1
+    assert stats["dedup_saved_bytes"] == 2 * len(cache.codecs.encode(PAYLOAD))
+
+
+def test_small_payloads_stay_inline(cache):
+    """Test that payloads under dedup_min_bytes, such as empty results, are not shared"""
+    cache.set_many("propublica", "search", {"none": [], "also none": []})
+    assert blob_refs(cache) == ({}, {})
+    assert cache.get("propublica", "search", "none") == []
+
+
+def test_rewriting_the_same_payload_keeps_the_blob(cache):
+    """Test that an identical re-fetch only refreshes the key row"""
+    cache.set("propublica", "organization", "1", PAYLOAD, ttl_hours=1)
+    before = cache._get_connection().execute("SELECT rowid, hash FROM cache_blobs").fetchall()
+    cache.set("propublica", "organization", "1", PAYLOAD, ttl_hours=2)
+
+    assert cache._get_connection().execute("SELECT rowid, hash FROM cache_blobs").fetchall() == before
+    assert blob_refs(cache)[0] == {before[0][1]: 1}
+    expires_at = cache.get_entry("propublica", "organization", "1")[1]
+    assert expires_at > time.time() + 3600
+
+
+def test_blobs_are_released_with_their_last_row(cache):
+    """Test that every delete path keeps reference counts right and drops unreferenced blobs"""
+    changed = {"results": PAYLOAD["results"][:10]}
+    cache.set_many("test", "endpoint", {str(i): PAYLOAD for i in range(5)})
+    cache.set_many("test", "expiring", {str(i): PAYLOAD for i in range(5)}, ttl_hours=-1)
+
+    cache.invalidate("test", "endpoint", "0")
+    cache.set("test", "endpoint", "1", changed)
+    assert cache.sweep()["expired_removed"] == 5
+    refs, rows = blob_refs(cache)
+    assert refs == rows
+    assert sorted(refs.values()) == [1, 3]
+
+    cache.invalidate_ein("1")
+    assert sorted(blob_refs(cache)[0].values()) == [3]
+    cache.clear_all()
+    assert blob_refs(cache) == ({}, {})
+
+
+def test_eviction_releases_blobs():
+    """Test that entries evicted for a size budget release their blobs"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = APICache(os.path.join(temp_dir, "cache.db"), dedup_min_bytes=64, max_entries=10,
+                         eviction_check_interval=1)
+        for i in range(30):
+            cache.set("test", "endpoint", str(i), {"value": i, "padding": "x" * 100})
+        refs, rows = blob_refs(cache)
+        assert refs == rows
+        assert len(refs) <= 10
+        cache.close()
+
+
+def test_migration_moves_rows_into_and_out_of_blobs():
+    """Test that turning dedup on or off starts a migration pass that rewrites existing rows"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_path = os.path.join(temp_dir, "cache.db")
+        inline = APICache(database_path)
+        inline.set_many("test", "endpoint", {str(i): PAYLOAD for i in range(10)})
+        inline.close()
+
+        shared = APICache(database_path, dedup_min_bytes=64)
+        assert shared.migration_remaining() == 10
+        assert shared.migrate(batch_size=3, time_budget_seconds=10) == {"migrated": 10, "complete": True}
+        assert list(blob_refs(shared)[0].values()) == [10]
+        assert shared.get_stats()["total_bytes"] == 10 * len(shared.codecs.encode(PAYLOAD))
+        shared.close()
+
+        inline = APICache(database_path)
+        assert inline.migrate()["complete"]
+        assert blob_refs(inline) == ({}, {})
+        assert inline.get_many("test", "endpoint", ["3"]) == {"3": PAYLOAD}
+        inline.close()
+
+
+def test_sharded_and_config():
+    """Test that caching.dedup turns dedup on for SQLite backends"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        resolve = lambda path: os.path.join(temp_dir, path)
+        cache = create_cache({"backend": "sharded", "database_path": "cache.db", "database_shards": 2,
+                              "dedup": {"enabled": True}}, resolve)
+        assert isinstance(cache, ShardedCache)
+        assert all(shard.dedup_min_bytes == 64 for shard in cache.shards)
+        cache.set_many("test", "endpoint", {str(i): PAYLOAD for i in range(10)})
+        assert cache.get_stats()["shared_payloads"] == 2
+        cache.close()
+
+        cache = create_cache({"database_path": "plain.db"}, resolve)
+        assert cache.dedup_min_bytes is None
+        cache.close()
+
+
+def test_replicas_with_and_without_blobs():
+    """Test that replicas keep shared payloads, and replicas published before dedup stay readable"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        writer = APICache(os.path.join(temp_dir, "writer.db"), dedup_min_bytes=64)
+        writer.set_many("test", "endpoint", {"1": PAYLOAD, "2": PAYLOAD})
+        writer.set("test", "endpoint", "old", PAYLOAD, ttl_hours=-1)
+        writer.publish_replica(os.path.join(temp_dir, "replica.db"))
+        writer.close()
+
+        replica = ReplicaCache(os.path.join(temp_dir, "replica.db"), os.path.join(temp_dir, "overlay.db"),
+                               memory=MemoryCache(max_entries=10))
+        assert replica.get_many("test", "endpoint", ["1", "2", "old"]) == {"1": PAYLOAD, "2": PAYLOAD}
+        replica.close()
+        conn = sqlite3.connect(os.path.join(temp_dir, "replica.db"))
+        assert conn.execute("SELECT refs FROM cache_blobs").fetchall() == [(2,)]
+        conn.close()
+
+        legacy_path = os.path.join(temp_dir, "legacy.db")
+        conn = sqlite3.connect(legacy_path)
+        conn.execute(
+            "CREATE TABLE api_cache (cache_key TEXT PRIMARY KEY, api_source TEXT NOT NULL, "
+            "data TEXT NOT NULL, created_at REAL NOT NULL, expires_at REAL NOT NULL, codec INTEGER NOT NULL)"
+        )
+        conn.execute("INSERT INTO api_cache VALUES ('test_endpoint_1', 'test', '{\"a\": 1}', 0, ?, 0)",
+                     (time.time() + 3600,))
+        conn.commit()
+        conn.close()
+
+        legacy = ReplicaCache(legacy_path, os.path.join(temp_dir, "legacy_overlay.db"))
+        assert legacy.get("test", "endpoint", "1") == {"a": 1}
+        assert [entry[0] for entry in legacy.iter_entries()] == ["test_endpoint_1"]
+        legacy.invalidate_ein("1")
+        assert legacy.get("test", "endpoint", "1") is None
+        legacy.close()
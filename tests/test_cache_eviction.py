@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.cache.api_cache import APICache
+
+
+def test_max_entries_evicts_least_recently_used():
+    """Test that eviction keeps recently read entries under an entry budget"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = APICache(os.path.join(temp_dir, "cache.db"), max_entries=10, eviction_check_interval=1000)
+        for i in range(10):
+            cache.set("test", "endpoint", str(i), {"index": i})
+            time.sleep(0.001)
+        cache.get("test", "endpoint", "0")
+        cache.get("test", "endpoint", "1")
+        cache.set("test", "endpoint", "10", {"index": 10})
+
+        assert cache.enforce_limits() == 2
+        remaining = cache.get_many("test", "endpoint", [str(i) for i in range(11)])
+        assert sorted(remaining, key=int) == ["0", "1", "4", "5", "6", "7", "8", "9", "10"]
+        assert cache.get_stats()["evicted_entries"] == 2
+        cache.close()
+
+
+def test_lfu_evicts_least_frequently_used():
+    """Test that LFU eviction keeps the most read entries"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = APICache(os.path.join(temp_dir, "cache.db"), max_entries=3, eviction="lfu",
+                         eviction_check_interval=1000)
+        for i in range(4):
+            cache.set("test", "endpoint", str(i), {"index": i})
+        for _ in range(3):
+            cache.get("test", "endpoint", "0")
+            cache.get("test", "endpoint", "3")
+        cache.get("test", "endpoint", "2")
+
+        cache.enforce_limits()
+        assert sorted(cache.get_many("test", "endpoint", ["0", "1", "2", "3"])) == ["0", "3"]
+        cache.close()
+
+
+def test_max_bytes_budget_checked_on_writes():
+    """Test that writes trigger eviction to stay within max_bytes"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = APICache(os.path.join(temp_dir, "cache.db"), codec="json", max_bytes=2000,
+                         eviction_check_interval=5)
+        for i in range(40):
+            cache.set("test", "endpoint", str(i), {"padding": "x" * 100, "index": i})
+
+        assert cache.get_stats()["total_bytes"] <= 2000
+        assert cache.get("test", "endpoint", "39") == {"padding": "x" * 100, "index": 39}
+        cache.close()
+
+
+def test_reads_do_not_write_until_flushed():
+    """Test that access tracking is buffered in memory, not written per read"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_path = os.path.join(temp_dir, "cache.db")
+        cache = APICache(database_path, max_entries=100)
+        cache.set("test", "endpoint", "1", {"index": 1})
+        for _ in range(5):
+            cache.get("test", "endpoint", "1")
+
+        def stored_hits():
+            conn = sqlite3.connect(database_path)
+            hits = conn.execute("SELECT hits FROM api_cache").fetchone()[0]
+            conn.close()
+            return hits
+
+        assert stored_hits() == 0
+        cache.flush_access()
+        assert stored_hits() == 5
+        cache.close()
+
+
+def test_compact_returns_space():
+    """Test that compaction shrinks the database file after deletes"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_path = os.path.join(temp_dir, "cache.db")
+        cache = APICache(database_path, codec="json")
+        cache.set_many("test", "endpoint", {str(i): {"padding": "x" * 2000} for i in range(500)})
+        cache._get_connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        cache.clear_all()
+
+        result = cache.compact()
+        assert result["bytes_after"] < result["bytes_before"] / 4
+        assert os.path.getsize(database_path) == result["bytes_after"]
+        cache.close()
+
+
+def test_unknown_eviction_rejected():
+    """Test that an unknown eviction policy is rejected"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with pytest.raises(ValueError):
+            APICache(os.path.join(temp_dir, "cache.db"), eviction="random")
@@ -0,0 +1,185 @@
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import yaml
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.cache.__main__ import main
+from charapi.cache.api_cache import APICache
+from charapi.cache.codecs import CodecRegistry
+from charapi.cache.migration import CacheMigrator
+from charapi.clients.base_client import BaseAPIClient
+
+ROWS = 250
+
+
+def write_legacy_database(database_path):
+    """A database as written before codecs, eviction and key columns existed"""
+    conn = sqlite3.connect(database_path)
+    conn.execute(
+        "CREATE TABLE api_cache (cache_key TEXT PRIMARY KEY, api_source TEXT NOT NULL, "
+        "data TEXT NOT NULL, created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+    )
+    now = time.time()
+    conn.executemany("INSERT INTO api_cache VALUES (?, ?, ?, ?, ?)", [
+        (f"propublica_organization_{i:09d}", "propublica", json.dumps({"ein": i}), now, now + 3600)
+        for i in range(ROWS)
+    ])
+    conn.commit()
+    conn.close()
+
+
+def columns(cache):
+    return cache._get_connection().execute(
+        "SELECT codec, endpoint, identifier, size > 0, accessed_at = created_at FROM api_cache ORDER BY cache_key"
+    ).fetchall()
+
+
+def test_legacy_rows_readable_before_migration():
+    """Test that opening an old database only adds columns, and its rows work unmigrated"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_path = os.path.join(temp_dir, "cache.db")
+        write_legacy_database(database_path)
+        cache = APICache(database_path)
+
+        stats = cache.get_stats()
+        assert stats["schema_version"] == APICache.SCHEMA_VERSION
+        assert stats["migration_remaining"] == ROWS
+        assert columns(cache)[0] == (0, "", "", 0, 0)
+
+        assert cache.get("propublica", "organization", "000000007") == {"ein": 7}
+        assert len(list(cache.iter_identifiers("propublica", "organization"))) == ROWS
+        assert cache.invalidate_ein("000000007") == 1
+        cache.close()
+
+
+def test_migration_runs_in_batches_and_resumes():
+    """Test that migrate() upgrades rows a batch at a time, shares progress between connections, and finishes"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_path = os.path.join(temp_dir, "cache.db")
+        write_legacy_database(database_path)
+        first = APICache(database_path)
+        second = APICache(database_path)
+
+        result = first.migrate(batch_size=100, time_budget_seconds=0)
+        assert result == {"migrated": 100, "complete": False}
+        assert second.migration_remaining() == ROWS - 100
+
+        result = second.migrate(batch_size=100, time_budget_seconds=10)
+        assert result == {"migrated": ROWS - 100, "complete": True}
+        assert first.migration_remaining() == 0
+        assert set(columns(first)) == {(1, "organization", identifier, 1, 1) for (_, _, identifier, _, _) in columns(first)}
+        assert first.get("propublica", "organization", "000000007") == {"ein": 7}
+        first.close()
+        second.close()
+
+        reopened = APICache(database_path)
+        assert reopened.migration_remaining() == 0
+        assert reopened.migrate()["migrated"] == 0
+        reopened.close()
+
+
+def test_codec_change_starts_a_new_pass():
+    """Test that switching the configured codec re-encodes earlier rows in the background"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_path = os.path.join(temp_dir, "cache.db")
+        writer = APICache(database_path, codec="zlib")
+        writer.set_many("test", "endpoint", {str(i): {"value": i} for i in range(10)})
+        assert writer.migration_remaining() == 0
+        writer.close()
+
+        cache = APICache(database_path, codec="json")
+        assert cache.migration_remaining() == 10
+        cache.set("test", "endpoint", "new", {"value": "new"})
+        assert cache.migrate()["complete"]
+        codecs = {row[0] for row in cache._get_connection().execute("SELECT codec FROM api_cache")}
+        assert codecs == {0}
+        assert cache.get_many("test", "endpoint", ["3", "new"]) == {"3": {"value": 3}, "new": {"value": "new"}}
+        cache.close()
+
+
+def test_payload_upgrades_apply_on_read_and_migration():
+    """Test that rows from an older payload version are upgraded when read and rewritten by migrate()"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_path = os.path.join(temp_dir, "cache.db")
+        writer = APICache(database_path)
+        writer.set("test", "endpoint", "1", {"name": "A"})
+        writer.close()
+
+        cache = APICache(database_path)
+        cache.codecs = CodecRegistry("zlib", payload_version=1, upgrades={0: lambda value: {"names": [value["name"]]}})
+        cache._plan_migration()
+        assert cache.get("test", "endpoint", "1") == {"names": ["A"]}
+        assert cache.migrate()["migrated"] == 1
+
+        stored_id = cache._get_connection().execute("SELECT codec FROM api_cache").fetchone()[0]
+        assert stored_id == cache.codecs.codec_id == 1 | 1 << 4
+        assert cache.codecs.decode(cache._read_entry("test_endpoint_1")[0], stored_id) == {"names": ["A"]}
+        cache.close()
+
+
+def test_client_migrates_in_the_background():
+    """Test that opening a client on an old database starts a migrator that finishes on its own"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_path = os.path.join(temp_dir, "cache.db")
+        write_legacy_database(database_path)
+        config_path = os.path.join(temp_dir, "config.yaml")
+        with open(config_path, "w") as f:
+            yaml.dump({"example": {}, "caching": {
+                "enabled": True, "database_path": database_path, "migration": {"batch_size": 50, "pause_ms": 1}
+            }}, f)
+
+        client = BaseAPIClient(config_path, "example")
+        migrator = client.cache.migrator
+        assert isinstance(migrator, CacheMigrator)
+        migrator._thread.join(timeout=10)
+        stats = client.cache.get_stats()
+        assert stats["migration_complete"] == True
+        assert stats["migration_migrated"] == ROWS
+        assert stats["migration_remaining"] == 0
+        client.cache.close()
+        assert client.cache.migrator is None
+
+
+def test_migrator_backs_off_and_gives_up_on_repeated_failures():
+    """Test that failed migration calls are retried with a growing pause, then abandoned with the error kept"""
+    class FailingCache:
+        calls = []
+
+        def migrate(self, batch_size, time_budget_seconds):
+            self.calls.append(time.monotonic())
+            raise sqlite3.OperationalError("attempt to write a readonly database")
+
+    cache = FailingCache()
+    migrator = CacheMigrator(cache, pause_seconds=0.01, max_failures=4, max_backoff_seconds=0.04)
+    migrator.start()
+    migrator._thread.join(timeout=10)
+
+    assert len(cache.calls) == 4
+    pauses = [later - earlier for earlier, later in zip(cache.calls, cache.calls[1:])]
+    # 0.02, 0.04, then capped at 0.04
+    assert pauses[0] >= 0.02 and pauses[1] >= 0.04 and pauses[2] >= 0.04
+    stats = migrator.get_stats()
+    assert stats["migration_gave_up"] == True
+    assert stats["migration_failures"] == 4
+    assert stats["migration_last_error"] == "OperationalError: attempt to write a readonly database"
+
+
+def test_cli_migrate(capsys):
+    """Test the migrate maintenance command"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_path = os.path.join(temp_dir, "cache.db")
+        write_legacy_database(database_path)
+        config_path = os.path.join(temp_dir, "config.yaml")
+        with open(config_path, "w") as f:
+            yaml.dump({"caching": {"database_path": database_path}}, f)
+
+        main(["--config", config_path, "migrate", "--batch-size", "100"])
+        assert f"Migrated {ROWS} rows" in capsys.readouterr().out
+        cache = APICache(database_path)
+        assert cache.migration_remaining() == 0
+        cache.close()
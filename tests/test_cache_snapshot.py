@@ -0,0 +1,166 @@
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.cache.__main__ import main
+from charapi.cache.api_cache import APICache
+from charapi.cache.file_cache import ShardedFileCache
+from charapi.cache.memory_cache import MemoryCache
+from charapi.cache.snapshot import SnapshotError, export_snapshot, import_snapshot, verify_snapshot
+
+
+def fill(cache):
+    cache.set_many("propublica", "organization", {"111111111": {"name": "A"}, "222222222": {"name": "B"}})
+    cache.set_many("propublica", "filings", {"111111111": [{"tax_prd": 202306}]})
+    cache.set("charityapi", "organizations", "111111111", {"data": {"ein": "111111111"}}, ttl_hours=48)
+    cache.set("propublica", "search", "red cross", [{"ein": "530196605"}])
+    cache.set("propublica", "organization", "333333333", {"name": "expired"}, ttl_hours=-1)
+
+
+def test_export_import_roundtrip_keeps_ttls():
+    """Test that a snapshot carries every unexpired entry with its original expiry"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = APICache(os.path.join(temp_dir, "source.db"))
+        fill(source)
+        snapshot_path = Path(temp_dir) / "warm.snapshot"
+        result = export_snapshot(source, snapshot_path)
+        assert result["entries"] == 5
+        assert verify_snapshot(snapshot_path) == 5
+
+        target = APICache(os.path.join(temp_dir, "target.db"), codec="json")
+        assert import_snapshot(target, snapshot_path) == {"imported": 5, "expired_skipped": 0}
+        assert target.get("propublica", "organization", "111111111") == {"name": "A"}
+        assert target.get("propublica", "search", "red cross") == [{"ein": "530196605"}]
+        assert target.get("propublica", "organization", "333333333") is None
+
+        source_expiry = dict(
+            (key, expires_at) for key, _, _, _, _, expires_at in source.iter_entries()
+        )
+        target_expiry = dict(
+            (key, expires_at) for key, _, _, _, _, expires_at in target.iter_entries()
+        )
+        assert target_expiry == source_expiry
+        source.close()
+        target.close()
+
+
+def test_export_filters():
+    """Test that exports can be limited by service, endpoint and EIN"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = APICache(os.path.join(temp_dir, "cache.db"))
+        fill(cache)
+        snapshot_path = Path(temp_dir) / "filtered.snapshot"
+
+        assert export_snapshot(cache, snapshot_path, services=["charityapi"])["entries"] == 1
+        assert export_snapshot(cache, snapshot_path, endpoints=["organization"])["entries"] == 2
+        assert export_snapshot(cache, snapshot_path, eins=["11-1111111"])["entries"] == 3
+        assert export_snapshot(
+            cache, snapshot_path, services=["propublica"], endpoints=["filings"], eins=["111111111"]
+        )["entries"] == 1
+        cache.close()
+
+
+def test_import_across_backends_and_memory_tier():
+    """Test that snapshots move between backends and replace stale memory-tier values"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = ShardedFileCache(os.path.join(temp_dir, "files"), shards=4)
+        fill(source)
+        snapshot_path = Path(temp_dir) / "files.snapshot"
+        export_snapshot(source, snapshot_path)
+
+        target = APICache(os.path.join(temp_dir, "target.db"), memory=MemoryCache(max_entries=10))
+        target.set("propublica", "organization", "111111111", {"name": "old"})
+        import_snapshot(target, snapshot_path)
+        assert target.get("propublica", "organization", "111111111") == {"name": "A"}
+        assert target.get_stats()["valid_entries"] == 5
+        source.close()
+        target.close()
+
+
+def test_import_skips_entries_expired_since_export():
+    """Test that entries expiring between export and import are not loaded"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = APICache(os.path.join(temp_dir, "source.db"))
+        source.set("test", "endpoint", "short", {"value": 1}, ttl_hours=0.5 / 3600)
+        source.set("test", "endpoint", "long", {"value": 2})
+        snapshot_path = Path(temp_dir) / "warm.snapshot"
+        export_snapshot(source, snapshot_path)
+        time.sleep(0.6)
+
+        target = APICache(os.path.join(temp_dir, "target.db"))
+        assert import_snapshot(target, snapshot_path) == {"imported": 1, "expired_skipped": 1}
+        source.close()
+        target.close()
+
+
+def test_corrupt_snapshot_is_rejected_before_loading():
+    """Test that a damaged or truncated snapshot raises and leaves the cache untouched"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = APICache(os.path.join(temp_dir, "cache.db"))
+        fill(cache)
+        snapshot_path = Path(temp_dir) / "warm.snapshot"
+        export_snapshot(cache, snapshot_path)
+        cache.clear_all()
+
+        content = bytearray(snapshot_path.read_bytes())
+        content[len(content) // 2] ^= 0xFF
+        snapshot_path.write_bytes(bytes(content))
+        with pytest.raises(SnapshotError):
+            import_snapshot(cache, snapshot_path)
+
+        snapshot_path.write_bytes(bytes(content[:len(content) // 2]))
+        with pytest.raises(SnapshotError):
+            import_snapshot(cache, snapshot_path)
+
+        snapshot_path.write_bytes(b"not a snapshot")
+        with pytest.raises(SnapshotError):
+            verify_snapshot(snapshot_path)
+        assert cache.get_stats()["valid_entries"] == 0
+        cache.close()
+
+
+def test_cli_export_import(capsys):
+    """Test the export and import maintenance commands"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        def write_config(name):
+            config_path = os.path.join(temp_dir, f"{name}.yaml")
+            with open(config_path, "w") as f:
+                yaml.dump({"caching": {"database_path": os.path.join(temp_dir, f"{name}.db")}}, f)
+            return config_path
+
+        source_config = write_config("source")
+        target_config = write_config("target")
+        eins_path = os.path.join(temp_dir, "eins.yaml")
+        with open(eins_path, "w") as f:
+            yaml.dump({"eins": ["22-2222222"]}, f)
+
+        source = APICache(os.path.join(temp_dir, "source.db"))
+        fill(source)
+        source.close()
+
+        snapshot_path = os.path.join(temp_dir, "warm.snapshot")
+        main(["--config", source_config, "export", snapshot_path, "--eins", eins_path])
+        assert "Exported 1 entries" in capsys.readouterr().out
+        main(["--config", target_config, "import", snapshot_path])
+        assert "Imported 1 entries" in capsys.readouterr().out
+
+        target = APICache(os.path.join(temp_dir, "target.db"))
+        assert target.get("propublica", "organization", "222222222") == {"name": "B"}
+        target.close()
+
+        # Text EIN lists and empty files work too
+        text_path = os.path.join(temp_dir, "eins.txt")
+        with open(text_path, "w") as f:
+            f.write("# portfolio\n22-2222222\n")
+        main(["--config", source_config, "export", snapshot_path, "--eins", text_path])
+        assert "Exported 1 entries" in capsys.readouterr().out
+        empty_path = os.path.join(temp_dir, "empty.yaml")
+        open(empty_path, "w").close()
+        main(["--config", source_config, "export", snapshot_path, "--eins", empty_path])
+        assert "Exported 0 entries" in capsys.readouterr().out
@@ -0,0 +1,194 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+import yaml
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.cache.api_cache import APICache
+from charapi.cache.file_cache import ShardedFileCache
+from charapi.cache.memory_cache import MemoryCache
+from charapi.cache.telemetry import CacheTelemetry
+from charapi.clients.base_client import BaseAPIClient
+
+
+def create_client(temp_dir, **stampede):
+    config = {
+        "example": {},
+        "caching": {
+            "enabled": True,
+            "database_path": os.path.join(temp_dir, "cache.db"),
+            "example_ttl_hours": 10,
+            "stampede": {"enabled": True, "stale_grace_seconds": 3600, "poll_seconds": 0.01, **stampede}
+        }
+    }
+    config_path = os.path.join(temp_dir, "config.yaml")
+    with open(config_path, "w") as f:
+        yaml.dump(config, f)
+
+    client = BaseAPIClient(config_path, "example")
+    client.telemetry = CacheTelemetry()
+    client.cache.telemetry = client.telemetry
+    return client
+
+
+def lookups(client, endpoint="organization"):
+    return client.get_cache_stats()["telemetry"][endpoint]
+
+
+def test_sqlite_leases_are_exclusive_across_connections():
+    """Test that a lease taken through one database connection excludes other processes until it lapses"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        first = APICache(os.path.join(temp_dir, "cache.db"))
+        second = APICache(os.path.join(temp_dir, "cache.db"))
+
+        assert first.acquire_lease("test", "endpoint", "1", ttl_seconds=30, owner="a")
+        assert not second.acquire_lease("test", "endpoint", "1", ttl_seconds=30, owner="b")
+        assert first.acquire_lease("test", "endpoint", "1", ttl_seconds=30, owner="a")
+        assert second.acquire_lease("test", "endpoint", "2", ttl_seconds=30, owner="b")
+
+        first.release_lease("test", "endpoint", "1", owner="a")
+        assert second.acquire_lease("test", "endpoint", "1", ttl_seconds=0.05, owner="b")
+        time.sleep(0.1)
+        assert first.acquire_lease("test", "endpoint", "1", ttl_seconds=30, owner="a")
+        first.close()
+        second.close()
+
+
+def test_filesystem_leases_are_exclusive_and_lapse():
+    """Test lease files: one holder at a time, and a lapsed lease can be taken over"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = ShardedFileCache(os.path.join(temp_dir, "files"), shards=4)
+        assert cache.acquire_lease("test", "endpoint", "1", ttl_seconds=0.05, owner="a")
+        assert not cache.acquire_lease("test", "endpoint", "1", ttl_seconds=30, owner="b")
+        time.sleep(0.1)
+        assert cache.acquire_lease("test", "endpoint", "1", ttl_seconds=30, owner="b")
+        cache.release_lease("test", "endpoint", "1", owner="a")
+        assert not cache.acquire_lease("test", "endpoint", "1", ttl_seconds=30, owner="a")
+        cache.release_lease("test", "endpoint", "1", owner="b")
+        assert cache.acquire_lease("test", "endpoint", "1", ttl_seconds=30, owner="a")
+        assert os.listdir(os.path.join(temp_dir, "files", ".leases")) == [cache._lease_path(
+            cache._generate_key("test", "endpoint", "1")).name]
+        cache.close()
+
+
+def test_stale_entries_are_kept_for_the_grace_period():
+    """Test that expired entries stay readable as stale until the grace period ends"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = APICache(os.path.join(temp_dir, "cache.db"), stale_grace_seconds=3600,
+                         memory=MemoryCache(max_entries=10))
+        cache.set("test", "endpoint", "recent", {"value": 1}, ttl_hours=-0.5)
+        cache.set("test", "endpoint", "old", {"value": 2}, ttl_hours=-2)
+
+        assert cache.get("test", "endpoint", "recent") is None
+        value, expires_at = cache.get_entry("test", "endpoint", "recent", allow_stale=True)
+        assert value == {"value": 1}
+        assert expires_at < time.time()
+        assert cache.get_entry("test", "endpoint", "old", allow_stale=True) is None
+
+        assert cache.cleanup_expired() == 1
+        assert cache.get_entry("test", "endpoint", "recent", allow_stale=True) is not None
+        cache.close()
+
+
+def test_memory_tier_reports_the_stored_expiry():
+    """Test that max_age_seconds limits trust in the memory tier without shortening the reported expiry"""
+    memory = MemoryCache(max_entries=10, max_age_seconds=1)
+    expires_at = time.time() + 3600
+    memory.put("key", {"value": 1}, expires_at, 10)
+    assert memory.get_entry("key") == ({"value": 1}, expires_at)
+
+
+def test_stale_entry_is_served_while_another_process_refreshes():
+    """Test that a stale entry is returned without fetching when another worker holds the lease"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        client = create_client(temp_dir)
+        client.cache.set("example", "organization", "1", {"name": "old"}, ttl_hours=-0.1)
+        assert client.cache.acquire_lease("example", "organization", "1", owner="other-worker")
+
+        def fetch():
+            raise AssertionError("should not fetch")
+
+        assert client.get_cached_or_fetch("organization", "1", fetch, None) == {"name": "old"}
+        assert lookups(client)["stale_hit"] == 1
+
+        client.cache.release_lease("example", "organization", "1", owner="other-worker")
+        assert client.get_cached_or_fetch("organization", "1", lambda: {"name": "new"}, None) == {"name": "new"}
+        assert client.get_cached_or_fetch("organization", "1", fetch, None) == {"name": "new"}
+        client.cache.close()
+
+
+def test_miss_waits_for_the_lease_holder_to_fill():
+    """Test that a miss waits for the worker holding the lease instead of fetching again"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        client = create_client(temp_dir, wait_seconds=5)
+        assert client.cache.acquire_lease("example", "organization", "1", owner="other-worker")
+
+        def fill():
+            time.sleep(0.1)
+            client.cache.set("example", "organization", "1", {"name": "filled"})
+            client.cache.release_lease("example", "organization", "1", owner="other-worker")
+
+        filler = threading.Thread(target=fill)
+        filler.start()
+        fetches = []
+        result = client.get_cached_or_fetch("organization", "1", lambda: fetches.append(1) or {"name": "x"}, None)
+        filler.join()
+        assert result == {"name": "filled"}
+        assert fetches == []
+        client.cache.close()
+
+
+def test_miss_fetches_after_waiting_too_long():
+    """Test that a miss fetches itself once wait_seconds pass without a fill"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        client = create_client(temp_dir, wait_seconds=0.05)
+        assert client.cache.acquire_lease("example", "organization", "1", owner="other-worker")
+        assert client.get_cached_or_fetch("organization", "1", lambda: {"name": "mine"}, None) == {"name": "mine"}
+        client.cache.close()
+
+
+def test_stale_entry_survives_fetch_errors():
+    """Test that a failed refresh keeps serving the stale entry instead of caching the error"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        client = create_client(temp_dir)
+        client.cache.set("example", "organization", "1", {"name": "old"}, ttl_hours=-0.1)
+
+        def fail():
+            raise requests.ConnectionError()
+
+        assert client.get_cached_or_fetch("organization", "1", fail, None) == {"name": "old"}
+        assert client.get_cached_or_fetch("organization", "1", fail, None) == {"name": "old"}
+        assert lookups(client)["errors"] == {"connection": 2}
+        client.cache.close()
+
+
+def test_ttls_are_jittered_downwards():
+    """Test that stored TTLs are spread below the configured TTL"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        client = create_client(temp_dir, ttl_jitter=0.2, early_refresh_beta=0)
+        for identifier in range(50):
+            client.get_cached_or_fetch("organization", str(identifier), lambda: {"name": "A"}, None)
+
+        now = time.time()
+        ttls = [(expires_at - now) / 3600 for _, _, _, _, _, expires_at in client.cache.iter_entries()]
+        assert all(7.9 <= ttl <= 10.0 for ttl in ttls)
+        assert max(ttls) - min(ttls) > 0.5
+        client.cache.close()
+
+
+def test_entries_near_expiry_are_refreshed_early():
+    """Test XFetch: an entry about to expire is refreshed on a hit, a young one is not"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        client = create_client(temp_dir, early_refresh_beta=1.0)
+        client.telemetry.record_fetch("example", "organization", 600)
+        client.cache.set("example", "organization", "young", {"name": "old"}, ttl_hours=1000)
+        client.cache.set("example", "organization", "expiring", {"name": "old"}, ttl_hours=1 / 3600)
+
+        assert client.get_cached_or_fetch("organization", "young", lambda: {"name": "new"}, None) == {"name": "old"}
+        assert client.get_cached_or_fetch("organization", "expiring", lambda: {"name": "new"}, None) == {"name": "new"}
+        assert lookups(client)["hit"] == 2
+        client.cache.close()
@@ -0,0 +1,86 @@
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.cache.api_cache import APICache
+from charapi.cache.sweeper import CacheSweeper
+from charapi.clients.base_client import BaseAPIClient
+
+
+def fill_expired(cache, count):
+    cache.set_many("test", "endpoint", {str(i): {"padding": "x" * 500} for i in range(count)}, ttl_hours=-1)
+
+
+def test_sweep_deletes_in_batches_within_budget():
+    """Test that a sweep stops after its time budget and reports leftover work"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = APICache(os.path.join(temp_dir, "cache.db"))
+        fill_expired(cache, 1000)
+        cache.set("test", "endpoint", "valid", {"ok": True})
+
+        first = cache.sweep(batch_size=100, time_budget_seconds=0)
+        assert first == {"expired_removed": 100, "vacuumed_pages": first["vacuumed_pages"], "complete": False}
+
+        second = cache.sweep(batch_size=100, time_budget_seconds=10)
+        assert second["expired_removed"] == 900
+        assert second["complete"] == True
+        assert cache.get_stats()["expired_entries"] == 0
+        assert cache.get("test", "endpoint", "valid") == {"ok": True}
+        cache.close()
+
+
+def test_sweep_releases_free_pages_incrementally():
+    """Test that sweeps hand freed pages back to the filesystem a few at a time"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_path = os.path.join(temp_dir, "cache.db")
+        cache = APICache(database_path, codec="json")
+        fill_expired(cache, 2000)
+        conn = cache._get_connection()
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+        result = cache.sweep(batch_size=5000, vacuum_pages=10)
+        assert result["vacuumed_pages"] == 10
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        cache.sweep(vacuum_pages=free_pages)
+        assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+        cache.close()
+
+
+def test_sweeper_thread_runs_and_stops():
+    """Test that the background sweeper removes expired rows and stops with the cache"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = APICache(os.path.join(temp_dir, "cache.db"))
+        fill_expired(cache, 50)
+        sweeper = CacheSweeper.for_cache(cache, {"interval_seconds": 0.05})
+        assert CacheSweeper.for_cache(cache, {}) is sweeper
+
+        deadline = time.time() + 5
+        while cache.get_stats()["expired_entries"] and time.time() < deadline:
+            time.sleep(0.02)
+        assert cache.get_stats()["sweep_expired_removed"] == 50
+
+        cache.close()
+        assert not sweeper._thread.is_alive()
+
+
+def test_cleanup_on_startup_runs_once_per_cache():
+    """Test that clients sharing a cache do not each run a startup cleanup"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_path = os.path.join(temp_dir, "cache.db")
+        config = {"example": {}, "caching": {"enabled": True, "database_path": database_path,
+                                             "cleanup_on_startup": True}}
+        config_path = os.path.join(temp_dir, "config.yaml")
+        with open(config_path, "w") as f:
+            yaml.dump(config, f)
+
+        first = BaseAPIClient(config_path, "example")
+        fill_expired(first.cache, 3)
+        second = BaseAPIClient(config_path, "example")
+
+        assert second.cache is first.cache
+        assert second.cache.get_stats()["expired_entries"] == 3
+        first.cache.close()
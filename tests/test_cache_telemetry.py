@@ -0,0 +1,100 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import requests
+import yaml
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.cache.api_cache import APICache
+from charapi.cache.telemetry import CacheTelemetry, classify_error
+from charapi.clients.base_client import BaseAPIClient
+
+
+def create_client(temp_dir, telemetry):
+    config = {
+        "example": {},
+        "caching": {"enabled": True, "database_path": os.path.join(temp_dir, "cache.db"), "codec": "json"}
+    }
+    config_path = os.path.join(temp_dir, "config.yaml")
+    with open(config_path, "w") as f:
+        yaml.dump(config, f)
+
+    client = BaseAPIClient(config_path, "example")
+    client.telemetry = telemetry
+    client.cache.telemetry = telemetry
+    return client
+
+
+def test_lookup_results_and_errors_per_endpoint():
+    """Test hits, misses, negative hits and error classes are counted per endpoint"""
+    telemetry = CacheTelemetry()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        client = create_client(temp_dir, telemetry)
+
+        def fail():
+            raise requests.HTTPError("503 Server Error for url: https://example.org")
+
+        assert client.get_cached_or_fetch("organization", "1", lambda: {"name": "A"}, None) == {"name": "A"}
+        assert client.get_cached_or_fetch("organization", "1", lambda: {"name": "B"}, None) == {"name": "A"}
+        assert client.get_cached_or_fetch("filings", "1", fail, None) is None
+        assert client.get_cached_or_fetch("filings", "1", fail, None) is None
+
+        stats = client.get_cache_stats()["telemetry"]
+        organization = stats["organization"]
+        assert (organization["hit"], organization["miss"], organization["negative_hit"]) == (1, 1, 0)
+        assert organization["hit_ratio"] == 0.5
+        assert organization["bytes_written"] == len('{"name": "A"}')
+        assert organization["fetch_latency"]["count"] == 1
+
+        filings = stats["filings"]
+        assert (filings["hit"], filings["miss"], filings["negative_hit"]) == (0, 1, 1)
+        assert filings["errors"] == {"http_503": 1}
+        client.cache.close()
+
+
+def test_prometheus_text_dump():
+    """Test the Prometheus text exposition output"""
+    telemetry = CacheTelemetry()
+    telemetry.record_lookup("propublica", "organization", "hit", 0.0002)
+    telemetry.record_fetch("propublica", "organization", 0.3, error=requests.Timeout())
+    telemetry.record_bytes("propublica", "organization", read=100, written=40)
+
+    text = telemetry.prometheus_text()
+    labels = 'service="propublica",endpoint="organization"'
+    assert f'charapi_cache_lookups_total{{{labels},result="hit"}} 1' in text
+    assert f'charapi_cache_bytes_total{{{labels},direction="read"}} 100' in text
+    assert f'charapi_upstream_errors_total{{{labels},error="timeout"}} 1' in text
+    assert f'charapi_upstream_fetch_seconds_bucket{{{labels},le="0.25"}} 0' in text
+    assert f'charapi_upstream_fetch_seconds_bucket{{{labels},le="0.5"}} 1' in text
+    assert f'charapi_upstream_fetch_seconds_bucket{{{labels},le="+Inf"}} 1' in text
+    assert f"charapi_upstream_fetch_seconds_count{{{labels}}} 1" in text
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "metrics" / "charapi.prom"
+        telemetry.write_prometheus(path)
+        assert path.read_text() == text
+
+
+def test_bulk_reads_count_bytes():
+    """Test that get_many records payload bytes read"""
+    telemetry = CacheTelemetry()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = APICache(os.path.join(temp_dir, "cache.db"), codec="json", telemetry=telemetry)
+        cache.set_many("propublica", "organization", {"1": [1], "2": [2]})
+        cache.get_many("propublica", "organization", ["1", "2", "3"])
+
+        counters = telemetry.snapshot()["propublica"]["organization"]
+        assert counters["bytes_written"] == 6
+        assert counters["bytes_read"] == 6
+        cache.close()
+
+
+def test_classify_error():
+    """Test upstream error classification"""
+    assert classify_error(requests.HTTPError("404 Client Error for url: x")) == "http_404"
+    assert classify_error(requests.ConnectionError()) == "connection"
+    assert classify_error(requests.exceptions.SSLError()) == "ssl"
+    assert classify_error(ValueError("Expecting value")) == "decode"
+    assert classify_error(KeyError("data")) == "KeyError"
@@ -458,6 +458,29 @@ def test_cache_stats_disabled():
         os.unlink(config_path)
 
 
+def test_prefetch_serves_cached_organization():
+    """Test that prefetched cache state answers the next lookup for each EIN"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = {
+            "charityapi": {"base_url": "https://api.charityapi.org/api", "timeout": 30},
+            "caching": {"enabled": True, "database_path": os.path.join(temp_dir, "cache.db")}
+        }
+        config_path = os.path.join(temp_dir, "config.yaml")
+        with open(config_path, "w") as f:
+            yaml.dump(config, f)
+
+        client = CharityAPIClient(config_path)
+        organization = {"name": "AMERICAN NATIONAL RED CROSS", "ein": "530196605"}
+        client.cache.set("charityapi", "organizations", "530196605", organization)
+
+        client.prefetch(["53-0196605", "043255365"])
+        assert client._prefetched["organizations"] == {"530196605": organization, "043255365": None}
+
+        assert client.get_organization("53-0196605") == organization
+        assert "530196605" not in client._prefetched["organizations"]
+        client.cache.close()
+
+
 if __name__ == "__main__":
     test_mock_mode_initialization()
     test_real_mode_with_cache()
@@ -486,4 +509,5 @@ if __name__ == "__main__":
     test_data_field_manager_filing_requirement()
     test_data_field_manager_ruling_year()
     test_cache_stats_disabled()
+    test_prefetch_serves_cached_organization()
     print("All CharityAPI client tests passed!")
@@ -0,0 +1,161 @@
+import io
+import os
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.analyzers.financial_analyzer import FinancialAnalyzer
+from charapi.data.charity_evaluation_result import Ident
+from charapi.data.data_field_manager import DataFieldManager
+from charapi.irs.efile_store import EFILE_FILENAME, EfileExpenseStore, ingest_efiles, parse_return
+
+
+def efile_xml(ein, period_end, return_type="990", program=1425314, admin=325001, fundraising=83568):
+    total = program + admin + fundraising
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<Return xmlns="http://www.irs.gov/efile" returnVersion="2022v5.0">
+  <ReturnHeader>
+    <TaxPeriodEndDt>{period_end}</TaxPeriodEndDt>
+    <ReturnTypeCd>{return_type}</ReturnTypeCd>
+    <Filer>
+      <EIN>{ein}</EIN>
+      <BusinessName><BusinessNameLine1Txt>TEST ORG</BusinessNameLine1Txt></BusinessName>
+    </Filer>
+    <PreparerFirmGrp><PreparerFirmEIN>999999999</PreparerFirmEIN></PreparerFirmGrp>
+  </ReturnHeader>
+  <ReturnData>
+    <IRS990>
+      <TotalFunctionalExpensesGrp>
+        <TotalAmt>{total}</TotalAmt>
+        <ProgramServicesAmt>{program}</ProgramServicesAmt>
+        <ManagementAndGeneralAmt>{admin}</ManagementAndGeneralAmt>
+        <FundraisingAmt>{fundraising}</FundraisingAmt>
+      </TotalFunctionalExpensesGrp>
+    </IRS990>
+  </ReturnData>
+</Return>
+"""
+
+
+def test_parse_return_part_ix():
+    """Test extracting Part IX totals from a 990 e-file"""
+    record = parse_return(io.BytesIO(efile_xml("043255365", "2023-06-30").encode()))
+
+    assert record["ein"] == "043255365"
+    assert record["tax_period"] == 202306
+    assert record["program"] == 1425314
+    assert record["admin"] == 325001
+    assert record["fundraising"] == 83568
+    assert record["total"] == 1425314 + 325001 + 83568
+
+
+def test_parse_return_skips_other_forms():
+    """Test that 990-EZ and 990-PF returns are ignored"""
+    assert parse_return(io.BytesIO(efile_xml("043255365", "2023-06-30", return_type="990EZ").encode())) is None
+
+
+def test_parse_return_legacy_schema():
+    """Test extracting Part IX totals from the pre-2013 schema"""
+    xml = """<Return xmlns="http://www.irs.gov/efile"><ReturnHeader>
+      <TaxPeriodEndDate>2011-12-31</TaxPeriodEndDate><ReturnType>990</ReturnType>
+      <Filer><EIN>530196605</EIN></Filer></ReturnHeader>
+      <ReturnData><IRS990><TotalFunctionalExpenses>
+        <Total>100</Total><ProgramServices>80</ProgramServices>
+        <ManagementAndGeneral>15</ManagementAndGeneral><Fundraising>5</Fundraising>
+      </TotalFunctionalExpenses></IRS990></ReturnData></Return>"""
+    record = parse_return(io.BytesIO(xml.encode()))
+
+    assert record["ein"] == "530196605"
+    assert record["tax_period"] == 201112
+    assert record["program"] == 80
+
+
+def test_ingest_directory_and_zip():
+    """Test parallel ingestion of loose XML files and zip archives"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_dir = Path(temp_dir) / "efiles"
+        input_dir.mkdir()
+        (input_dir / "a_public.xml").write_text(efile_xml("043255365", "2022-06-30", program=100))
+        (input_dir / "broken_public.xml").write_text("<Return><ReturnHeader>")
+        with zipfile.ZipFile(input_dir / "batch.zip", "w") as archive:
+            archive.writestr("b_public.xml", efile_xml("043255365", "2023-06-30"))
+            archive.writestr("c_public.xml", efile_xml("530196605", "2023-06-30", program=2800000000))
+
+        database_path = Path(temp_dir) / EFILE_FILENAME
+        assert ingest_efiles([input_dir], database_path, workers=2, batch_size=1) == 3
+
+        store = EfileExpenseStore(database_path)
+        latest = store.get_latest_expenses("04-3255365")
+        assert latest["tax_period"] == 202306
+        assert latest["program"] == 1425314
+        assert store.get_latest_expenses("999999999") is None
+        store.close()
+
+
+def test_open_store_follows_ingestion_and_rebuilds():
+    """Test that the shared store sees new filings and reconnects after the file is rebuilt"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_dir = Path(temp_dir) / "efiles"
+        input_dir.mkdir()
+        (input_dir / "a_public.xml").write_text(efile_xml("043255365", "2022-06-30"))
+        database_path = Path(temp_dir) / EFILE_FILENAME
+        ingest_efiles([input_dir], database_path, workers=1)
+        store = EfileExpenseStore.open(database_path)
+
+        (input_dir / "b_public.xml").write_text(efile_xml("043255365", "2023-06-30"))
+        ingest_efiles([input_dir], database_path, workers=1)
+        assert EfileExpenseStore.open(database_path) is store
+        assert store.get_latest_expenses("04-3255365")["tax_period"] == 202306
+
+        database_path.unlink()
+        (input_dir / "a_public.xml").unlink()
+        (input_dir / "b_public.xml").unlink()
+        (input_dir / "c_public.xml").write_text(efile_xml("530196605", "2023-06-30"))
+        ingest_efiles([input_dir], database_path, workers=1)
+        rebuilt = EfileExpenseStore.open(database_path)
+        assert rebuilt is not store
+        assert rebuilt.get_latest_expenses("04-3255365") is None
+        assert rebuilt.count() == 1
+        store.close()
+        rebuilt.close()
+
+
+def test_financial_analyzer_uses_efile_source():
+    """Test that FinancialAnalyzer reads expenses from the efile data source"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        xml_path = Path(temp_dir) / "return.xml"
+        xml_path.write_text(efile_xml("043255365", "2023-06-30"))
+        ingest_efiles([xml_path], Path(temp_dir) / EFILE_FILENAME, workers=1)
+
+        config = {
+            "data_fields": {
+                "program_expenses": {"source": "efile", "field": "program"},
+                "admin_expenses": {"source": "efile", "field": "admin"},
+                "fundraising_expenses": {"source": "efile", "field": "fundraising"}
+            },
+            "irs": {"local_data_dir": temp_dir},
+            "manual_data": {"directory": "manual"}
+        }
+        analyzer = FinancialAnalyzer(config)
+        metrics = analyzer.extract_metrics({"totfuncexpns": 1833883}, "043255365")
+
+        assert metrics.program_expenses == 1425314
+        assert metrics.admin_expenses == 325001
+        assert metrics.fundraising_expenses == 83568
+        assert round(metrics.program_expense_ratio, 1) == 77.7
+
+
+def test_efile_source_rejects_unknown_field():
+    """Test that a data field mapped to an expense column the store does not have is a config error"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = {
+            "data_fields": {"program_expenses": {"source": "efile", "field": "programs"}},
+            "irs": {"local_data_dir": temp_dir},
+            "manual_data": {"directory": "manual"}
+        }
+        with pytest.raises(ValueError, match="programs"):
+            DataFieldManager(config).get_field(Ident.PROGRAM_EXPENSES, "043255365")
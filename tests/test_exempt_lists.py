@@ -0,0 +1,103 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.analyzers.compliance_checker import ComplianceChecker
+from charapi.irs.ein_index import EINIndex
+from charapi.irs.exempt_lists import ingest_pub78, ingest_revocations, parse_revocations
+
+
+PUB78_LINES = (
+    "530196605|American National Red Cross|Washington|DC|United States|PC\n"
+    "043255365|47 Palmer Inc.|Cambridge|MA|United States|PC\n"
+    "not-an-ein|Header noise\n"
+)
+REVOCATION_LINES = (
+    "111111111|NEVER REINSTATED||1 MAIN ST|BOSTON|MA|02101|US|03|15-MAY-2010|08-JUN-2011|\n"
+    "222222222|REINSTATED||2 MAIN ST|BOSTON|MA|02101|US|03|15-MAY-2010|08-JUN-2011|01-FEB-2012\n"
+    "333333333|REVOKED AGAIN||3 MAIN ST|BOSTON|MA|02101|US|03|15-MAY-2010|08-JUN-2011|01-FEB-2012\n"
+    "333333333|REVOKED AGAIN||3 MAIN ST|BOSTON|MA|02101|US|03|15-MAY-2019|10-AUG-2019|\n"
+)
+
+
+def write_file(directory, name, content):
+    path = Path(directory) / name
+    path.write_text(content, encoding="latin-1")
+    return path
+
+
+def test_ein_index_membership():
+    """Test sorted EIN index lookups including leading-zero EINs"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "test.idx"
+        assert EINIndex.build([530196605, 43255365, 43255365], path) == 2
+
+        index = EINIndex(path)
+        assert "530196605" in index
+        assert "04-3255365" in index
+        assert "999999999" not in index
+        assert len(index) == 2
+
+
+def test_ein_index_open_picks_up_rebuilds():
+    """Test that the shared index is mapped again after the file is rebuilt"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "test.idx"
+        EINIndex.build([530196605], path)
+        index = EINIndex.open(path)
+        assert EINIndex.open(path) is index
+
+        EINIndex.build([530196605, 43255365], path)
+        rebuilt = EINIndex.open(path)
+        assert rebuilt is not index
+        assert "04-3255365" in rebuilt
+        assert "04-3255365" not in index
+
+
+def test_ein_index_rejects_other_files():
+    """Test that a file without the index header is rejected"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = write_file(temp_dir, "bogus.idx", "not an index at all")
+        with pytest.raises(ValueError):
+            EINIndex(path)
+
+
+def test_revocations_respect_reinstatement():
+    """Test that reinstated EINs are only revoked if revoked again later"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = write_file(temp_dir, "revocations.txt", REVOCATION_LINES)
+        assert sorted(parse_revocations([path])) == [111111111, 333333333]
+
+
+def test_compliance_checker_uses_irs_source():
+    """Test that the irs data-field source answers in_pub78 and is_revoked locally"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        local_data_dir = Path(temp_dir)
+        ingest_pub78([write_file(temp_dir, "pub78.txt", PUB78_LINES)], local_data_dir)
+        ingest_revocations([write_file(temp_dir, "revocations.txt", REVOCATION_LINES)], local_data_dir)
+
+        config = {
+            "data_fields": {
+                "in_pub78": {"source": "irs"},
+                "is_revoked": {"source": "irs"},
+                "has_recent_filing": {"source": "charityapi", "field": "tax_period"}
+            },
+            "irs": {"local_data_dir": temp_dir},
+            "manual_data": {"directory": "manual", "filename": "brief_manual.yaml"}
+        }
+        checker = ComplianceChecker(config)
+        checker.data_manager.set_charityapi_data({"tax_period": 202306})
+
+        listed = checker.check_compliance("530196605")
+        assert listed.in_pub78 == True
+        assert listed.is_revoked == False
+        assert listed.is_compliant == True
+
+        revoked = checker.check_compliance("111111111")
+        assert revoked.in_pub78 == False
+        assert revoked.is_revoked == True
+        assert "Tax-exempt status revoked" in revoked.issues
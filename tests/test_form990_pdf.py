@@ -0,0 +1,118 @@
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+import yaml
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.clients.manual_data_client import ManualDataClient
+from charapi.irs.form990_pdf import extract_pdfs, parse_part_ix_text, write_extracted_yaml
+
+
+PART_IX_PAGE = """Form 990 (2022) 47 PALMER INC 04-3255365 Page 10
+Part IX Statement of Functional Expenses
+24e All other expenses . . . . . . . . 12,500 10,000 2,500
+25 Total functional expenses. Add lines 1 through 24e . . . . 1,833,883 1,425,314 325,001 83,568
+26 Joint costs. Complete this line only if the organization reported in column (B)
+"""
+
+PDF_DIR = Path(os.path.dirname(os.path.dirname(__file__))) / "manual" / "irs990"
+
+
+def test_parse_part_ix_line_25():
+    """Test reading the four line 25 columns from Part IX text"""
+    expenses = parse_part_ix_text(PART_IX_PAGE)
+
+    assert expenses == {"total": 1833883, "program": 1425314, "admin": 325001, "fundraising": 83568}
+
+
+def test_parse_part_ix_without_fundraising_column():
+    """Test that a blank fundraising column reads as zero"""
+    text = PART_IX_PAGE.replace(" 83,568", "").replace("1,833,883", "1,750,315")
+    assert parse_part_ix_text(text)["fundraising"] == 0
+
+
+def test_parse_part_ix_rejects_inconsistent_columns():
+    """Test that columns not adding up to the total are rejected"""
+    assert parse_part_ix_text(PART_IX_PAGE.replace("1,425,314", "1,125,314")) is None
+
+
+def test_parse_ignores_other_pages():
+    """Test that pages without Part IX are ignored"""
+    assert parse_part_ix_text("Part I Summary\nTotal functional expenses 100 80 15 5") is None
+
+
+def test_write_extracted_yaml_uses_manual_layout():
+    """Test that extracted expenses are written in the brief_manual.yaml layout"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_path = Path(temp_dir) / "extracted_expenses.yaml"
+        results = [
+            {"status": "ok", "ein": "043255365", "fiscal_year": 2023,
+             "expenses": {"total": 1833883, "program": 1425314, "admin": 325001, "fundraising": 83568}},
+            {"status": "no_text", "ein": "042105780", "fiscal_year": 2023},
+        ]
+        assert write_extracted_yaml(results, output_path) == 1
+
+        with open(output_path) as f:
+            data = yaml.safe_load(f)
+        assert data == {"ein_043255365": {"fiscal_year_2023": {"expenses": {
+            "program": 1425314, "admin": 325001, "fundraising": 83568}}}}
+
+
+def test_extraction_is_cached_by_content_hash():
+    """Test that unchanged PDFs are served from the cache on re-runs"""
+    pytest.importorskip("pypdf")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = Path(temp_dir) / "043255365_202306_990_2024011722246739.pdf"
+        shutil.copy(PDF_DIR / pdf_path.name, pdf_path)
+        cache_dir = Path(temp_dir) / "cache"
+
+        first = extract_pdfs([pdf_path], cache_dir, workers=1, use_ocr=False)
+        second = extract_pdfs([pdf_path], cache_dir, workers=1, use_ocr=False)
+
+        assert first[0]["cached"] == False
+        assert second[0]["cached"] == True
+        assert second[0]["status"] == first[0]["status"]
+        assert second[0]["ein"] == "043255365"
+        assert second[0]["fiscal_year"] == 2023
+
+
+def test_extraction_errors_are_not_cached():
+    """Test that a PDF that fails to parse is retried on the next run rather than cached"""
+    pytest.importorskip("pypdf")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = Path(temp_dir) / "043255365_202306_990_broken.pdf"
+        pdf_path.write_bytes(b"not a pdf")
+        cache_dir = Path(temp_dir) / "cache"
+
+        first = extract_pdfs([pdf_path], cache_dir, workers=1, use_ocr=False)
+        second = extract_pdfs([pdf_path], cache_dir, workers=1, use_ocr=False)
+
+        assert first[0]["status"] == "error"
+        assert second[0]["cached"] == False
+        assert list(cache_dir.iterdir()) == []
+
+
+def test_manual_data_prefers_user_values_over_extracted():
+    """Test that extracted expenses fill placeholders but never override user data"""
+    saved_data = ManualDataClient._global_data
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(Path(temp_dir) / "brief_manual.yaml", "w") as f:
+                yaml.dump({"ein_04-3255365": {"fiscal_year_2023": {"expenses": {
+                    "program": 0, "admin": 300000, "fundraising": 0}}}}, f)
+            with open(Path(temp_dir) / "extracted_expenses.yaml", "w") as f:
+                yaml.dump({"ein_043255365": {"fiscal_year_2023": {"expenses": {
+                    "program": 1425314, "admin": 325001, "fundraising": 83568}}}}, f)
+
+            ManualDataClient._global_data = None
+            client = ManualDataClient({"manual_data": {"directory": temp_dir, "filename": "brief_manual.yaml"}})
+
+            assert client.get_value("fiscal_year_2023.expenses.program", "043255365") == 1425314
+            assert client.get_value("fiscal_year_2023.expenses.admin", "043255365") == 300000
+            assert client.get_value("fiscal_year_2023.expenses.fundraising", "043255365") == 83568
+    finally:
+        ManualDataClient._global_data = saved_data
@@ -0,0 +1,118 @@
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.cache.api_cache import APICache
+from charapi.cache.memory_cache import MemoryCache
+
+
+def test_lru_evicts_least_recently_used():
+    """Test that a hit protects an entry from LRU eviction"""
+    memory = MemoryCache(max_entries=2)
+    expires_at = time.time() + 60
+    memory.put("a", {"a": 1}, expires_at, 10)
+    memory.put("b", {"b": 1}, expires_at, 10)
+    memory.get("a")
+    memory.put("c", {"c": 1}, expires_at, 10)
+
+    assert memory.get("a") == {"a": 1}
+    assert memory.get("b") is None
+    assert memory.get("c") == {"c": 1}
+
+
+def test_fifo_ignores_hits():
+    """Test that FIFO eviction removes the oldest insert regardless of hits"""
+    memory = MemoryCache(max_entries=2, eviction="fifo")
+    expires_at = time.time() + 60
+    memory.put("a", 1, expires_at, 10)
+    memory.put("b", 2, expires_at, 10)
+    memory.get("a")
+    memory.put("c", 3, expires_at, 10)
+
+    assert memory.get("a") is None
+    assert memory.get("b") == 2
+
+
+def test_byte_budget():
+    """Test that entries are evicted to stay within max_bytes"""
+    memory = MemoryCache(max_bytes=100)
+    expires_at = time.time() + 60
+    memory.put("a", 1, expires_at, 60)
+    memory.put("b", 2, expires_at, 60)
+    memory.put("huge", 3, expires_at, 101)
+
+    assert memory.get("a") is None
+    assert memory.get("b") == 2
+    assert memory.get("huge") is None
+    assert memory.get_stats() == {"memory_entries": 1, "memory_bytes": 60}
+
+
+def test_entries_expire_with_ttl_and_max_age():
+    """Test that entries expire at their TTL, capped by max_age_seconds"""
+    memory = MemoryCache(max_entries=10, max_age_seconds=0.2)
+    memory.put("ttl", 1, time.time() + 0.1, 1)
+    memory.put("age", 2, time.time() + 60, 1)
+    time.sleep(0.3)
+
+    assert memory.get("ttl") is None
+    assert memory.get("age") is None
+
+
+def test_unknown_eviction_rejected():
+    """Test that an unknown eviction policy is rejected"""
+    with pytest.raises(ValueError):
+        MemoryCache(max_entries=1, eviction="random")
+
+
+def test_from_config_requires_a_bound():
+    """Test that the memory tier is only enabled with an entry or byte bound"""
+    assert MemoryCache.from_config(None) is None
+    assert MemoryCache.from_config({"eviction": "lru"}) is None
+    assert MemoryCache.from_config({"max_entries": 5, "enabled": False}) is None
+    assert MemoryCache.from_config({"max_entries": 5}).max_entries == 5
+
+
+def test_api_cache_memory_tier_stays_consistent():
+    """Test that sets, invalidations and clears reach both cache tiers"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = APICache(os.path.join(temp_dir, "cache.db"), memory=MemoryCache(max_entries=100))
+        cache.set("propublica", "organization", "1", {"version": 1})
+        first = cache.get("propublica", "organization", "1")
+        assert cache.get("propublica", "organization", "1") is first
+
+        cache.set("propublica", "organization", "1", {"version": 2})
+        assert cache.get("propublica", "organization", "1") == {"version": 2}
+
+        cache.invalidate("propublica", "organization", "1")
+        assert cache.get("propublica", "organization", "1") is None
+
+        cache.set_many("propublica", "organization", {"2": {"version": 1}, "3": {"version": 1}})
+        assert cache.get_stats()["memory_entries"] == 2
+        cache.clear_all()
+        assert cache.get_many("propublica", "organization", ["2", "3"]) == {}
+        assert cache.get_stats()["memory_entries"] == 0
+        cache.close()
+
+
+def test_api_cache_memory_tier_fills_from_sqlite():
+    """Test that SQLite hits populate the memory tier with the entry's expiry"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_path = os.path.join(temp_dir, "cache.db")
+        writer = APICache(database_path)
+        writer.set("propublica", "organization", "1", {"version": 1}, ttl_hours=0.0001)
+        writer.set("propublica", "organization", "2", {"version": 1})
+
+        reader = APICache(database_path, memory=MemoryCache(max_entries=100))
+        assert reader.get_many("propublica", "organization", ["1", "2"]) == {
+            "1": {"version": 1}, "2": {"version": 1}}
+        assert reader.get_stats()["memory_entries"] == 2
+
+        time.sleep(1)
+        assert reader.get("propublica", "organization", "1") is None
+        assert reader.get("propublica", "organization", "2") == {"version": 1}
+        writer.close()
+        reader.close()
@@ -0,0 +1,198 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.api.prefetch import load_ein_source, plan_prefetch, prefetch_cache
+from charapi.cache.__main__ import main
+from charapi.clients.base_client import BaseAPIClient
+from charapi.clients.charityapi_client import CharityAPIClient
+from charapi.clients.propublica_client import ProPublicaClient
+from charapi.clients.transport import Cassette, RateLimiter
+
+PROPUBLICA_URL = "https://projects.propublica.org/nonprofits/api/v2"
+CHARITYAPI_URL = "https://api.charityapi.org/api"
+EINS = ["04-3255365", "13-2500888", "13-1930176"]
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limiters():
+    RateLimiter.reset_all()
+    yield
+    RateLimiter.reset_all()
+
+
+def write_setup(temp_dir, eins=EINS, rate_limits=None):
+    """A replay cassette with both services' responses for eins, and a config using it with caching on"""
+    cassette = Cassette(Path(temp_dir) / "cassette.jsonl.gz")
+    for ein in eins:
+        organization = {"organization": {"ein": ein, "name": f"ORG {ein}"}, "filings_with_data": [{"tax_prd": 202306}]}
+        cassette.append({"service": "propublica", "url": f"{PROPUBLICA_URL}/organizations/{ein}.json",
+                         "params": None, "status": 200, "elapsed": 0.0, "body": json.dumps(organization)})
+        cassette.append({"service": "charityapi", "url": f"{CHARITYAPI_URL}/organizations/{ein}",
+                         "params": None, "status": 200, "elapsed": 0.0,
+                         "body": json.dumps({"data": {"ein": ein, "status": 1}})})
+
+    config_path = os.path.join(temp_dir, "config.yaml")
+    with open(config_path, "w") as f:
+        yaml.dump({
+            "propublica": {"base_url": PROPUBLICA_URL, "timeout": 30},
+            "charityapi": {"base_url": CHARITYAPI_URL, "api_key": "test_key"},
+            "transport": {"mode": "replay", "cassette_path": str(cassette.path), "latency_scale": 0,
+                          "rate_limits": rate_limits or {}},
+            "caching": {"enabled": True, "database_path": os.path.join(temp_dir, "cache.db"),
+                        "migration": {"enabled": False}, "prefetch": {"max_workers": 2}}
+        }, f)
+    return config_path
+
+
+def test_load_ein_source():
+    """Test reading EINs from a YAML eins list and from a plain text list"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yaml_path = os.path.join(temp_dir, "eins.yaml")
+        with open(yaml_path, "w") as f:
+            f.write('eins:\n  - "04-3255365"    # Passim\n  - 131930176\n')
+        text_path = os.path.join(temp_dir, "eins.txt")
+        with open(text_path, "w") as f:
+            f.write("# portfolio\n04-3255365\n\n13-1930176  # WUPJ\n")
+
+        assert load_ein_source(yaml_path) == ["04-3255365", "131930176"]
+        assert load_ein_source(text_path) == ["04-3255365", "13-1930176"]
+
+
+def test_prefetch_fetches_only_what_an_evaluation_would_miss():
+    """Test that prefetch fills missing entries once and a second run finds everything fresh"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path = write_setup(temp_dir)
+        progress = []
+        result = prefetch_cache(EINS + ["043255365"], config_path, progress=lambda *args: progress.append(args))
+
+        assert result["eins"] == 3
+        assert (result["fresh_entries"], result["fetches"], result["failed"]) == (0, 6, 0)
+        assert [done for done, total, _ in progress] == list(range(1, 7))
+
+        propublica, charityapi = ProPublicaClient(config_path), CharityAPIClient(config_path)
+        propublica.telemetry.reset()
+        for ein in EINS:
+            assert propublica.get_organization(ein)["organization"]["ein"] == ein
+            assert propublica.get_all_filings(ein) == [{"tax_prd": 202306}]
+            assert charityapi.get_organization(ein)["status"] == 1
+        lookups = [counters for endpoints in propublica.telemetry.snapshot().values()
+                   for counters in endpoints.values()]
+        assert [(counters["hit"], counters["miss"]) for counters in lookups] == [(3, 0)] * 3
+        propublica.cache.close()
+        charityapi.cache.close()
+
+        assert prefetch_cache(EINS, config_path)["fresh_entries"] == 9
+        assert prefetch_cache(EINS, config_path)["fetches"] == 0
+
+
+def test_plan_refetches_expiring_and_error_entries():
+    """Test that entries expiring within the horizon and cached errors are planned again"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path = write_setup(temp_dir)
+        client = ProPublicaClient(config_path)
+        client.cache.set("propublica", "organization", "043255365", {"organization": {}}, ttl_hours=2)
+        client.cache.set("propublica", "filings", "043255365", [], ttl_hours=48)
+        client.cache.set("propublica", "organization", "132500888", {"_error_cache": True}, ttl_hours=48)
+        client.cache.set("propublica", "filings", "132500888", [], ttl_hours=48)
+
+        tasks, fresh = plan_prefetch([client], EINS, refresh_within_hours=24)
+        assert fresh == 2
+        assert sorted((ein, endpoints) for _, ein, endpoints in tasks) == [
+            ("04-3255365", ["organization"]),
+            ("13-1930176", ["organization", "filings"]),
+            ("13-2500888", ["organization"]),
+        ]
+        assert plan_prefetch([client], EINS, refresh_within_hours=1)[1] == 3
+        client.cache.close()
+
+
+def test_failed_refresh_keeps_the_cached_entry():
+    """Test that an entry that cannot be refetched is kept, not replaced with an error"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path = write_setup(temp_dir, eins=[])
+        client = CharityAPIClient(config_path)
+        client.cache.set("charityapi", "organizations", "043255365", {"ein": "04-3255365"}, ttl_hours=1)
+        client.cache.close()
+
+        result = prefetch_cache(["04-3255365"], config_path)
+        assert (result["fetches"], result["failed"]) == (0, 2)
+
+        client = CharityAPIClient(config_path)
+        assert client.cache.get("charityapi", "organizations", "043255365") == {"ein": "04-3255365"}
+        assert client.cache.get("propublica", "organization", "043255365")["_error_cache"]
+        client.cache.close()
+
+
+def test_default_warm_uses_cached_endpoint_fetchers():
+    """Test that a client declaring only cached_endpoints() can be warmed and planned"""
+    class ProfileClient(BaseAPIClient):
+        def cached_endpoints(self):
+            return {"profile": lambda ein: {"ein": ein}, "failing": lambda ein: 1 / 0}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path = write_setup(temp_dir, eins=[])
+        with open(config_path) as f:
+            config = yaml.safe_load(f)
+        config["example"] = {}
+        with open(config_path, "w") as f:
+            yaml.dump(config, f)
+
+        client = ProfileClient(config_path, "example")
+        assert client.warm("04-3255365", ["profile"])
+        assert not client.warm("04-3255365", ["profile", "failing"])
+        assert client.cache.get("example", "profile", "043255365") == {"ein": "04-3255365"}
+
+        tasks, fresh = plan_prefetch([client], ["04-3255365"], refresh_within_hours=1)
+        assert (fresh, [endpoints for _, _, endpoints in tasks]) == (1, [["failing"]])
+        client.cache.close()
+
+
+def test_rate_limiter_spaces_requests_across_threads():
+    """Test that one service's limiter is shared and holds all threads to its rate"""
+    limiter = RateLimiter.for_service("propublica", {"requests_per_second": 50, "burst": 2})
+    assert RateLimiter.for_service("propublica", {"burst": 2, "requests_per_second": 50}) is limiter
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=lambda: [limiter.acquire() for _ in range(3)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 12 requests: 2 from the burst, 10 more at 50 per second
+    assert time.perf_counter() - started >= 0.19
+    assert limiter.waited_seconds > 0
+
+
+def test_prefetch_respects_rate_limits():
+    """Test that prefetch fetches no faster than transport.rate_limits allows"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path = write_setup(temp_dir, rate_limits={"propublica": {"requests_per_second": 20}})
+        result = prefetch_cache(EINS, config_path, max_workers=3)
+        assert result["fetches"] == 6
+        assert result["seconds"] >= 0.09
+
+
+def test_cli_prefetch(capsys):
+    """Test the prefetch maintenance command"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path = write_setup(temp_dir)
+        eins_path = os.path.join(temp_dir, "eins.txt")
+        with open(eins_path, "w") as f:
+            f.write("\n".join(EINS[:2]))
+
+        main(["--config", config_path, "prefetch", eins_path, "--ein", EINS[2]])
+        output = capsys.readouterr().out
+        assert "Fetched 6 of 6" in output
+        assert "3 EINs: 0 entries already fresh, 6 fetches, 0 failed" in output
+
+        with pytest.raises(SystemExit):
+            main(["--config", config_path, "prefetch"])
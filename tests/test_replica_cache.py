@@ -0,0 +1,148 @@
+import os
+import sys
+import tempfile
+
+import pytest
+import yaml
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.cache.__main__ import main
+from charapi.cache.api_cache import APICache
+from charapi.cache.backend import create_cache
+from charapi.cache.memory_cache import MemoryCache
+from charapi.cache.replica_cache import ReplicaCache
+
+
+def publish(temp_dir):
+    writer = APICache(os.path.join(temp_dir, "writer.db"))
+    writer.set_many("propublica", "organization", {"111111111": {"name": "A"}, "222222222": {"name": "B"}})
+    writer.set("propublica", "organization", "333333333", {"name": "expired"}, ttl_hours=-1)
+    replica_path = os.path.join(temp_dir, "replica.db")
+    result = writer.publish_replica(replica_path)
+    writer.close()
+    return replica_path, result
+
+
+def test_publish_replica_drops_expired_entries():
+    """Test that a published replica holds only unexpired entries and needs no journal"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        replica_path, result = publish(temp_dir)
+        assert result["entries"] == 2
+        assert result["bytes"] == os.path.getsize(replica_path)
+        assert not os.path.exists(replica_path + ".tmp")
+
+
+def test_replica_reads_without_touching_the_file():
+    """Test that reads come from the replica and create no lock, WAL or journal files"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        replica_path, _ = publish(temp_dir)
+        before = os.path.getmtime(replica_path)
+        cache = ReplicaCache(replica_path, os.path.join(temp_dir, "overlay.db"))
+
+        assert cache.get("propublica", "organization", "111111111") == {"name": "A"}
+        assert cache.get_many("propublica", "organization", ["111111111", "222222222", "333333333"]) == {
+            "111111111": {"name": "A"},
+            "222222222": {"name": "B"}
+        }
+        cache.close()
+
+        for suffix in ("-wal", "-shm", "-journal"):
+            assert not os.path.exists(replica_path + suffix)
+        assert os.path.getmtime(replica_path) == before
+
+
+def test_writes_and_invalidations_go_to_the_overlay():
+    """Test that the overlay takes precedence and tombstones hide replica entries"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        replica_path, _ = publish(temp_dir)
+        cache = ReplicaCache(replica_path, os.path.join(temp_dir, "overlay.db"), memory=MemoryCache(max_entries=10))
+
+        cache.set("propublica", "organization", "111111111", {"name": "A2"})
+        cache.set("propublica", "organization", "444444444", {"name": "D"})
+        assert cache.get("propublica", "organization", "111111111") == {"name": "A2"}
+
+        cache.invalidate("propublica", "organization", "222222222")
+        assert cache.get("propublica", "organization", "222222222") is None
+        assert not cache.exists("propublica", "organization", "222222222")
+
+        stats = cache.get_stats()
+        assert stats["backend"] == "replica"
+        assert stats["valid_entries"] == 2
+        assert stats["replica_entries"] == 2
+        assert stats["overlay_entries"] == 2
+        assert stats["tombstones"] == 1
+        assert sorted(entry[0] for entry in cache.iter_entries()) == [
+            "propublica_organization_111111111", "propublica_organization_444444444"
+        ]
+
+        cache.clear_all()
+        assert cache.get("propublica", "organization", "111111111") is None
+        assert cache.get_stats()["valid_entries"] == 0
+        cache.close()
+
+        reopened = ReplicaCache(replica_path, os.path.join(temp_dir, "overlay.db"))
+        assert reopened.get("propublica", "organization", "111111111") is None
+        reopened.close()
+
+
+def test_invalidate_ein_tombstones_replica_entries():
+    """Test that invalidate_ein hides an EIN's replica entries and iter_identifiers skips them"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        replica_path, _ = publish(temp_dir)
+        cache = ReplicaCache(replica_path, os.path.join(temp_dir, "overlay.db"))
+        cache.set("propublica", "filings", "111111111", [])
+
+        assert cache.invalidate_ein("11-1111111") == 2
+        assert cache.get("propublica", "organization", "111111111") is None
+        assert list(cache.iter_identifiers("propublica", "organization")) == ["222222222"]
+        assert cache.get_stats()["tombstones"] == 1
+        cache.close()
+
+
+def test_workers_share_one_replica():
+    """Test that several read-only workers open the same replica concurrently"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        replica_path, _ = publish(temp_dir)
+        workers = [ReplicaCache(replica_path, os.path.join(temp_dir, f"overlay_{i}.db")) for i in range(4)]
+        for i, worker in enumerate(workers):
+            worker.set("propublica", "organization", "555555555", {"worker": i})
+        for i, worker in enumerate(workers):
+            assert worker.get("propublica", "organization", "111111111") == {"name": "A"}
+            assert worker.get("propublica", "organization", "555555555") == {"worker": i}
+            worker.close()
+
+
+def test_missing_replica_and_config():
+    """Test that caching.backend: replica opens the configured files and requires the replica"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        resolve = lambda path: os.path.join(temp_dir, path)
+        with pytest.raises(FileNotFoundError):
+            create_cache({"backend": "replica", "replica_path": "missing.db"}, resolve)
+
+        publish(temp_dir)
+        cache = create_cache(
+            {"backend": "replica", "replica_path": "replica.db", "overlay_path": "overlay.db",
+             "replica_immutable": False},
+            resolve
+        )
+        assert isinstance(cache, ReplicaCache)
+        assert cache.get("propublica", "organization", "222222222") == {"name": "B"}
+        cache.close()
+
+
+def test_cli_publish_replica(capsys):
+    """Test the publish-replica maintenance command"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path = os.path.join(temp_dir, "config.yaml")
+        with open(config_path, "w") as f:
+            yaml.dump({"caching": {"database_path": os.path.join(temp_dir, "writer.db")}}, f)
+        writer = APICache(os.path.join(temp_dir, "writer.db"))
+        writer.set("propublica", "organization", "111111111", {"name": "A"})
+        writer.close()
+
+        replica_path = os.path.join(temp_dir, "replica.db")
+        main(["--config", config_path, "publish-replica", replica_path])
+        assert "Published 1 entries" in capsys.readouterr().out
+        cache = ReplicaCache(replica_path, os.path.join(temp_dir, "overlay.db"))
+        assert cache.get("propublica", "organization", "111111111") == {"name": "A"}
+        cache.close()
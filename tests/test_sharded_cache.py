@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.cache.backend import create_cache
+from charapi.cache.sharded_cache import ShardedCache
+
+
+def test_entries_for_one_ein_share_a_shard():
+    """Test that routing by identifier keeps every entry for an EIN in one database file"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = ShardedCache(os.path.join(temp_dir, "cache.db"), shards=4)
+        eins = [f"{index:09d}" for index in range(200)]
+        cache.set_many("propublica", "organization", {ein: {"ein": ein} for ein in eins})
+        cache.set_many("propublica", "filings", {ein: [] for ein in eins})
+        cache.set_many("charityapi", "organizations", {ein: {"data": {}} for ein in eins})
+
+        for ein in eins[:20]:
+            shard = cache.shard_for(f"propublica_organization_{ein}")
+            assert shard is cache.shard_for(f"charityapi_organizations_{ein}")
+            assert shard.get("propublica", "filings", ein) == []
+
+        stats = cache.get_stats()
+        assert stats["shards"] == 4
+        assert sum(stats["shard_entries"]) == stats["valid_entries"] == 600
+        assert all(entries > 0 for entries in stats["shard_entries"])
+        assert stats["api_sources"] == 2
+        database_files = sorted(name for name in os.listdir(temp_dir) if name.endswith(".db"))
+        assert database_files == [f"cache.shard{index:02d}.db" for index in range(4)]
+        cache.close()
+
+
+def test_sweep_and_limits_cover_every_shard():
+    """Test that sweeps resume across shards and bounds are split between them"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        bounded = ShardedCache(os.path.join(temp_dir, "bounded.db"), shards=4, max_entries=400)
+        assert [shard.max_entries for shard in bounded.shards] == [100] * 4
+        bounded.close()
+
+        cache = ShardedCache(os.path.join(temp_dir, "cache.db"), shards=4)
+        cache.set_many("test", "endpoint", {f"{index:09d}": {"value": index} for index in range(400)}, ttl_hours=-1)
+        first = cache.sweep(batch_size=10, time_budget_seconds=0)
+        assert first["complete"] == False
+        second = cache.sweep(batch_size=10, time_budget_seconds=10)
+        assert second["complete"] == True
+        assert first["expired_removed"] + second["expired_removed"] == 400
+        assert cache.get_stats()["expired_entries"] == 0
+
+        result = cache.compact()
+        assert result["bytes_after"] > 0
+        cache.close()
+
+
+def test_create_cache_selects_sharded_backend():
+    """Test that caching.backend: sharded opens database_shards files next to database_path"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = create_cache(
+            {"backend": "sharded", "database_path": "cache.db", "database_shards": 2},
+            lambda path: os.path.join(temp_dir, path)
+        )
+        assert isinstance(cache, ShardedCache)
+        assert len(cache.shards) == 2
+        cache.set("propublica", "organization", "123456789", {"name": "A"})
+        assert cache.get("propublica", "organization", "123456789") == {"name": "A"}
+        cache.close()
@@ -0,0 +1,149 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+import yaml
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.clients.propublica_client import ProPublicaClient
+from charapi.irs.soi_store import SOI_DIRNAME, SOIFilingsStore, ingest_soi
+
+
+EXTRACT_2022 = (
+    "ein,tax_pd,subseccd,totrevenue,totfuncexpns,totassetsend,totliabend\n"
+    "530196605,202206,3,3500000000,3200000000,4200000000,800000000\n"
+    "043255365,202206,3,1800000,1700000,2000000,150000\n"
+)
+EXTRACT_2023_DAT = (
+    "EIN TAX_PD SUBSECCD TOTREVENUE TOTFUNCEXPNS TOTASSETSEND TOTLIABEND\n"
+    "043255365 202306 3 1938467 1833883 2146090 160000\n"
+    "530196605 202306 3 3217077611 3019994931 4300000000 900000000\n"
+)
+
+
+def build_store(temp_dir):
+    extract_2022 = Path(temp_dir) / "22eoextract990.csv"
+    extract_2022.write_text(EXTRACT_2022)
+    extract_2023 = Path(temp_dir) / "23eoextract990.dat"
+    extract_2023.write_text(EXTRACT_2023_DAT)
+
+    store_dir = Path(temp_dir) / SOI_DIRNAME
+    rows = ingest_soi([extract_2022, extract_2023], store_dir)
+    return store_dir, rows
+
+
+def test_filings_newest_first():
+    """Test that filings come back newest first in ProPublica shape"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store_dir, rows = build_store(temp_dir)
+        assert rows == 4
+
+        store = SOIFilingsStore(store_dir)
+        filings = store.get_filings("04-3255365")
+
+        assert [filing["tax_prd"] for filing in filings] == [202306, 202206]
+        assert filings[0]["tax_prd_yr"] == 2022
+        assert filings[0]["totrevenue"] == 1938467
+        assert filings[0]["totfuncexpns"] == 1833883
+        assert filings[0]["totassetsend"] == 2146090
+        assert filings[0]["totliabend"] == 160000
+        store.close()
+
+
+def test_unknown_ein_has_no_filings():
+    """Test that EINs missing from the extracts return an empty list"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store_dir, _ = build_store(temp_dir)
+        store = SOIFilingsStore(store_dir)
+        assert store.get_filings("999999999") == []
+        store.close()
+
+
+def test_column_slices_are_zero_copy():
+    """Test that column lookups return memoryview slices over the mapped files"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store_dir, _ = build_store(temp_dir)
+        store = SOIFilingsStore(store_dir)
+        columns = store.get_columns("530196605")
+
+        assert isinstance(columns["totrevenue"], memoryview)
+        assert list(columns["tax_pd"]) == [202306, 202206]
+        del columns
+        store.close()
+
+
+def test_later_extract_wins_for_same_period():
+    """Test that a repeated EIN and tax period keeps the value from the later file"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        first = Path(temp_dir) / "first.csv"
+        first.write_text("ein,tax_pd,totrevenue\n530196605,202306,1\n")
+        second = Path(temp_dir) / "second.csv"
+        second.write_text("ein,tax_pd,totrevenue\n530196605,202306,2\n")
+
+        store_dir = Path(temp_dir) / SOI_DIRNAME
+        assert ingest_soi([first, second], store_dir) == 1
+
+        store = SOIFilingsStore(store_dir)
+        filing = store.get_filings("530196605")[0]
+        assert filing["totrevenue"] == 2
+        assert "totfuncexpns" not in filing
+        store.close()
+
+
+def test_excel_extract():
+    """Test that .xlsx extracts ingest like CSV ones"""
+    pandas = pytest.importorskip("pandas")
+    pytest.importorskip("openpyxl")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        extract = Path(temp_dir) / "22eoextract990.xlsx"
+        pandas.DataFrame([{"EIN": "043255365", "TAX_PD": "202206", "TOTFUNCEXPNS": "1700000"}]).to_excel(
+            extract, index=False
+        )
+        assert ingest_soi([extract], Path(temp_dir) / SOI_DIRNAME) == 1
+
+
+def test_excel_extract_without_openpyxl_explains_the_extra():
+    """Test that reading .xlsx without the soi extra says how to install it"""
+    try:
+        import openpyxl
+        pytest.skip("openpyxl is installed")
+    except ImportError:
+        pass
+    with tempfile.TemporaryDirectory() as temp_dir:
+        extract = Path(temp_dir) / "22eoextract990.xlsx"
+        extract.write_bytes(b"PK")
+        with pytest.raises(ImportError, match=r"charapi\[soi\]"):
+            ingest_soi([extract], Path(temp_dir) / SOI_DIRNAME)
+
+
+def test_missing_store_raises():
+    """Test that opening a store that was never ingested explains how to build it"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with pytest.raises(FileNotFoundError, match="charapi.irs soi"):
+            SOIFilingsStore(Path(temp_dir) / SOI_DIRNAME)
+
+
+def test_propublica_client_soi_filings_backend():
+    """Test that the soi filings backend serves get_all_filings locally"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        build_store(temp_dir)
+        config = {
+            "propublica": {
+                "base_url": "https://projects.propublica.org/nonprofits/api/v2",
+                "timeout": 10,
+                "filings_backend": "soi"
+            },
+            "irs": {"local_data_dir": temp_dir},
+            "caching": {"enabled": False}
+        }
+        config_path = os.path.join(temp_dir, "config.yaml")
+        with open(config_path, "w") as f:
+            yaml.dump(config, f)
+
+        client = ProPublicaClient(config_path)
+        filings = client.get_all_filings("530196605")
+
+        assert filings[0]["totrevenue"] == 3217077611
+        assert len(filings) == 2
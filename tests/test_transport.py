@@ -0,0 +1,202 @@
+import gzip
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+import requests
+import yaml
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.clients.charityapi_client import CharityAPIClient
+from charapi.clients.transport import (
+    Cassette,
+    CassetteMiss,
+    FaultInjectingTransport,
+    FaultInjector,
+    RecordingTransport,
+    ReplayTransport,
+    TransportResponse,
+)
+
+
+class FakeTransport:
+    def __init__(self, responses):
+        self.responses = responses
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        status, body = self.responses[url]
+        return TransportResponse(url=url, status_code=status, text=body, elapsed_seconds=0.2)
+
+
+def new_cassette(temp_dir):
+    return Cassette(Path(temp_dir) / "test.jsonl.gz")
+
+
+def test_record_then_replay():
+    """Test that recorded interactions are replayed from disk"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        inner = FakeTransport({"https://example.org/orgs/1": (200, '{"data": {"ein": "1"}}')})
+        recorder = RecordingTransport("charityapi", new_cassette(temp_dir), inner)
+        recorder.get("https://example.org/orgs/1", headers={"apikey": "secret"})
+
+        cassette = new_cassette(temp_dir)
+        cassette._load()
+        replay = ReplayTransport("charityapi", cassette, latency_scale=0)
+        response = replay.get("https://example.org/orgs/1")
+
+        assert response.status_code == 200
+        assert response.json() == {"data": {"ein": "1"}}
+
+
+def test_cassette_does_not_store_headers():
+    """Test that request headers (API keys) never reach the cassette"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        inner = FakeTransport({"https://example.org/orgs/1": (200, "{}")})
+        cassette = new_cassette(temp_dir)
+        RecordingTransport("charityapi", cassette, inner).get(
+            "https://example.org/orgs/1", headers={"apikey": "secret"}
+        )
+
+        with gzip.open(cassette.path, "rt") as f:
+            assert "secret" not in f.read()
+
+
+def test_replay_params_are_part_of_key():
+    """Test that requests differing only in query params replay separately"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cassette = new_cassette(temp_dir)
+        for query, body in [("red cross", '["rc"]'), ("salvation", '["sa"]')]:
+            cassette.append({"service": "propublica", "url": "https://example.org/search.json",
+                             "params": {"q": query}, "status": 200, "elapsed": 0.0, "body": body})
+
+        replay = ReplayTransport("propublica", cassette, latency_scale=0)
+        assert replay.get("https://example.org/search.json", params={"q": "salvation"}).json() == ["sa"]
+        assert replay.get("https://example.org/search.json", params={"q": "red cross"}).json() == ["rc"]
+
+
+def test_replay_repeats_last_response():
+    """Test that repeated requests walk the recording and then stick to the last response"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cassette = new_cassette(temp_dir)
+        for status in [503, 200]:
+            cassette.append({"service": "propublica", "url": "https://example.org/o.json",
+                             "params": {}, "status": status, "elapsed": 0.0, "body": "{}"})
+
+        replay = ReplayTransport("propublica", cassette, latency_scale=0)
+        statuses = [replay.get("https://example.org/o.json").status_code for _ in range(3)]
+        assert statuses == [503, 200, 200]
+
+
+def test_replay_scales_latency():
+    """Test that replay sleeps for the recorded latency times the scale"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cassette = new_cassette(temp_dir)
+        cassette.append({"service": "propublica", "url": "https://example.org/o.json",
+                         "params": {}, "status": 200, "elapsed": 0.2, "body": "{}"})
+
+        replay = ReplayTransport("propublica", cassette, latency_scale=0.5)
+        start = time.perf_counter()
+        replay.get("https://example.org/o.json")
+        assert time.perf_counter() - start >= 0.1
+
+
+def test_replay_miss_raises():
+    """Test that an unrecorded request raises CassetteMiss"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        replay = ReplayTransport("propublica", new_cassette(temp_dir), latency_scale=0)
+        with pytest.raises(CassetteMiss):
+            replay.get("https://example.org/unknown.json")
+
+
+def test_replayed_error_status_raises_http_error():
+    """Test that recorded error statuses surface as requests.HTTPError"""
+    response = TransportResponse(url="https://example.org", status_code=404, text="", elapsed_seconds=0)
+    with pytest.raises(requests.HTTPError, match="404"):
+        response.raise_for_status()
+
+
+def test_client_replays_cassette():
+    """Test that a client in replay mode is served from the cassette"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cassette_path = Path(temp_dir) / "client.jsonl.gz"
+        cassette = Cassette(cassette_path)
+        cassette.append({"service": "charityapi", "url": "https://api.example.org/organizations/530196605",
+                         "params": {}, "status": 200, "elapsed": 0.0,
+                         "body": '{"data": {"ein": "530196605", "ntee_cd": "P12"}}'})
+
+        config = {
+            "charityapi": {"base_url": "https://api.example.org", "api_key": "k", "timeout": 5},
+            "caching": {"enabled": False},
+            "transport": {"mode": "replay", "cassette_path": str(cassette_path), "latency_scale": 0}
+        }
+        config_path = os.path.join(temp_dir, "config.yaml")
+        with open(config_path, "w") as f:
+            yaml.dump(config, f)
+
+        client = CharityAPIClient(config_path)
+        assert client.get_ntee_code("530196605") == "P12"
+
+
+def test_fault_injector_bursts():
+    """Test that a triggered fault burst fails burst_length consecutive requests"""
+    injector = FaultInjector("propublica", {"error_rate": 1.0, "errors": ["http_503"], "burst_length": 3})
+    transport = FaultInjectingTransport(FakeTransport({"https://example.org/o.json": (200, "{}")}), injector)
+
+    statuses = [transport.get("https://example.org/o.json").status_code for _ in range(3)]
+    assert statuses == [503, 503, 503]
+    assert injector.injected == {"http_503": 3}
+
+
+def test_fault_injector_timeout_and_connection_errors():
+    """Test that timeout and connection faults raise the matching requests exceptions"""
+    inner = FakeTransport({"https://example.org/o.json": (200, "{}")})
+
+    timeouts = FaultInjectingTransport(inner, FaultInjector("charityapi", {"error_rate": 1.0, "errors": ["timeout"]}))
+    with pytest.raises(requests.Timeout):
+        timeouts.get("https://example.org/o.json")
+
+    connection = FaultInjectingTransport(inner, FaultInjector("charityapi", {"error_rate": 1.0, "errors": ["connection"]}))
+    with pytest.raises(requests.ConnectionError):
+        connection.get("https://example.org/o.json")
+
+
+def test_fault_injector_truncates_bodies():
+    """Test that truncated responses no longer parse as JSON"""
+    inner = FakeTransport({"https://example.org/o.json": (200, '{"name": "Red Cross"}')})
+    transport = FaultInjectingTransport(inner, FaultInjector("propublica", {"truncate_rate": 1.0}))
+
+    response = transport.get("https://example.org/o.json")
+    with pytest.raises(ValueError):
+        response.json()
+
+
+def test_fault_injector_is_reproducible():
+    """Test that the same seed injects the same faults"""
+    profile = {"error_rate": 0.3, "errors": ["timeout", "http_503"], "seed": 7}
+    sequences = []
+    for _ in range(2):
+        injector = FaultInjector("propublica", profile)
+        sequences.append([injector.roll() for _ in range(50)])
+    assert sequences[0] == sequences[1]
+
+
+def test_fault_injector_rejects_unknown_kind():
+    """Test that unknown fault kinds are rejected"""
+    with pytest.raises(ValueError):
+        FaultInjector("propublica", {"errors": ["gremlins"]})
+    for kind in ("http_5O3", "http_50", "http_5030", "http_"):
+        with pytest.raises(ValueError, match=kind):
+            FaultInjector("propublica", {"errors": ["timeout", kind]})
+    assert FaultInjector("propublica", {"errors": ["http_429"]}).http_statuses == {"http_429": 429}
+
+
+def test_fault_injector_shared_per_profile():
+    """Test that clients built from the same profile share one injector"""
+    FaultInjector.reset_all()
+    profile = {"error_rate": 0.05, "seed": 1}
+    assert FaultInjector.for_profile("charityapi", profile) is FaultInjector.for_profile("charityapi", dict(profile))
+    assert FaultInjector.for_profile("charityapi", profile) is not FaultInjector.for_profile("propublica", profile)
+    FaultInjector.reset_all()
@@ -0,0 +1,131 @@
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import pytest
+import yaml
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from charapi.clients.charityapi_client import CharityAPIClient
+from charapi.clients.propublica_client import ProPublicaClient
+from charapi.clients.ttl_policy import FilingTTLPolicy, parse_tax_period
+
+NOW = datetime(2024, 1, 15)
+
+
+def test_parse_tax_period():
+    """Test the tax period formats found in ProPublica, CharityAPI and e-file payloads"""
+    assert parse_tax_period(202306) == (2023, 6)
+    assert parse_tax_period("202306") == (2023, 6)
+    assert parse_tax_period("2023-06-30") == (2023, 6)
+    assert parse_tax_period(None) is None
+    assert parse_tax_period("202313") is None
+    assert parse_tax_period("n/a") is None
+
+
+def test_ttl_runs_until_the_next_filing_is_due():
+    """Test that a recent filing is cached until the next return is due, within the ceiling"""
+    policy = FilingTTLPolicy(filing_lag_months=5, min_ttl_hours=24, max_ttl_hours=24 * 365)
+    # FY ending June 2023 -> next FY ends June 2024 -> due 2024-11-15
+    assert policy.next_filing_due((2023, 6)) == datetime(2024, 11, 15)
+    expected = (datetime(2024, 11, 15) - NOW).total_seconds() / 3600
+    assert policy.ttl_hours((2023, 6), None, 12, now=NOW) == pytest.approx(expected)
+
+    capped = FilingTTLPolicy(max_ttl_hours=720)
+    assert capped.ttl_hours((2023, 6), None, 12, now=NOW) == 720
+
+
+def test_overdue_filings_use_the_floor():
+    """Test that organizations whose next return is already due are rechecked at the floor"""
+    policy = FilingTTLPolicy(min_ttl_hours=24, max_ttl_hours=720)
+    assert policy.ttl_hours((2021, 12), None, 12, now=NOW) == 24
+
+
+def test_acct_pd_without_tax_period():
+    """Test that the fiscal year end month alone gives the next due date"""
+    policy = FilingTTLPolicy(filing_lag_months=5, max_ttl_hours=24 * 365)
+    assert policy.next_filing_due(None, 6, now=NOW) == datetime(2024, 11, 15)
+    assert policy.next_filing_due(None, 12, now=NOW) == datetime(2024, 5, 15)
+    assert policy.next_filing_due(None, 12, now=datetime(2024, 6, 1)) == datetime(2025, 5, 15)
+
+
+def test_payloads_without_cadence_keep_the_flat_ttl():
+    """Test that payloads without filing data, such as search results, use the service TTL"""
+    policy = FilingTTLPolicy(min_ttl_hours=24, max_ttl_hours=720)
+    assert policy.ttl_hours(None, None, 12, now=NOW) == 12
+
+
+def test_from_config():
+    """Test that the policy is off unless caching.ttl_policy.enabled is set"""
+    assert FilingTTLPolicy.from_config(None) is None
+    assert FilingTTLPolicy.from_config({"enabled": False}) is None
+    policy = FilingTTLPolicy.from_config({"enabled": True, "min_ttl_hours": 48})
+    assert policy.min_ttl_hours == 48
+    assert policy.max_ttl_hours == 720
+    with pytest.raises(ValueError):
+        FilingTTLPolicy(min_ttl_hours=100, max_ttl_hours=10)
+
+
+def write_config(temp_dir, service, service_config):
+    config = {
+        service: service_config,
+        "caching": {
+            "enabled": True,
+            "database_path": os.path.join(temp_dir, "cache.db"),
+            f"{service}_ttl_hours": 12,
+            "ttl_policy": {"enabled": True, "min_ttl_hours": 24, "max_ttl_hours": 24 * 365 * 3}
+        }
+    }
+    config_path = os.path.join(temp_dir, "config.yaml")
+    with open(config_path, "w") as f:
+        yaml.dump(config, f)
+    return config_path
+
+
+def stored_ttl_hours(client, endpoint, identifier):
+    for key, _, _, _, created_at, expires_at in client.cache.iter_entries(client.service_name):
+        if key == client.cache._generate_key(client.service_name, endpoint, identifier):
+            return (expires_at - created_at) / 3600
+
+
+def test_propublica_ttls_follow_filings():
+    """Test that ProPublica organization and filings entries live until the next filing, search stays flat"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        client = ProPublicaClient(write_config(temp_dir, "propublica", {"base_url": "", "timeout": 10}))
+        next_year = datetime.now().year + 1
+        organization = {"organization": {"ein": 1}, "filings_with_data": [{"tax_prd": next_year * 100 + 6}]}
+        client.get_cached_or_fetch("organization", "1", lambda: organization, None)
+        client.get_cached_or_fetch("filings", "1", lambda: [{"tax_prd_yr": next_year}], None)
+        client.get_cached_or_fetch("search", "red cross", lambda: [{"ein": 1}], None)
+
+        assert stored_ttl_hours(client, "organization", "1") > 24 * 365
+        assert stored_ttl_hours(client, "filings", "1") > 24 * 365
+        assert stored_ttl_hours(client, "search", "red cross") == pytest.approx(12, abs=0.01)
+        client.cache.close()
+
+
+def test_charityapi_ttls_follow_tax_period():
+    """Test that CharityAPI entries of organizations overdue to file get the floor TTL"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        client = CharityAPIClient(write_config(temp_dir, "charityapi", {"base_url": "", "timeout": 10}))
+        client.get_cached_or_fetch("organizations", "1", lambda: {"tax_period": 201906, "acct_pd": 6}, None)
+        assert stored_ttl_hours(client, "organizations", "1") == pytest.approx(24, abs=0.01)
+        assert client.ttl_hours_for("organizations", {"acct_pd": 6}) <= 24 * 366
+        client.cache.close()
+
+
+def test_flat_ttl_without_policy():
+    """Test that clients keep caching.<service>_ttl_hours when no policy is configured"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path = write_config(temp_dir, "charityapi", {"base_url": "", "timeout": 10})
+        with open(config_path) as f:
+            config = yaml.safe_load(f)
+        del config["caching"]["ttl_policy"]
+        with open(config_path, "w") as f:
+            yaml.dump(config, f)
+
+        client = CharityAPIClient(config_path)
+        assert client.ttl_policy is None
+        assert client.ttl_hours_for("organizations", {"tax_period": 203006}) == 12
+        client.cache.close()